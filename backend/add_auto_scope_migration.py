@@ -0,0 +1,48 @@
+import asyncio
+import asyncpg
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+AUTO_SCOPE_COLUMNS = [
+    ("auto_scope", "BOOLEAN DEFAULT FALSE"),
+    ("auto_scope_daily_budget", "INTEGER DEFAULT 10"),
+]
+
+async def add_auto_scope_columns():
+    """Add per-repository auto-scope settings to the repositories table"""
+    database_url = os.getenv("NEON_DATABASE_URL")
+    if not database_url:
+        raise ValueError("NEON_DATABASE_URL environment variable is not set")
+    
+    conn = await asyncpg.connect(database_url)
+    
+    try:
+        existing = {
+            row['column_name'] for row in await conn.fetch('''
+                SELECT column_name 
+                FROM information_schema.columns 
+                WHERE table_name = 'repositories'
+            ''')
+        }
+        
+        for column_name, column_type in AUTO_SCOPE_COLUMNS:
+            if column_name in existing:
+                print(f"{column_name} column already exists")
+                continue
+            
+            await conn.execute(f'''
+                ALTER TABLE repositories 
+                ADD COLUMN {column_name} {column_type}
+            ''')
+            print(f"✅ Successfully added {column_name} column to repositories table")
+            
+    except Exception as e:
+        print(f"❌ Failed to add auto-scope columns: {e}")
+        raise
+    finally:
+        await conn.close()
+
+if __name__ == "__main__":
+    asyncio.run(add_auto_scope_columns())
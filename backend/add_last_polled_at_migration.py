@@ -0,0 +1,56 @@
+import asyncio
+import asyncpg
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+async def add_last_polled_at_column():
+    """Add last_polled_at column used to order Devin session polling"""
+    database_url = os.getenv("NEON_DATABASE_URL")
+    if not database_url:
+        raise ValueError("NEON_DATABASE_URL environment variable is not set")
+    
+    conn = await asyncpg.connect(database_url)
+    
+    try:
+        result = await conn.fetchval('''
+            SELECT COUNT(*) 
+            FROM information_schema.columns 
+            WHERE table_name = 'devin_sessions' AND column_name = 'last_polled_at'
+        ''')
+        
+        if result > 0:
+            print("last_polled_at column already exists")
+            return
+        
+        await conn.execute('''
+            ALTER TABLE devin_sessions 
+            ADD COLUMN last_polled_at TIMESTAMP NULL
+        ''')
+        await conn.execute('''
+            CREATE INDEX IF NOT EXISTS ix_devin_sessions_last_polled_at
+            ON devin_sessions (last_polled_at)
+        ''')
+        
+        print("✅ Successfully added last_polled_at column to devin_sessions table")
+        
+        columns = await conn.fetch('''
+            SELECT column_name, data_type 
+            FROM information_schema.columns 
+            WHERE table_name = 'devin_sessions'
+            ORDER BY ordinal_position
+        ''')
+        
+        print("Updated devin_sessions table columns:")
+        for row in columns:
+            print(f"  {row['column_name']}: {row['data_type']}")
+            
+    except Exception as e:
+        print(f"❌ Failed to add last_polled_at column: {e}")
+        raise
+    finally:
+        await conn.close()
+
+if __name__ == "__main__":
+    asyncio.run(add_last_polled_at_column())
@@ -0,0 +1,58 @@
+import asyncio
+import asyncpg
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+REPOSITORY_METADATA_COLUMNS = [
+    ("full_name", "VARCHAR NULL"),
+    ("private", "BOOLEAN DEFAULT FALSE"),
+    ("description", "TEXT NULL"),
+    ("default_branch", "VARCHAR NULL"),
+    ("open_issues_count", "INTEGER DEFAULT 0"),
+    ("pushed_at", "TIMESTAMP NULL"),
+]
+
+async def add_repository_metadata_columns():
+    """Add repository metadata columns so /app/repositories can be served from the database"""
+    database_url = os.getenv("NEON_DATABASE_URL")
+    if not database_url:
+        raise ValueError("NEON_DATABASE_URL environment variable is not set")
+    
+    conn = await asyncpg.connect(database_url)
+    
+    try:
+        existing = {
+            row['column_name'] for row in await conn.fetch('''
+                SELECT column_name 
+                FROM information_schema.columns 
+                WHERE table_name = 'repositories'
+            ''')
+        }
+        
+        for column_name, column_type in REPOSITORY_METADATA_COLUMNS:
+            if column_name in existing:
+                print(f"{column_name} column already exists")
+                continue
+            
+            await conn.execute(f'''
+                ALTER TABLE repositories 
+                ADD COLUMN {column_name} {column_type}
+            ''')
+            print(f"✅ Successfully added {column_name} column to repositories table")
+        
+        await conn.execute('''
+            CREATE INDEX IF NOT EXISTS ix_repositories_full_name ON repositories(full_name)
+        ''')
+        
+        print("Run a repository sync (POST /app/repositories/sync) to backfill the new columns")
+            
+    except Exception as e:
+        print(f"❌ Failed to add repository metadata columns: {e}")
+        raise
+    finally:
+        await conn.close()
+
+if __name__ == "__main__":
+    asyncio.run(add_repository_metadata_columns())
@@ -0,0 +1,170 @@
+import os
+import json
+import time
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Optional, Tuple
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, delete, or_
+from sqlalchemy.dialects.postgresql import insert
+
+from .database import AsyncSessionLocal
+from .models import ResponseCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# Cached response namespaces and their TTLs in seconds. Writes that change a
+# response invalidate its namespace explicitly; the TTL only bounds how stale
+# a response can get from changes made outside this app.
+CACHE_TTLS = {
+    "repositories": int(os.getenv("CACHE_TTL_REPOSITORIES", "300")),
+    "dashboard": int(os.getenv("CACHE_TTL_DASHBOARD", "60")),
+    "github-app-status": int(os.getenv("CACHE_TTL_GITHUB_APP_STATUS", "300")),
+}
+
+# Entries the memory backend keeps per process before evicting the least recently used
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1000"))
+
+
+class MemoryCacheBackend:
+    """
+    Per-process cache; fastest, but invalidations only reach this worker.
+
+    Bounded to max_entries: writes drop expired entries and then the least
+    recently used ones, so keys that are never read again (one-off ETags
+    and query strings) don't accumulate.
+    """
+    
+    def __init__(self, max_entries: int = None):
+        self.max_entries = CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+    
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return value
+    
+    async def set(self, key: str, value: Any, ttl: int):
+        now = time.monotonic()
+        self._entries[key] = (now + ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            for expired in [key for key, (expires_at, _) in self._entries.items() if expires_at < now]:
+                del self._entries[expired]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    async def invalidate(self, namespace: str):
+        prefix = f"{namespace}:"
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            self._entries.pop(key, None)
+
+
+class DatabaseCacheBackend:
+    """Cache shared by every worker through the response_cache table"""
+    
+    async def get(self, key: str) -> Optional[Any]:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(ResponseCacheEntry.value).where(
+                    ResponseCacheEntry.key == key,
+                    ResponseCacheEntry.expires_at > _utcnow()
+                )
+            )
+            value = result.scalar_one_or_none()
+        return json.loads(value) if value is not None else None
+    
+    async def set(self, key: str, value: Any, ttl: int):
+        expires_at = _utcnow() + timedelta(seconds=ttl)
+        statement = insert(ResponseCacheEntry).values(key=key, value=json.dumps(value), expires_at=expires_at)
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[ResponseCacheEntry.key],
+                    set_={"value": statement.excluded.value, "expires_at": statement.excluded.expires_at}
+                )
+            )
+            await db.commit()
+    
+    async def invalidate(self, namespace: str):
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(ResponseCacheEntry).where(or_(
+                    ResponseCacheEntry.key.startswith(f"{namespace}:"),
+                    ResponseCacheEntry.expires_at <= _utcnow()
+                ))
+            )
+            await db.commit()
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class ResponseCache:
+    """JSON response cache keyed by namespace, with explicit invalidation"""
+    
+    def __init__(self, backend):
+        self.backend = backend
+    
+    async def get(self, namespace: str, key: str = "") -> Optional[Any]:
+        try:
+            return await self.backend.get(f"{namespace}:{key}")
+        except Exception as e:
+            logger.warning("Response cache read failed for %s: %s", namespace, e)
+            return None
+    
+    async def set(self, namespace: str, value: Any, key: str = "") -> Any:
+        """Store a response and return its JSON-encoded form, which is what later hits return"""
+        encoded = jsonable_encoder(value)
+        try:
+            await self.backend.set(f"{namespace}:{key}", encoded, CACHE_TTLS[namespace])
+        except Exception as e:
+            logger.warning("Response cache write failed for %s: %s", namespace, e)
+        return encoded
+    
+    async def get_or_build(self, namespace: str, build: Callable[[], Awaitable[Any]], key: str = "") -> Any:
+        cached = await self.get(namespace, key)
+        if cached is not None:
+            return cached
+        return await self.set(namespace, await build(), key)
+    
+    async def invalidate(self, *namespaces: str):
+        for namespace in namespaces:
+            try:
+                await self.backend.invalidate(namespace)
+            except Exception as e:
+                logger.warning("Response cache invalidation failed for %s: %s", namespace, e)
+
+
+def build_cache_backend(name: str = None, background_in_api: bool = None):
+    """
+    The configured cache backend. Defaults to memory, or to database when
+    background work runs in separate worker processes (RUN_BACKGROUND_IN_API
+    =false): their writes invalidate the cache from another process, which a
+    per-process memory cache never sees, so memory is refused in that mode.
+    """
+    if background_in_api is None:
+        background_in_api = os.getenv("RUN_BACKGROUND_IN_API", "true").lower() == "true"
+    name = name or os.getenv("CACHE_BACKEND") or ("memory" if background_in_api else "database")
+    if name == "memory":
+        if not background_in_api:
+            raise ValueError(
+                "CACHE_BACKEND=memory cannot be used with RUN_BACKGROUND_IN_API=false: "
+                "invalidations from the worker processes would never reach the API's cache. "
+                "Use CACHE_BACKEND=database."
+            )
+        return MemoryCacheBackend()
+    if name == "database":
+        return DatabaseCacheBackend()
+    raise ValueError(f"Unknown CACHE_BACKEND '{name}'. Available: memory, database")
+
+
+response_cache = ResponseCache(build_cache_backend())
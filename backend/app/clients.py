@@ -0,0 +1,133 @@
+"""
+Process-wide GitHub and Devin clients.
+
+Nothing is built at import: init_clients() runs in the lifespan (and the
+worker's startup), and handlers receive the clients through Depends, so
+tests can swap them with app.dependency_overrides.
+"""
+import os
+import time
+import logging
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import GitHubUser
+from .github_client import GitHubClient
+from .devin_client import DevinClient
+from .token_store import installation_tokens
+
+logger = logging.getLogger(__name__)
+
+# How long an owner -> installation mapping is trusted. Installation webhooks
+# and /verify-installation invalidate it in the process that handles them;
+# this bounds how long other processes keep using a stale mapping.
+INSTALLATION_CACHE_TTL_SECONDS = int(os.getenv("INSTALLATION_CACHE_TTL_SECONDS", "3600"))
+
+_github_client: Optional[GitHubClient] = None
+_devin_client: Optional[DevinClient] = None
+_devin_checked = False
+
+
+def get_github_client() -> GitHubClient:
+    """The default GitHub client (GITHUB_TOKEN or the configured app installation)"""
+    global _github_client
+    if _github_client is None:
+        _github_client = GitHubClient()
+    return _github_client
+
+
+def get_devin_client() -> Optional[DevinClient]:
+    """The Devin client, or None when DEVIN_SERVICE_API_KEY is not set"""
+    global _devin_client, _devin_checked
+    if not _devin_checked:
+        _devin_checked = True
+        try:
+            _devin_client = DevinClient()
+        except ValueError as e:
+            logger.warning("Devin client not initialized: %s", e)
+    return _devin_client
+
+
+class InstallationClients:
+    """
+    Long-lived GitHub clients per app installation, and a cache of which
+    installation each repository owner belongs to.
+
+    Tokens come from the shared store in app/token_store.py when it is
+    enabled, else the client mints its own shortly before expiry. Either
+    way, after the first request for an owner, getting its client is a
+    dictionary lookup instead of a query plus a token mint. Owners without
+    an installation are not cached.
+    """
+
+    def __init__(self):
+        # owner -> (installation_id, cached at)
+        self._owners: Dict[str, Tuple[str, float]] = {}
+        # installation_id -> client
+        self._clients: Dict[str, GitHubClient] = {}
+
+    async def for_installation(self, installation_id) -> GitHubClient:
+        installation_id = str(installation_id)
+        client = self._clients.get(installation_id)
+        if client is None:
+            client = GitHubClient(
+                app_id=os.getenv("Github_App_app_id"),
+                private_key=os.getenv("GITHUB_PEM"),
+                installation_id=installation_id
+            )
+            self._clients[installation_id] = client
+        await installation_tokens.ensure_token(client)
+        return client
+
+    async def for_owner(self, db: AsyncSession, owner: str) -> Optional[GitHubClient]:
+        """Client for the stored installation of a repository owner, or None"""
+        cached = self._owners.get(owner)
+        if cached and time.monotonic() - cached[1] < INSTALLATION_CACHE_TTL_SECONDS:
+            return await self.for_installation(cached[0])
+
+        result = await db.execute(select(GitHubUser.installation_id).where(GitHubUser.username == owner))
+        installation_id = result.scalar_one_or_none()
+        if not installation_id:
+            self._owners.pop(owner, None)
+            return None
+        self._owners[owner] = (installation_id, time.monotonic())
+        return await self.for_installation(installation_id)
+
+    def invalidate(self, owner: Optional[str] = None, installation_id=None):
+        """Forget an owner's mapping and/or an installation's client (and every owner mapped to it)"""
+        if owner is not None:
+            self._owners.pop(owner, None)
+        if installation_id is not None:
+            installation_id = str(installation_id)
+            self._clients.pop(installation_id, None)
+            installation_tokens.evict(installation_id)
+            for cached_owner, (cached_installation, _) in list(self._owners.items()):
+                if cached_installation == installation_id:
+                    del self._owners[cached_owner]
+
+    def clear(self):
+        self._owners.clear()
+        self._clients.clear()
+
+    def status(self) -> Dict:
+        return {"owners": len(self._owners), "clients": len(self._clients), "ttl_seconds": INSTALLATION_CACHE_TTL_SECONDS}
+
+
+installation_clients = InstallationClients()
+
+
+def init_clients():
+    """Build the clients; cheap, since GitHub authentication waits for the first request"""
+    get_github_client()
+    get_devin_client()
+
+
+def reset_clients():
+    """Forget the clients so the next use rebuilds them from the environment"""
+    global _github_client, _devin_client, _devin_checked
+    _github_client = None
+    _devin_client = None
+    _devin_checked = False
+    installation_clients.clear()
@@ -1,15 +1,40 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+from typing import Dict, Optional, Set
+import greenlet
+from sqlalchemy import event, exc, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 from .models import Base
+from .metrics import DB_QUERY_SECONDS, DB_POOL_WAIT_SECONDS, DB_POOL_CONNECT_SECONDS, DB_POOL_TIMEOUTS
+from .tracing import start_span, current_span
+from .query_count import record_query
 
 load_dotenv()
 
-DATABASE_URL = os.getenv("NEON_DATABASE_URL")
+logger = logging.getLogger(__name__)
 
-if not DATABASE_URL:
+from urllib.parse import urlparse
+
+def database_url() -> str:
+    """
+    The primary database URL: NEON_DATABASE_URL, or one built from the
+    individual NEON_CREDS_* values. Read when the engine is first needed,
+    so importing the app never requires database settings.
+    """
+    url = os.getenv("NEON_DATABASE_URL")
+    if url:
+        return url
+    
     pghost = os.getenv("NEON_CREDS_PGHOST")
     pgdatabase = os.getenv("NEON_CREDS_PGDATABASE") 
     pguser = os.getenv("NEON_CREDS_PGUSER")
@@ -17,49 +42,580 @@ if not DATABASE_URL:
     pgsslmode = os.getenv("NEON_CREDS_PGSSLMODE", "require")
     
     if all([pghost, pgdatabase, pguser, pgpassword]):
-        DATABASE_URL = f"postgresql://{pguser}:{pgpassword}@{pghost}/{pgdatabase}?sslmode={pgsslmode}"
-        print(f"Constructed database URL from individual Neon credentials")
-    else:
-        missing_creds = []
-        if not pghost: missing_creds.append("NEON_CREDS_PGHOST")
-        if not pgdatabase: missing_creds.append("NEON_CREDS_PGDATABASE")
-        if not pguser: missing_creds.append("NEON_CREDS_PGUSER")
-        if not pgpassword: missing_creds.append("NEON_CREDS_PGPASSWORD")
-        
-        raise ValueError(
-            f"Neither NEON_DATABASE_URL nor individual Neon credentials are properly set. "
-            f"Missing: {', '.join(missing_creds)}"
-        )
+        logger.info("Constructed database URL from individual Neon credentials")
+        return f"postgresql://{pguser}:{pgpassword}@{pghost}/{pgdatabase}?sslmode={pgsslmode}"
+    
+    missing_creds = []
+    if not pghost: missing_creds.append("NEON_CREDS_PGHOST")
+    if not pgdatabase: missing_creds.append("NEON_CREDS_PGDATABASE")
+    if not pguser: missing_creds.append("NEON_CREDS_PGUSER")
+    if not pgpassword: missing_creds.append("NEON_CREDS_PGPASSWORD")
+    
+    raise ValueError(
+        f"Neither NEON_DATABASE_URL nor individual Neon credentials are properly set. "
+        f"Missing: {', '.join(missing_creds)}"
+    )
 
 # For asyncpg, we need to remove all query parameters and handle SSL separately
-from urllib.parse import urlparse, parse_qs
-
-# Parse the URL to extract components
-parsed_url = urlparse(DATABASE_URL)
-ASYNC_DATABASE_URL = f"postgresql+asyncpg://{parsed_url.username}:{parsed_url.password}@{parsed_url.hostname}:{parsed_url.port or 5432}{parsed_url.path}"
-
-engine = create_async_engine(
-    ASYNC_DATABASE_URL, 
-    echo=True, 
-    pool_pre_ping=True,
-    pool_recycle=300,
-    connect_args={
+def to_async_url(url: str) -> str:
+    # Parse the URL to extract components
+    parsed_url = urlparse(url)
+    return f"postgresql+asyncpg://{parsed_url.username}:{parsed_url.password}@{parsed_url.hostname}:{parsed_url.port or 5432}{parsed_url.path}"
+
+# Optional read replica for read-only endpoints. Reads fall back to the
+# primary when it is unset, unreachable or lagging past REPLICA_MAX_LAG_SECONDS.
+READ_REPLICA_DATABASE_URL = os.getenv("READ_REPLICA_DATABASE_URL")
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", "2"))
+
+# Named engine profiles. Any value can be overridden with the matching
+# DB_* environment variable (DB_POOL_SIZE, DB_MAX_OVERFLOW, ...).
+ENGINE_PROFILES = {
+    # Neon's pooler endpoint runs PgBouncer in transaction mode, which cannot
+    # keep prepared statements between transactions, so caching stays off.
+    "neon-pooler": {
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+        "pool_recycle": 300,
+        "statement_cache_size": 0,
+        "ssl": "require",
+        "warmup_connections": 2,
+    },
+    # Direct connection to the Postgres server: connections are long-lived
+    # and prepared statements are safe to cache.
+    "direct": {
+        "pool_size": 10,
+        "max_overflow": 5,
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "statement_cache_size": 100,
         "ssl": "require",
-        "prepared_statement_cache_size": 0,
+        "warmup_connections": 5,
+    },
+    # Local development database without TLS.
+    "local": {
+        "pool_size": 5,
+        "max_overflow": 5,
+        "pool_timeout": 10,
+        "pool_recycle": 3600,
+        "statement_cache_size": 100,
+        "ssl": None,
+        "warmup_connections": 1,
+    },
+}
+
+
+def load_engine_profile(name: str = None) -> Dict:
+    """Resolve an engine profile by name and apply DB_* environment overrides"""
+    name = name or os.getenv("DB_PROFILE", "neon-pooler")
+    if name not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE '{name}'. Available: {', '.join(ENGINE_PROFILES)}")
+    
+    profile = dict(ENGINE_PROFILES[name], name=name)
+    for key in ("pool_size", "max_overflow", "pool_timeout", "pool_recycle", "statement_cache_size", "warmup_connections"):
+        override = os.getenv(f"DB_{key.upper()}")
+        if override is not None:
+            profile[key] = int(override)
+    ssl_override = os.getenv("DB_SSL")
+    if ssl_override is not None:
+        profile["ssl"] = ssl_override or None
+    return profile
+
+
+class PoolMetrics:
+    """Checkout counters, wait times and connect times for one connection pool"""
+    
+    def __init__(self):
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.total_connect = 0.0
+        self.max_connect = 0.0
+    
+    def record_checkout(self, wait: float, timed_out: bool = False):
+        if timed_out:
+            self.timeouts += 1
+            return
+        self.checkouts += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+    
+    def record_connect(self, elapsed: float):
+        self.connects += 1
+        self.total_connect += elapsed
+        self.max_connect = max(self.max_connect, elapsed)
+
+
+# Keyed by the pool's logging name so metrics survive pool.recreate()
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long each checkout waited for a free
+    connection and, separately, how long opening new connections took.
+    
+    A checkout that opens a connection spends that time inside _do_get, so
+    it is subtracted from the wait; what remains is time spent queueing.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Connect time so far of each checkout in progress, by greenlet
+        self._checkout_connect_time: Dict[greenlet.greenlet, float] = {}
+    
+    def _metrics(self):
+        pool_name = self.logging_name or "default"
+        return pool_name, pool_metrics.setdefault(pool_name, PoolMetrics())
+    
+    def _do_get(self):
+        current = greenlet.getcurrent()
+        if current in self._checkout_connect_time:
+            # QueuePool._do_get retries by calling itself; the outer call measures
+            return super()._do_get()
+        
+        pool_name, metrics = self._metrics()
+        self._checkout_connect_time[current] = 0.0
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            metrics.record_checkout(time.perf_counter() - start, timed_out=True)
+            DB_POOL_TIMEOUTS.inc(pool=pool_name)
+            raise
+        finally:
+            connect_time = self._checkout_connect_time.pop(current)
+        wait = max(time.perf_counter() - start - connect_time, 0.0)
+        metrics.record_checkout(wait)
+        DB_POOL_WAIT_SECONDS.observe(wait, pool=pool_name)
+        return connection
+    
+    def _create_connection(self):
+        start = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            elapsed = time.perf_counter() - start
+            current = greenlet.getcurrent()
+            if current in self._checkout_connect_time:
+                self._checkout_connect_time[current] += elapsed
+            pool_name, metrics = self._metrics()
+            metrics.record_connect(elapsed)
+            DB_POOL_CONNECT_SECONDS.observe(elapsed, pool=pool_name)
+
+
+def statement_operation(statement: str) -> str:
+    return statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+
+
+# Statements slower than SLOW_QUERY_MS are logged with their parameter types,
+# the app code that ran them and an EXPLAIN plan, one JSON object per line in
+# a size-rotated SLOW_QUERY_LOG. Set SLOW_QUERY_MS=0 to turn this off.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "slow_queries.jsonl")
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+# The same statement is explained at most once per this many seconds
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+
+EXPLAINABLE_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+MAX_PENDING_EXPLAINS = 4
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_explained_at: Dict[str, float] = {}
+_explain_tasks: Set[asyncio.Task] = set()
+_slow_query_logger: Optional[logging.Logger] = None
+
+
+def get_slow_query_logger() -> logging.Logger:
+    global _slow_query_logger
+    if _slow_query_logger is None:
+        handler = logging.handlers.RotatingFileHandler(
+            SLOW_QUERY_LOG, maxBytes=SLOW_QUERY_LOG_MAX_BYTES, backupCount=SLOW_QUERY_LOG_BACKUPS
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        # Not under "app": the full records go only to the rotating file
+        slow_logger = logging.getLogger("slow_queries")
+        slow_logger.setLevel(logging.INFO)
+        slow_logger.addHandler(handler)
+        slow_logger.propagate = False
+        _slow_query_logger = slow_logger
+    return _slow_query_logger
+
+
+def parameters_shape(parameters, executemany: bool) -> Dict:
+    """Parameter types (never values) for a slow query record"""
+    def types(params):
+        if isinstance(params, dict):
+            return {key: type(value).__name__ for key, value in params.items()}
+        return [type(value).__name__ for value in params or ()]
+    
+    if executemany:
+        rows = list(parameters or ())
+        return {"rows": len(rows), "types": types(rows[0]) if rows else []}
+    return {"types": types(parameters)}
+
+
+def caller_location() -> Optional[str]:
+    """
+    First frame in app code outside this module that led to the statement.
+    
+    Under the async engine, hooks run in a greenlet whose own stack ends at
+    SQLAlchemy; the awaiting coroutine's frames are on the parent greenlet.
+    """
+    current = greenlet.getcurrent()
+    frame = current.parent.gr_frame if current.parent is not None else sys._getframe()
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_DIR) and os.path.abspath(filename) != os.path.abspath(__file__):
+            return f"{os.path.relpath(filename, os.path.dirname(APP_DIR))}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+async def write_slow_query(async_engine: AsyncEngine, entry: Dict, explain_parameters=None):
+    """Attach an EXPLAIN plan (planner only; nothing is executed) and append the record"""
+    if explain_parameters is not None:
+        try:
+            async with async_engine.connect() as conn:
+                # Not a query of the app: kept out of the metrics, spans, query counts and this log
+                conn = await conn.execution_options(instrumented=False)
+                result = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE off) {entry['statement']}", explain_parameters)
+                entry["plan"] = "\n".join(row[0] for row in result)
+        except Exception as e:
+            # The DBAPI error alone: SQLAlchemy's message would echo the parameter values
+            entry["plan_error"] = str(getattr(e, "orig", None) or e)
+    await asyncio.to_thread(get_slow_query_logger().info, json.dumps(entry, default=str))
+
+
+def record_slow_query(async_engine: AsyncEngine, name: str, statement: str, parameters, executemany: bool, elapsed: float):
+    operation = statement_operation(statement)
+    active_span = current_span()
+    entry = {
+        "ts": datetime.now(timezone.utc).isoformat(),
+        "engine": name,
+        "duration_ms": round(elapsed * 1000, 1),
+        "operation": operation,
+        "statement": statement,
+        "parameters": parameters_shape(parameters, executemany),
+        "caller": caller_location(),
+        "trace_id": active_span.trace_id if active_span else None
+    }
+    logger.warning(
+        "Slow query (%.0f ms) from %s: %s", entry["duration_ms"], entry["caller"], statement[:200],
+        extra={"duration_ms": entry["duration_ms"]}
+    )
+    
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Sync engine use (scripts): no loop to explain on, just record it
+        get_slow_query_logger().info(json.dumps(entry, default=str))
+        return
+    
+    explain_parameters = None
+    statement_key = hashlib.sha1(statement.encode()).hexdigest()
+    now = time.monotonic()
+    if (
+        operation in EXPLAINABLE_OPERATIONS
+        and len(_explain_tasks) < MAX_PENDING_EXPLAINS
+        and now - _explained_at.get(statement_key, float("-inf")) > SLOW_QUERY_EXPLAIN_INTERVAL
+    ):
+        if len(_explained_at) > 1000:
+            _explained_at.clear()
+        _explained_at[statement_key] = now
+        explain_parameters = list(parameters)[0] if executemany else parameters
+    
+    task = loop.create_task(write_slow_query(async_engine, entry, explain_parameters))
+    _explain_tasks.add(task)
+    task.add_done_callback(_explain_tasks.discard)
+
+
+def instrument_engine(async_engine: AsyncEngine, name: str):
+    """
+    Time every statement into db_query_duration_seconds and a child span of
+    the current trace, count it for query budgets and log it if slow.
+    Connections with execution_options(instrumented=False), such as the
+    slow-query log's EXPLAINs, are skipped.
+    """
+    
+    # Timer and span ride on the execution context, so a failed statement
+    # (no after_cursor_execute) leaves nothing behind
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        if not conn.get_execution_options().get("instrumented", True):
+            return
+        record_query(statement)
+        if context is not None:
+            context._query_start = time.perf_counter()
+            context._query_span = start_span(
+                f"SQL {statement_operation(statement)}", "client",
+                {"db.system": "postgresql", "db.engine": name, "db.statement": statement[:1000]}
+            )
+    
+    @event.listens_for(async_engine.sync_engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_query_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        DB_QUERY_SECONDS.observe(elapsed, engine=name, operation=statement_operation(statement))
+        context._query_span.finish()
+        if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+            record_slow_query(async_engine, name, statement, parameters, executemany, elapsed)
+    
+    @event.listens_for(async_engine.sync_engine, "handle_error")
+    def fail_span(exception_context):
+        query_span = getattr(exception_context.execution_context, "_query_span", None)
+        if query_span is not None:
+            query_span.finish(error=exception_context.original_exception)
+
+
+def build_engine(url: str, profile: Dict, name: str = "primary") -> AsyncEngine:
+    connect_args = {
+        "prepared_statement_cache_size": profile["statement_cache_size"],
+        "statement_cache_size": profile["statement_cache_size"],
         "server_settings": {
             "application_name": "devin_issues_app"
         }
     }
-)
-AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    if profile["ssl"]:
+        connect_args["ssl"] = profile["ssl"]
+    
+    async_engine = create_async_engine(
+        url,
+        echo=os.getenv("DB_ECHO", "false").lower() == "true",
+        poolclass=MeteredQueuePool,
+        pool_logging_name=name,
+        pool_size=profile["pool_size"],
+        max_overflow=profile["max_overflow"],
+        pool_timeout=profile["pool_timeout"],
+        pool_pre_ping=True,
+        pool_recycle=profile["pool_recycle"],
+        connect_args=connect_args
+    )
+    instrument_engine(async_engine, name)
+    return async_engine
+
+
+ENGINE_PROFILE = load_engine_profile()
+
+# Engines and session factories are built on first use (normally by the
+# lifespan's init_database) and disposed by dispose_database, so importing
+# this module does no work and needs no database settings.
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[sessionmaker] = None
+_replica_engine: Optional[AsyncEngine] = None
+_replica_session_factory: Optional[sessionmaker] = None
+
+
+class ReplicaSession(AsyncSession):
+    """
+    Read-only session on the replica that falls back to the primary.
+
+    The lag check only runs every REPLICA_LAG_CHECK_INTERVAL, so a replica can
+    go away between checks. When a statement fails with a connection error,
+    the replica is marked unusable and the statement is retried once on the
+    primary; the rest of the session stays on the primary.
+    """
+    
+    async def _with_primary_fallback(self, method, *args, **kwargs):
+        try:
+            return await method(self, *args, **kwargs)
+        # asyncpg raises a refused or reset connect as a bare OSError
+        except (exc.OperationalError, exc.InterfaceError, OSError) as e:
+            if self.bind is not _replica_engine:
+                raise
+            replica_health.mark_unusable(e)
+        try:
+            await self.close()
+        except Exception:
+            pass
+        primary = get_engine()
+        self.bind = primary
+        self.sync_session.bind = primary.sync_engine
+        return await method(self, *args, **kwargs)
+    
+    async def execute(self, *args, **kwargs):
+        return await self._with_primary_fallback(AsyncSession.execute, *args, **kwargs)
+    
+    async def scalar(self, *args, **kwargs):
+        return await self._with_primary_fallback(AsyncSession.scalar, *args, **kwargs)
+    
+    async def get(self, *args, **kwargs):
+        return await self._with_primary_fallback(AsyncSession.get, *args, **kwargs)
+
+
+def get_engine() -> AsyncEngine:
+    """The primary engine, created on first call"""
+    global _engine, _session_factory
+    if _engine is None:
+        _engine = build_engine(to_async_url(database_url()), ENGINE_PROFILE)
+        _session_factory = sessionmaker(_engine, class_=AsyncSession, expire_on_commit=False)
+    return _engine
+
+
+def get_replica_engine() -> Optional[AsyncEngine]:
+    """The read replica engine, or None when READ_REPLICA_DATABASE_URL is unset"""
+    global _replica_engine, _replica_session_factory
+    if _replica_engine is None and READ_REPLICA_DATABASE_URL:
+        _replica_engine = build_engine(to_async_url(READ_REPLICA_DATABASE_URL), ENGINE_PROFILE, name="replica")
+        _replica_session_factory = sessionmaker(_replica_engine, class_=ReplicaSession, expire_on_commit=False)
+    return _replica_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    """A new session on the primary"""
+    get_engine()
+    return _session_factory()
+
+
+def ReplicaSessionLocal() -> AsyncSession:
+    """A new session on the read replica; only valid when get_replica_engine() is not None"""
+    get_replica_engine()
+    return _replica_session_factory()
+
+
+def init_database():
+    """Build the engines up front; called from the lifespan and worker startup"""
+    get_engine()
+    get_replica_engine()
+
+
+async def dispose_database():
+    """Close every pooled connection and forget the engines"""
+    global _engine, _session_factory, _replica_engine, _replica_session_factory
+    for async_engine in (_engine, _replica_engine):
+        if async_engine is not None:
+            await async_engine.dispose()
+    _engine = _session_factory = _replica_engine = _replica_session_factory = None
+
+# Replay lag in seconds; zero when the replica has applied everything it received
+REPLICA_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaHealth:
+    """Cached replica lag check used to decide whether reads may go to the replica"""
+    
+    def __init__(self):
+        self.lag_seconds = None
+        self.usable = False
+        self.checked_at = 0.0
+        self._lock = asyncio.Lock()
+    
+    async def is_usable(self) -> bool:
+        replica_engine = get_replica_engine()
+        if replica_engine is None:
+            return False
+        if time.monotonic() - self.checked_at < REPLICA_LAG_CHECK_INTERVAL:
+            return self.usable
+        
+        async with self._lock:
+            if time.monotonic() - self.checked_at < REPLICA_LAG_CHECK_INTERVAL:
+                return self.usable
+            try:
+                async with replica_engine.connect() as conn:
+                    self.lag_seconds = float(await conn.scalar(REPLICA_LAG_QUERY))
+                self.usable = self.lag_seconds <= REPLICA_MAX_LAG_SECONDS
+                if not self.usable:
+                    logger.warning(
+                        "Replica lag %.1fs exceeds %.1fs, routing reads to primary",
+                        self.lag_seconds, REPLICA_MAX_LAG_SECONDS
+                    )
+            except Exception as e:
+                logger.warning("Replica unavailable, routing reads to primary: %s", e)
+                self.lag_seconds = None
+                self.usable = False
+            self.checked_at = time.monotonic()
+        return self.usable
+    
+    def mark_unusable(self, error: Exception):
+        """Route reads to the primary until the next lag check, after a replica connection failed"""
+        logger.warning("Replica connection failed, routing reads to primary: %s", error)
+        self.lag_seconds = None
+        self.usable = False
+        self.checked_at = time.monotonic()
+
+
+replica_health = ReplicaHealth()
 
 async def create_tables():
-    async with engine.begin() as conn:
+    async with get_engine().begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
+async def warm_pool(target_engine: AsyncEngine = None, connections: int = None):
+    """Open pool connections up front so the first requests don't pay for TLS and auth"""
+    target_engine = target_engine or get_engine()
+    if connections is None:
+        connections = ENGINE_PROFILE["warmup_connections"]
+    connections = min(connections, target_engine.pool.size())
+    if connections <= 0:
+        return
+    
+    start = time.perf_counter()
+    conns = await asyncio.gather(*(target_engine.connect() for _ in range(connections)))
+    try:
+        await asyncio.gather(*(conn.exec_driver_sql("SELECT 1") for conn in conns))
+    finally:
+        for conn in conns:
+            await conn.close()
+    logger.info(
+        "Warmed %d pool connections in %.0f ms",
+        connections, (time.perf_counter() - start) * 1000,
+        extra={"pool": target_engine.pool.logging_name}
+    )
+
+def pool_status(target_engine: AsyncEngine = None) -> Dict:
+    """Current pool occupancy plus cumulative checkout wait and connect metrics"""
+    target_engine = target_engine or get_engine()
+    pool = target_engine.pool
+    metrics = pool_metrics.get(pool.logging_name or "default", PoolMetrics())
+    return {
+        "pool": pool.logging_name,
+        "pool_size": pool.size(),
+        "in_use": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "checkouts": metrics.checkouts,
+        "checkout_timeouts": metrics.timeouts,
+        "checkout_wait_avg_ms": round(metrics.total_wait / metrics.checkouts * 1000, 3) if metrics.checkouts else 0.0,
+        "checkout_wait_max_ms": round(metrics.max_wait * 1000, 3),
+        "connects": metrics.connects,
+        "connect_avg_ms": round(metrics.total_connect / metrics.connects * 1000, 3) if metrics.connects else 0.0,
+        "connect_max_ms": round(metrics.max_connect * 1000, 3)
+    }
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
             yield session
         finally:
             await session.close()
+
+async def get_read_db():
+    """
+    Session for read-only handlers.
+    
+    Uses the read replica when one is configured and within the staleness
+    bound, otherwise the primary; a replica session falls back to the
+    primary if the replica connection fails mid-request (see
+    ReplicaSession). Handlers must not write through it.
+    """
+    session_factory = AsyncSessionLocal
+    if await replica_health.is_usable():
+        session_factory = ReplicaSessionLocal
+    async with session_factory() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
@@ -1,21 +1,47 @@
 import os
+import time
+import logging
 import requests
 from typing import Dict, Optional
 from dotenv import load_dotenv
 
+from .metrics import UPSTREAM_REQUEST_SECONDS
+from .tracing import span
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+DEVIN_API_URL = os.getenv("DEVIN_API_URL", "https://api.devin.ai/v1").rstrip("/")
+
 class DevinClient:
     def __init__(self):
         self.api_key = os.getenv("DEVIN_SERVICE_API_KEY")
         if not self.api_key:
             raise ValueError("DEVIN_SERVICE_API_KEY environment variable must be set")
-        self.base_url = "https://api.devin.ai/v1"
+        self.base_url = DEVIN_API_URL
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
     
+    def _request(self, method: str, endpoint: str, url: str, **kwargs) -> requests.Response:
+        """Send a request to the Devin API, recording its latency under the endpoint template"""
+        kwargs.setdefault("headers", self.headers)
+        start = time.perf_counter()
+        status = "error"
+        try:
+            with span(f"Devin {method} {endpoint}", "client", {"http.method": method, "http.url": url}) as current:
+                response = requests.request(method, url, **kwargs)
+                status = str(response.status_code)
+                current.set_attribute("http.status_code", response.status_code)
+                return response
+        finally:
+            UPSTREAM_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                service="devin", method=method, endpoint=endpoint, status=status
+            )
+    
     def create_session(self, prompt: str, title: str = None) -> Optional[Dict]:
         """Create a new Devin session"""
         url = f"{self.base_url}/sessions"
@@ -27,18 +53,16 @@ class DevinClient:
             payload["title"] = title
         
         try:
-            print(f"Making request to: {url}")
-            print(f"API key present: {'Yes' if self.api_key else 'No'}")
-            print(f"API key length: {len(self.api_key) if self.api_key else 0}")
-            response = requests.post(url, headers=self.headers, json=payload)
-            print(f"Response status: {response.status_code}")
-            print(f"Response text: {response.text}")
+            logger.debug("Creating Devin session: POST %s", url)
+            response = self._request("POST", "/sessions", url, json=payload)
+            logger.debug("Create session response status: %s", response.status_code)
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
-            print(f"Error creating Devin session: {e}")
-            print(f"Response status code: {getattr(e.response, 'status_code', 'N/A')}")
-            print(f"Response text: {getattr(e.response, 'text', 'N/A')}")
+            logger.error(
+                "Error creating Devin session: %s (status %s)",
+                e, getattr(e.response, 'status_code', 'N/A')
+            )
             return None
     
     def get_session_status(self, session_id: str) -> Optional[Dict]:
@@ -50,21 +74,16 @@ class DevinClient:
         }
         
         try:
-            print(f"DEBUG: Making GET request to: {url}")
-            print(f"DEBUG: Headers: {get_headers}")
-            response = requests.get(url, headers=get_headers)
-            print(f"DEBUG: Response status code: {response.status_code}")
-            print(f"DEBUG: Response headers: {dict(response.headers)}")
-            if response.status_code != 200:
-                print(f"DEBUG: Response text: {response.text}")
+            logger.debug("Fetching Devin session status: GET %s", url)
+            response = self._request("GET", "/session/{session_id}", url, headers=get_headers)
+            logger.debug("Session status response code: %s", response.status_code)
             response.raise_for_status()
             result = response.json()
-            print(f"DEBUG: Successfully retrieved session data with keys: {list(result.keys())}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Retrieved session data with keys: %s", list(result.keys()))
             return result
         except requests.RequestException as e:
-            print(f"Error getting session status: {e}")
-            print(f"DEBUG: Request URL was: {url}")
-            print(f"DEBUG: Request headers were: {get_headers}")
+            logger.error("Error getting status for Devin session %s: %s", session_id, e)
             return None
     
     def generate_scope_prompt(self, issue_title: str, issue_body: str, repo_name: str) -> str:
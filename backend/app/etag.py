@@ -0,0 +1,80 @@
+import hashlib
+from typing import Any, Optional
+from fastapi import Request, Response
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import GitHubIssue, DevinSession, GitHubUser, Repository
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag from version parts such as max(updated_at) and row counts"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True when the request's If-None-Match already names this ETag (weak comparison)"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def check_etag(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Set the ETag on the outgoing response, or return a 304 if the client already has it"""
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return None
+
+
+async def repositories_version(db: AsyncSession) -> str:
+    """Validator for /app/repositories: repository and user change times and counts"""
+    result = await db.execute(
+        select(
+            select(func.max(Repository.updated_at)).scalar_subquery(),
+            select(func.count(Repository.id)).scalar_subquery(),
+            select(func.max(GitHubUser.updated_at)).scalar_subquery(),
+            select(func.count(GitHubUser.id)).scalar_subquery()
+        )
+    )
+    return make_etag("repositories", *result.one())
+
+
+async def dashboard_version(db: AsyncSession) -> str:
+    """Validator for /dashboard: issue and session change times and counts"""
+    result = await db.execute(
+        select(
+            select(func.max(GitHubIssue.updated_at)).scalar_subquery(),
+            select(func.count(GitHubIssue.id)).scalar_subquery(),
+            select(func.max(DevinSession.updated_at)).scalar_subquery(),
+            select(func.count(DevinSession.id)).scalar_subquery()
+        )
+    )
+    return make_etag("dashboard", *result.one())
+
+
+async def repository_issues_version(db: AsyncSession, repository_full_name: str, *params: Any) -> str:
+    """Validator for one repository's stored issues and their sessions"""
+    issue_ids = select(GitHubIssue.id).where(GitHubIssue.repository == repository_full_name)
+    result = await db.execute(
+        select(
+            select(func.max(GitHubIssue.updated_at))
+            .where(GitHubIssue.repository == repository_full_name).scalar_subquery(),
+            select(func.count(GitHubIssue.id))
+            .where(GitHubIssue.repository == repository_full_name).scalar_subquery(),
+            select(func.max(DevinSession.updated_at))
+            .where(DevinSession.github_issue_id.in_(issue_ids)).scalar_subquery(),
+            select(func.count(DevinSession.id))
+            .where(DevinSession.github_issue_id.in_(issue_ids)).scalar_subquery()
+        )
+    )
+    return make_etag("issues", repository_full_name, *params, *result.one())
@@ -1,43 +1,126 @@
 import os
 import jwt
 import time
+import logging
+import threading
 import requests
-from typing import List, Dict, Optional
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Tuple
 from dotenv import load_dotenv
 
+from .metrics import UPSTREAM_REQUEST_SECONDS, GITHUB_RATE_LIMIT_REMAINING, GITHUB_RATE_LIMIT_LIMIT, GITHUB_RATE_LIMIT_RESET
+from .tracing import span
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Overridable so benchmarks can point the client at a local stand-in
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+
+# Installation tokens last an hour; long-lived clients mint a new one this
+# many seconds before the current one expires
+TOKEN_REFRESH_MARGIN_SECONDS = int(os.getenv("GITHUB_TOKEN_REFRESH_MARGIN_SECONDS", "300"))
+
+def parse_github_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Parse a GitHub ISO 8601 timestamp into a naive UTC datetime, as stored in the database"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(timezone.utc).replace(tzinfo=None)
+
 class GitHubClient:
     def __init__(self, token: str = None, app_id: str = None, private_key: str = None, installation_id: str = None):
         self.token = token or os.getenv("GITHUB_TOKEN")
         self.app_id = app_id or os.getenv("Github_App_app_id")
         self.private_key = private_key or os.getenv("GITHUB_PEM")
         self.installation_id = installation_id or os.getenv("github_app_install_id")
-        self.base_url = "https://api.github.com"
+        self.base_url = GITHUB_API_URL
         self.headers = {
             "Accept": "application/vnd.github.v3+json"
         }
         
-        if self.app_id and self.private_key and self.installation_id:
-            self._setup_app_authentication()
-        elif self.token:
+        # App credentials are exchanged for an installation token on the first
+        # request, not here, so building a client never touches the network.
+        # The token can also be supplied from outside (see app/token_store.py).
+        self.uses_app_auth = bool(self.app_id and self.private_key and self.installation_id)
+        self._auth_lock = threading.Lock()
+        self._token_expires_at = 0.0
+        # The installation token GitHub last answered 401 to, so a shared
+        # store doesn't hand the same revoked token back
+        self.rejected_token: Optional[str] = None
+        if not self.uses_app_auth and self.token:
             self.headers["Authorization"] = f"token {self.token}"
     
+    def auth_headers(self) -> Dict[str, str]:
+        """Request headers, minting an installation token first if there is none or it is about to expire"""
+        if self.uses_app_auth and self.token_needs_refresh():
+            with self._auth_lock:
+                if self.token_needs_refresh():
+                    self._setup_app_authentication()
+        return self.headers
+    
+    def token_needs_refresh(self) -> bool:
+        return time.time() >= self._token_expires_at - TOKEN_REFRESH_MARGIN_SECONDS
+    
+    def set_installation_token(self, token: str, expires_at: float):
+        """Use an installation token obtained elsewhere until shortly before expires_at (Unix time)"""
+        with self._auth_lock:
+            self.headers["Authorization"] = f"token {token}"
+            self._token_expires_at = expires_at
+    
+    def _request(self, method: str, endpoint: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request to GitHub, recording its latency under the endpoint
+        template (e.g. "/repos/{owner}/{repo}/issues") and the rate-limit
+        budget the response reports.
+        """
+        own_auth = "headers" not in kwargs
+        if own_auth:
+            kwargs["headers"] = self.auth_headers()
+        start = time.perf_counter()
+        status = "error"
+        try:
+            with span(f"GitHub {method} {endpoint}", "client", {"http.method": method, "http.url": url}) as current:
+                response = requests.request(method, url, **kwargs)
+                status = str(response.status_code)
+                current.set_attribute("http.status_code", response.status_code)
+        finally:
+            UPSTREAM_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                service="github", method=method, endpoint=endpoint, status=status
+            )
+        
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining is not None:
+            labels = {
+                "installation": self.installation_id or ("token" if self.token else "anonymous"),
+                "resource": response.headers.get("X-RateLimit-Resource", "core")
+            }
+            GITHUB_RATE_LIMIT_REMAINING.set(int(remaining), **labels)
+            GITHUB_RATE_LIMIT_LIMIT.set(int(response.headers.get("X-RateLimit-Limit", 0)), **labels)
+            GITHUB_RATE_LIMIT_RESET.set(int(response.headers.get("X-RateLimit-Reset", 0)), **labels)
+        if response.status_code == 401 and own_auth and self.uses_app_auth:
+            # Revoked or expired early: mint a fresh token on the next request
+            self.rejected_token = kwargs["headers"].get("Authorization", "").removeprefix("token ") or None
+            self._token_expires_at = 0.0
+        return response
+    
     def _setup_app_authentication(self):
         """Set up GitHub App authentication"""
+        installation_token, expires_at = self.mint_installation_token()
+        if installation_token:
+            self.headers["Authorization"] = f"token {installation_token}"
+            self._token_expires_at = expires_at
+            return True
+        return False
+    
+    def mint_installation_token(self) -> Tuple[Optional[str], float]:
+        """Exchange the app credentials for a new installation token and its expiry; (None, 0) on failure"""
         try:
-            jwt_token = self._generate_jwt()
-            
-            installation_token = self._get_installation_token(jwt_token)
-            
-            if installation_token:
-                self.headers["Authorization"] = f"token {installation_token}"
-                return True
+            return self._get_installation_token(self._generate_jwt())
         except Exception as e:
-            print(f"Error setting up GitHub App authentication: {e}")
-            return False
-        
-        return False
+            logger.error("Error setting up GitHub App authentication: %s", e)
+            return None, 0.0
     
     def _generate_jwt(self) -> str:
         """Generate JWT for GitHub App authentication"""
@@ -50,8 +133,8 @@ class GitHubClient:
         
         return jwt.encode(payload, self.private_key, algorithm='RS256')
     
-    def _get_installation_token(self, jwt_token: str) -> Optional[str]:
-        """Get installation access token using JWT"""
+    def _get_installation_token(self, jwt_token: str) -> Tuple[Optional[str], float]:
+        """Get an installation access token using JWT, with its expiry as a Unix timestamp"""
         url = f"{self.base_url}/app/installations/{self.installation_id}/access_tokens"
         headers = {
             "Authorization": f"Bearer {jwt_token}",
@@ -59,30 +142,35 @@ class GitHubClient:
         }
         
         try:
-            response = requests.post(url, headers=headers)
+            response = self._request("POST", "/app/installations/{installation_id}/access_tokens", url, headers=headers)
             response.raise_for_status()
-            return response.json().get('token')
+            data = response.json()
+            expires_at = parse_github_datetime(data.get('expires_at'))
+            return data.get('token'), (
+                expires_at.replace(tzinfo=timezone.utc).timestamp() if expires_at else time.time() + 3600
+            )
         except requests.RequestException as e:
-            print(f"Error getting installation token: {e}")
-            return None
+            logger.error("Error getting installation token for installation %s: %s", self.installation_id, e)
+            return None, 0.0
     
-    def get_repository_issues(self, owner: str, repo: str, state: str = "open") -> List[Dict]:
+    def get_repository_issues(self, owner: str, repo: str, state: str = "open", raise_on_error: bool = False) -> List[Dict]:
         """Get issues from a GitHub repository"""
         url = f"{self.base_url}/repos/{owner}/{repo}/issues"
         params = {"state": state, "per_page": 100}
         
         try:
-            print(f"Fetching issues from: {url}")
-            print(f"Headers: {self.headers}")
-            response = requests.get(url, headers=self.headers, params=params)
-            print(f"Response status: {response.status_code}")
-            print(f"Response text: {response.text[:500]}")
+            logger.debug("Fetching issues from: %s", url)
+            response = self._request("GET", "/repos/{owner}/{repo}/issues", url, params=params)
+            logger.debug("Issues response status: %s", response.status_code)
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
-            print(f"Error fetching issues: {e}")
-            print(f"Response status: {getattr(e.response, 'status_code', 'No response')}")
-            print(f"Response text: {getattr(e.response, 'text', 'No response text')}")
+            logger.error(
+                "Error fetching issues for %s/%s: %s (status %s)",
+                owner, repo, e, getattr(e.response, 'status_code', 'No response')
+            )
+            if raise_on_error:
+                raise
             return []
     
     def get_issue(self, owner: str, repo: str, issue_number: int) -> Optional[Dict]:
@@ -90,31 +178,40 @@ class GitHubClient:
         url = f"{self.base_url}/repos/{owner}/{repo}/issues/{issue_number}"
         
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self._request("GET", "/repos/{owner}/{repo}/issues/{number}", url)
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
-            print(f"Error fetching issue {issue_number}: {e}")
+            logger.error("Error fetching issue %s: %s", issue_number, e)
             return None
     
-    def get_installation_repositories(self, installation_id: str) -> List[Dict]:
-        """Get repositories accessible to a GitHub App installation"""
+    def get_installation_repositories(self, installation_id: str, raise_on_error: bool = False) -> List[Dict]:
+        """
+        Get repositories accessible to a GitHub App installation.
+        
+        With raise_on_error, a failed page raises instead of returning the
+        partial list, so callers that reconcile against it never mistake a
+        truncated listing for removed repositories.
+        """
         repositories = []
         page = 1
         per_page = 100
         
+        if str(installation_id) == str(self.installation_id):
+            installation_client = self
+        else:
+            installation_client = GitHubClient(
+                app_id=self.app_id,
+                private_key=self.private_key,
+                installation_id=installation_id
+            )
+        
         while True:
             url = f"{self.base_url}/installation/repositories"
             params = {"per_page": per_page, "page": page}
             
             try:
-                temp_client = GitHubClient(
-                    app_id=self.app_id,
-                    private_key=self.private_key, 
-                    installation_id=installation_id
-                )
-                
-                response = requests.get(url, headers=temp_client.headers, params=params)
+                response = installation_client._request("GET", "/installation/repositories", url, params=params)
                 response.raise_for_status()
                 data = response.json()
                 
@@ -126,7 +223,9 @@ class GitHubClient:
                 page += 1
                 
             except requests.RequestException as e:
-                print(f"Error fetching installation repositories for {installation_id}: {e}")
+                logger.error("Error fetching installation repositories for %s: %s", installation_id, e)
+                if raise_on_error:
+                    raise
                 break
                 
         return repositories
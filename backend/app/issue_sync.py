@@ -0,0 +1,286 @@
+import os
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import select, update, delete, or_, case, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+try:
+    from sqlalchemy.dialects.postgresql import distinct_on
+except ImportError:
+    # SQLAlchemy 2.0 (the locked version) has no distinct_on and doesn't deprecate .distinct(*columns)
+    distinct_on = None
+
+from .database import AsyncSessionLocal
+from .models import GitHubIssue, DevinSession, PendingScope, IssueSync
+from .github_client import GitHubClient, parse_github_datetime
+from .cache import response_cache
+from .query_count import uncounted
+
+logger = logging.getLogger(__name__)
+
+# Stored issues older than this trigger a background refresh in stored mode
+ISSUES_MAX_AGE_SECONDS = int(os.getenv("ISSUES_MAX_AGE_SECONDS", "300"))
+
+# (owner, repo, state) refreshes currently running in this process
+_refreshing: Set[Tuple[str, str, str]] = set()
+_refresh_tasks: Set[asyncio.Task] = set()
+
+# Columns whose change makes an issue "modified" for get_state's rescope rule
+TRACKED_FIELDS = ("title", "body", "state", "repository", "html_url", "ref_id_number")
+
+# Issue webhook actions that remove an issue; remove_issue records the action as
+# the row's state, and rows in these states are kept for their sessions but not listed
+REMOVED_STATES = ("deleted", "transferred")
+
+
+def select_distinct_on(statement, *columns):
+    """Add DISTINCT ON (columns) without the deprecated .distinct(*columns) on SQLAlchemy 2.1+"""
+    if distinct_on is None:
+        return statement.distinct(*columns)
+    return statement.ext(distinct_on(*columns))
+
+
+def issue_values(issue: Dict, repository_full_name: str) -> Dict:
+    """Map a GitHub issue payload onto GitHubIssue column values"""
+    return {
+        "github_issue_id": issue["id"],
+        "title": issue.get("title"),
+        "body": issue.get("body") or "",
+        "state": issue.get("state"),
+        "repository": repository_full_name,
+        "html_url": issue.get("html_url"),
+        "ref_id_number": issue.get("number", 0),
+        "github_updated_at": parse_github_datetime(issue.get("updated_at"))
+    }
+
+
+async def upsert_issues(db: AsyncSession, issues: List[Dict], repository_full_name: str) -> List[int]:
+    """
+    Insert or update github_issues rows from GitHub issue payloads in one statement.
+
+    The update only applies when the payload is at least as new as the
+    stored row (by GitHub's updated_at), so late redeliveries can't roll an
+    issue back. updated_at is bumped only when a tracked field changes.
+    Returns the ids of the rows written; stale payloads are left out.
+    """
+    if not issues:
+        return []
+
+    statement = insert(GitHubIssue).values([issue_values(issue, repository_full_name) for issue in issues])
+    excluded = statement.excluded
+
+    changed = or_(*(getattr(GitHubIssue, field).is_distinct_from(getattr(excluded, field)) for field in TRACKED_FIELDS))
+    statement = statement.on_conflict_do_update(
+        index_elements=[GitHubIssue.github_issue_id],
+        set_={
+            **{field: getattr(excluded, field) for field in TRACKED_FIELDS},
+            "github_updated_at": excluded.github_updated_at,
+            "updated_at": case((changed, func.now()), else_=GitHubIssue.updated_at)
+        },
+        where=or_(
+            GitHubIssue.github_updated_at.is_(None),
+            excluded.github_updated_at.is_(None),
+            GitHubIssue.github_updated_at <= excluded.github_updated_at
+        )
+    ).returning(GitHubIssue.id)
+
+    result = await db.execute(statement)
+    return list(result.scalars().all())
+
+
+async def upsert_issue(db: AsyncSession, issue: Dict, repository_full_name: str) -> Optional[int]:
+    """Upsert a single issue; returns its row id, or None when the payload was stale and ignored"""
+    ids = await upsert_issues(db, [issue], repository_full_name)
+    return ids[0] if ids else None
+
+
+async def remove_issue(db: AsyncSession, issue: Dict, action: str = "deleted") -> bool:
+    """
+    Mark the github_issues row of a deleted or transferred issue with that
+    action as its state, unless a newer delivery has already updated it.
+
+    The row and its Devin sessions are kept, so scoping history survives,
+    but the stored issue views and /dashboard no longer list it; only a
+    queued auto-scope is dropped.
+    """
+    updated_at = parse_github_datetime(issue.get("updated_at"))
+    conditions = [GitHubIssue.github_issue_id == issue["id"]]
+    if updated_at is not None:
+        conditions.append(or_(
+            GitHubIssue.github_updated_at.is_(None),
+            GitHubIssue.github_updated_at <= updated_at
+        ))
+
+    values = {"state": action, "updated_at": func.now()}
+    if updated_at is not None:
+        values["github_updated_at"] = updated_at
+    result = await db.execute(update(GitHubIssue).where(*conditions).values(**values).returning(GitHubIssue.id))
+    issue_pk = result.scalar_one_or_none()
+    if issue_pk is None:
+        return False
+
+    await db.execute(delete(PendingScope).where(PendingScope.github_issue_id == issue_pk))
+    return True
+
+
+def serialize_issue(issue: GitHubIssue, scope_session: Optional[DevinSession]) -> Dict:
+    scope_session_data = None
+    if scope_session:
+        scope_session_data = {
+            "id": scope_session.id,
+            "session_id": scope_session.session_id,
+            "status": scope_session.status,
+            "confidence_score": scope_session.confidence_score,
+            "action_plan": scope_session.action_plan,
+            "result": scope_session.result,
+            "created_at": scope_session.created_at,
+            "updated_at": scope_session.updated_at
+        }
+
+    return {
+        "id": issue.id,
+        "github_issue_id": issue.github_issue_id,
+        "number": issue.ref_id_number or 0,
+        "ref_id_number": issue.ref_id_number or 0,
+        "html_url": issue.html_url,
+        "title": issue.title,
+        "body": issue.body,
+        "state": issue.state,
+        "repository": issue.repository,
+        "issue_state": issue.state_from_scope_session(scope_session),
+        "scope_session": scope_session_data,
+        "created_at": issue.created_at,
+        "updated_at": issue.updated_at
+    }
+
+
+async def load_stored_issues(
+    db: AsyncSession,
+    repository_full_name: str,
+    state: str = "open",
+    limit: int = 10,
+    github_issue_ids: List[int] = None
+) -> List[Dict]:
+    """
+    Stored issues for a repository with their issue_state and latest scope session.
+
+    Two queries regardless of issue count: the issues, then the latest scope
+    session per issue via DISTINCT ON. With github_issue_ids the result keeps
+    that order; otherwise issues are filtered by state and newest first.
+    """
+    query = select(GitHubIssue).where(
+        GitHubIssue.repository == repository_full_name,
+        GitHubIssue.state.notin_(REMOVED_STATES)
+    )
+    if github_issue_ids is not None:
+        query = query.where(GitHubIssue.github_issue_id.in_(github_issue_ids))
+    else:
+        if state != "all":
+            query = query.where(GitHubIssue.state == state)
+        query = query.order_by(GitHubIssue.ref_id_number.desc()).limit(limit)
+
+    issues = (await db.execute(query)).scalars().all()
+    if github_issue_ids is not None:
+        position = {github_issue_id: index for index, github_issue_id in enumerate(github_issue_ids)}
+        issues = sorted(issues, key=lambda issue: position[issue.github_issue_id])
+
+    scope_sessions = {}
+    if issues:
+        result = await db.execute(select_distinct_on(
+            select(DevinSession)
+            .where(
+                DevinSession.github_issue_id.in_([issue.id for issue in issues]),
+                DevinSession.session_type == "scope"
+            )
+            .order_by(DevinSession.github_issue_id, DevinSession.created_at.desc()),
+            DevinSession.github_issue_id
+        ))
+        scope_sessions = {session.github_issue_id: session for session in result.scalars().all()}
+
+    return [serialize_issue(issue, scope_sessions.get(issue.id)) for issue in issues]
+
+
+async def issues_synced_at(db: AsyncSession, owner: str, repo: str, state: str = "open") -> Optional[datetime]:
+    """When the repository's issues were last refreshed with this state filter"""
+    result = await db.execute(
+        select(IssueSync.synced_at).where(IssueSync.repository == f"{owner}/{repo}", IssueSync.state == state)
+    )
+    return result.scalar_one_or_none()
+
+
+async def refresh_repository_issues(
+    db: AsyncSession,
+    client: GitHubClient,
+    owner: str,
+    repo: str,
+    state: str = "open"
+) -> List[Dict]:
+    """
+    Fetch a repository's issues from GitHub and upsert them into github_issues.
+
+    Records the refresh time for this state filter (an "open" refresh says
+    nothing about closed issues) and returns the fetched issues (pull
+    requests excluded), in GitHub's order.
+    """
+    issues = await asyncio.to_thread(client.get_repository_issues, owner, repo, state, True)
+    issues = [issue for issue in issues if 'pull_request' not in issue]
+
+    await upsert_issues(db, issues, f"{owner}/{repo}")
+
+    synced_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    statement = insert(IssueSync).values(repository=f"{owner}/{repo}", state=state, synced_at=synced_at)
+    await db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[IssueSync.repository, IssueSync.state],
+            set_={"synced_at": statement.excluded.synced_at}
+        )
+    )
+    await db.commit()
+    await response_cache.invalidate("dashboard")
+    return issues
+
+
+def issues_updated_since(issues: List[Dict], since: Optional[datetime]) -> int:
+    """How many issue payloads GitHub updated after since (all of them when since is None)"""
+    if since is None:
+        return len(issues)
+    return sum(1 for issue in issues if (parse_github_datetime(issue.get("updated_at")) or since) > since)
+
+
+def freshness(synced_at: Optional[datetime], max_age: int, owner: str, repo: str, state: str) -> Dict:
+    age = None
+    if synced_at is not None:
+        age = (datetime.now(timezone.utc).replace(tzinfo=None) - synced_at).total_seconds()
+    return {
+        "synced_at": synced_at,
+        "age_seconds": round(age, 1) if age is not None else None,
+        "max_age_seconds": max_age,
+        "stale": age is None or age > max_age,
+        "refreshing": (owner, repo, state) in _refreshing
+    }
+
+
+def schedule_refresh(client: GitHubClient, owner: str, repo: str, state: str = "open") -> bool:
+    """Start a background refresh unless one is already running for this repository and state"""
+    key = (owner, repo, state)
+    if key in _refreshing:
+        return False
+    _refreshing.add(key)
+
+    async def run():
+        try:
+            # The task copies the request's context; its queries are not the request's
+            with uncounted():
+                async with AsyncSessionLocal() as db:
+                    await refresh_repository_issues(db, client, owner, repo, state)
+        except Exception as e:
+            logger.error("Background issue refresh failed for %s/%s: %s", owner, repo, e)
+        finally:
+            _refreshing.discard(key)
+
+    task = asyncio.create_task(run(), name=f"refresh-issues-{owner}/{repo}")
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+    return True
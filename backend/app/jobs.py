@@ -0,0 +1,99 @@
+import os
+import json
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import AsyncSessionLocal
+from .models import BackgroundJob
+from .table_queue import TableQueue
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# A "processing" job older than this is assumed to belong to a dead worker
+JOB_PROCESSING_TIMEOUT = int(os.getenv("JOB_PROCESSING_TIMEOUT", "600"))
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "7"))
+
+JobHandler = Callable[[Dict, AsyncSession], Awaitable[Dict]]
+
+job_queue = TableQueue(
+    "job",
+    BackgroundJob,
+    finished_column="finished_at",
+    max_attempts=JOB_MAX_ATTEMPTS,
+    processing_timeout=JOB_PROCESSING_TIMEOUT,
+    poll_interval=JOB_POLL_INTERVAL,
+    retention_days=JOB_RETENTION_DAYS,
+    prune_statuses=("done", "failed")
+)
+
+
+async def enqueue_job(db: AsyncSession, kind: str, payload: Dict) -> BackgroundJob:
+    """Store a job for the workers and commit"""
+    job = BackgroundJob(kind=kind, payload=json.dumps(payload))
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    job_queue.notify()
+    return job
+
+
+async def claim_job(kinds: List[str]) -> Optional[BackgroundJob]:
+    """Claim the oldest available job of one of the given kinds (see TableQueue.claim)"""
+    return await job_queue.claim(BackgroundJob.kind.in_(kinds))
+
+
+async def process_next_job(handlers: Dict[str, JobHandler]) -> bool:
+    """Run one job; returns False when no job was available"""
+    async def run(job: BackgroundJob) -> Dict:
+        with span(f"job {job.kind}", "consumer", {"job.id": job.id, "job.attempt": job.attempts}):
+            async with AsyncSessionLocal() as db:
+                result = await handlers[job.kind](json.loads(job.payload), db)
+        return {"result": json.dumps(result, default=str)}
+
+    return await job_queue.process_next(
+        run,
+        BackgroundJob.kind.in_(list(handlers)),
+        log_extra=lambda job: {"job_id": job.id, "job_kind": job.kind}
+    )
+
+
+async def prune_jobs():
+    """Drop finished jobs past the retention window"""
+    await job_queue.prune()
+
+
+def start_job_workers(handlers: Dict[str, JobHandler], workers: int = None) -> List[asyncio.Task]:
+    """Start the job workers on the running event loop"""
+    workers = JOB_WORKERS if workers is None else workers
+    return job_queue.start_workers(lambda: process_next_job(handlers), workers)
+
+
+def serialize_job(job: BackgroundJob) -> Dict:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "attempts": job.attempts,
+        "result": json.loads(job.result) if job.result else None,
+        "last_error": job.last_error,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at
+    }
+
+
+async def job_queue_status(db: AsyncSession) -> Dict[str, Dict[str, int]]:
+    result = await db.execute(
+        select(BackgroundJob.kind, BackgroundJob.status, func.count())
+        .group_by(BackgroundJob.kind, BackgroundJob.status)
+    )
+    status = {}
+    for kind, job_status, count in result.all():
+        status.setdefault(kind, {})[job_status] = count
+    return status
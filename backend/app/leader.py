@@ -0,0 +1,128 @@
+import os
+import zlib
+import socket
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List
+from sqlalchemy import text
+
+from .database import build_engine, to_async_url, database_url, ENGINE_PROFILE
+
+logger = logging.getLogger(__name__)
+
+# Session-level advisory locks need a real server session, so the leader
+# connection must not go through a transaction-mode pooler such as Neon's
+# "-pooler" endpoint. Point LEADER_DATABASE_URL at the direct endpoint there;
+# unset, the primary database URL is used.
+LEADER_DATABASE_URL = os.getenv("LEADER_DATABASE_URL")
+LEADER_HEARTBEAT_SECONDS = float(os.getenv("LEADER_HEARTBEAT_SECONDS", "10"))
+LEADER_RETRY_SECONDS = float(os.getenv("LEADER_RETRY_SECONDS", "15"))
+
+Job = Callable[[], Awaitable[None]]
+
+
+def periodic(interval: float, job: Job, run_immediately: bool = True) -> Job:
+    """Wrap a job so it repeats every interval seconds; errors are logged, not fatal"""
+    async def loop():
+        if not run_immediately:
+            await asyncio.sleep(interval)
+        while True:
+            try:
+                await job()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Singleton job %s failed: %s", getattr(job, "__name__", job), e)
+            await asyncio.sleep(interval)
+    loop.__name__ = getattr(job, "__name__", "job")
+    return loop
+
+
+class LeaderElection:
+    """
+    Run singleton jobs on exactly one worker across all processes.
+
+    Every worker competes for pg_try_advisory_lock on a dedicated
+    connection. The winner runs the jobs and heartbeats its connection;
+    if it dies or loses the connection, Postgres releases the lock and
+    another worker picks it up within LEADER_RETRY_SECONDS.
+    """
+
+    def __init__(self, name: str, jobs: Dict[str, Job]):
+        self.name = name
+        self.lock_key = zlib.crc32(name.encode())
+        self.jobs = jobs
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.is_leader = False
+        self._job_tasks: List[asyncio.Task] = []
+        self._engine = None
+
+    def _get_engine(self):
+        if self._engine is None:
+            profile = dict(ENGINE_PROFILE, pool_size=1, max_overflow=0)
+            self._engine = build_engine(to_async_url(LEADER_DATABASE_URL or database_url()), profile, name="leader")
+        return self._engine
+
+    async def run(self):
+        """Campaign for leadership until cancelled"""
+        try:
+            while True:
+                try:
+                    await self._campaign()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning("Leader election for %s lost its connection: %s", self.name, e)
+                finally:
+                    await self._stop_jobs()
+                await asyncio.sleep(LEADER_RETRY_SECONDS)
+        finally:
+            if self._engine is not None:
+                await self._engine.dispose()
+
+    async def _campaign(self):
+        async with self._get_engine().connect() as conn:
+            acquired = await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key})
+            await conn.commit()
+            if not acquired:
+                return
+
+            logger.info("Became leader for %s", self.name, extra={"worker_id": self.worker_id})
+            self.is_leader = True
+            self._job_tasks = [
+                asyncio.create_task(job(), name=f"{self.name}:{job_name}")
+                for job_name, job in self.jobs.items()
+            ]
+            try:
+                while True:
+                    await asyncio.sleep(LEADER_HEARTBEAT_SECONDS)
+                    await conn.scalar(text("SELECT 1"))
+                    await conn.commit()
+            finally:
+                await self._stop_jobs()
+                try:
+                    await conn.scalar(text("SELECT pg_advisory_unlock(:key)"), {"key": self.lock_key})
+                    await conn.commit()
+                except Exception:
+                    # Connection is gone; the server already released the lock
+                    pass
+
+    async def _stop_jobs(self):
+        if self.is_leader:
+            logger.info("Stepping down as leader for %s", self.name, extra={"worker_id": self.worker_id})
+        self.is_leader = False
+        for task in self._job_tasks:
+            task.cancel()
+        await asyncio.gather(*self._job_tasks, return_exceptions=True)
+        self._job_tasks = []
+
+    def status(self) -> Dict:
+        return {
+            "election": self.name,
+            "worker_id": self.worker_id,
+            "is_leader": self.is_leader,
+            "jobs": {
+                task.get_name(): "done" if task.done() else "running"
+                for task in self._job_tasks
+            }
+        }
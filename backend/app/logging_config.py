@@ -0,0 +1,191 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+from datetime import datetime, timezone
+from typing import Optional
+
+from .tracing import TraceContextFilter
+
+REDACTED = "[REDACTED]"
+
+# Key names whose values are always secret, whatever the value looks like
+# (e.g. "token": "v1.abc..." or client_secret=...)
+_SENSITIVE_KEY = r"\w*(?:api[_-]?key|token|secret|password|private[_-]?key)"
+_SENSITIVE_KEY_PATTERN = re.compile(rf"(?i)^{_SENSITIVE_KEY}$")
+
+# Patterns for credentials that tend to end up in log lines: auth headers,
+# GitHub tokens, JWTs, values of sensitive keys (quoted values up to the
+# closing quote) and passwords embedded in URLs.
+_REDACTION_PATTERNS = [
+    (re.compile(r"(?i)\b(bearer|token)\s+[A-Za-z0-9._\-]{8,}"), r"\1 " + REDACTED),
+    (re.compile(r"\bgh[pousr]_[A-Za-z0-9]{20,}\b"), REDACTED),
+    (re.compile(r"\beyJ[A-Za-z0-9_\-]+\.[A-Za-z0-9_\-]+\.[A-Za-z0-9_\-]+"), REDACTED),
+    (
+        re.compile(rf"""(?i)(\b{_SENSITIVE_KEY}['"]?\s*[:=]\s*)(?:"(?:[^"\\]|\\.)*"|'[^']*'|[^\s,;}}]+)"""),
+        lambda match: match.group(1) + _quoted_like(match.group(0)[len(match.group(1)):], REDACTED),
+    ),
+    (re.compile(r"(://[^:/\s]+:)[^@/\s]+@"), r"\1" + REDACTED + "@"),
+]
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+# and is emitted as a structured field.
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "sample_rate"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _quoted_like(value: str, replacement: str) -> str:
+    """replacement, wrapped in the same quotes as value"""
+    if value[:1] in ("'", '"'):
+        return value[0] + replacement + value[0]
+    return replacement
+
+
+def redact(text: str) -> str:
+    """Mask tokens, keys and passwords in a log string"""
+    for pattern, replacement in _REDACTION_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def redact_field(key: str, value):
+    """Mask a structured field: sensitive keys entirely, strings by pattern, containers recursively"""
+    if isinstance(key, str) and _SENSITIVE_KEY_PATTERN.match(key):
+        return REDACTED
+    if isinstance(value, str):
+        return redact(value)
+    if isinstance(value, dict):
+        return {item_key: redact_field(item_key, item) for item_key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact_field(None, item) for item in value]
+    return value
+
+
+class RedactingJsonFormatter(logging.Formatter):
+    """Render records as one JSON object per line with secrets masked"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": redact(record.getMessage()),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = redact_field(key, value)
+        if record.exc_info:
+            entry["exc"] = redact(self.formatException(record.exc_info))
+        return json.dumps(entry, default=str)
+
+
+class RedactingTextFormatter(logging.Formatter):
+    """Human-readable formatter for local development, with secrets masked"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = {
+            key: value for key, value in record.__dict__.items()
+            if key not in _STANDARD_ATTRS and not key.startswith("_")
+        }
+        if fields:
+            text += " " + " ".join(f"{key}={redact_field(key, value)}" for key, value in fields.items())
+        return redact(text)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Drop a fraction of low-severity records.
+
+    Records below WARNING are kept with probability ``rate``; a record may
+    override this with ``extra={"sample_rate": ...}``. Warnings and errors
+    are never sampled out.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = getattr(record, "sample_rate", self.rate)
+        return rate >= 1.0 or random.random() < rate
+
+
+class RedactingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that merges and redacts the message on the calling thread.
+
+    Like the stock prepare(), the arguments are merged into the message
+    before the record is queued, so it logs the values at the time of the
+    call even if the objects change afterwards. The stock prepare() also
+    renders the whole line and any traceback here; this one leaves that to
+    the listener thread's formatter.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = redact(record.getMessage())
+        record.args = None
+        record.message = record.msg
+        return record
+
+
+def setup_logging() -> logging.Logger:
+    """
+    Configure the ``app`` logger hierarchy.
+
+    Callers only pay for level checks, sampling, merging the message and
+    enqueueing; rendering, tracebacks and the stdout write happen on the
+    QueueListener thread.
+
+    Environment:
+    - LOG_LEVEL: minimum level (default INFO, so debug output is skipped)
+    - LOG_FORMAT: "json" (default) or "text"
+    - LOG_SAMPLE_RATE: fraction of DEBUG/INFO records to keep (default 1.0)
+    """
+    global _listener
+
+    logger = logging.getLogger("app")
+    if _listener is not None:
+        return logger
+
+    level = os.getenv("LOG_LEVEL", "INFO").upper()
+    sample_rate = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+    formatter = RedactingTextFormatter() if os.getenv("LOG_FORMAT", "json") == "text" else RedactingJsonFormatter()
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = RedactingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_rate))
+    # Runs on the calling thread, where the active span is visible
+    queue_handler.addFilter(TraceContextFilter())
+
+    logger.setLevel(level)
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return logger
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,28 +1,76 @@
-from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi import FastAPI, Depends, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List, Dict
+from typing import List, Dict, Optional
 import asyncio
 import os
 import requests
 import hmac
-import hashlib
 import json
 import jwt
 import time
+import uuid
+import threading
+import logging
 from contextlib import asynccontextmanager
+from datetime import datetime, timezone
 
-from .database import get_db, create_tables, AsyncSessionLocal
-from .models import GitHubIssue, DevinSession, GitHubUser, Repository
-from .github_client import GitHubClient
+from .database import (
+    get_db, get_read_db, create_tables, warm_pool, pool_status, replica_health, get_replica_engine,
+    init_database, dispose_database, ENGINE_PROFILE, REPLICA_MAX_LAG_SECONDS, AsyncSessionLocal
+)
+from .models import GitHubIssue, DevinSession, GitHubUser, Repository, BackgroundJob
+from .github_client import GitHubClient, GITHUB_API_URL
 from .devin_client import DevinClient
+from .clients import get_github_client, get_devin_client, init_clients, installation_clients
+from .repository_sync import reconcile_user_repositories, add_repositories, remove_repositories
+from .issue_sync import (
+    upsert_issue, remove_issue, refresh_repository_issues, load_stored_issues, issues_synced_at,
+    freshness, schedule_refresh, issues_updated_since, select_distinct_on, ISSUES_MAX_AGE_SECONDS, REMOVED_STATES
+)
+from .scoping import (
+    start_scope_session, start_execute_session, latest_scope_session, queue_auto_scope, auto_scope_loop,
+    poll_active_sessions, pending_scope_status, AUTO_SCOPE_DEBOUNCE_SECONDS
+)
+from .cache import response_cache
+from .etag import check_etag, repositories_version, dashboard_version, repository_issues_version
+from .leader import LeaderElection, periodic
+from .scheduler import sync_scheduler_loop, schedule_status
+from .webhook_queue import enqueue_delivery, start_webhook_workers, queue_status
+from .webhook_recorder import sign_webhook_payload, record_delivery, WEBHOOK_RECORD_DIR
+from .jobs import enqueue_job, start_job_workers, serialize_job, job_queue_status
+from .logging_config import setup_logging, shutdown_logging
+from .tracing import span, parse_traceparent, shutdown_tracing
+from .profiling import profiling_requested, acquire_profiler, release_profiler
+from .query_count import count_queries, DEBUG_QUERY_COUNT
+from .metrics import render_metrics, HTTP_REQUEST_SECONDS, QUEUE_DEPTH, CONTENT_TYPE as METRICS_CONTENT_TYPE
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# Set to false when background work runs in separate `python -m app.worker`
+# processes; the API then queues scope, execute and sync requests for them.
+RUN_BACKGROUND_IN_API = os.getenv("RUN_BACKGROUND_IN_API", "true").lower() == "true"
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    init_database()
+    init_clients()
     await create_tables()
-    await sync_user_repositories()
+    await warm_pool()
+    replica_engine = get_replica_engine()
+    if replica_engine is not None:
+        await warm_pool(replica_engine)
+    background_tasks = start_background_tasks() if RUN_BACKGROUND_IN_API else None
     yield
+    if background_tasks:
+        await stop_background_tasks(background_tasks)
+    await dispose_database()
+    shutdown_tracing()
+    shutdown_logging()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -35,81 +83,311 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
-github_client = GitHubClient()
-devin_client = None
-try:
-    devin_client = DevinClient()
-except ValueError as e:
-    print(f"Warning: Devin client not initialized: {e}")
-    devin_client = None
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template so /issues/1 and /issues/2 share a series
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=route.path if route else "unmatched",
+            status=str(status)
+        )
+
+@app.middleware("http")
+async def count_request_queries(request: Request, call_next):
+    """
+    Count each request's SQL statements, which also marks them as request
+    work for capture_queries(requests_only=True). With DEBUG_QUERY_COUNT
+    the count is returned as X-Query-Count, to spot N+1 drift.
+    """
+    with count_queries() as counter:
+        response = await call_next(request)
+    if DEBUG_QUERY_COUNT:
+        response.headers["X-Query-Count"] = str(counter.count)
+    return response
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    """Sample-profile requests carrying a valid X-Profile-Token (see app/profiling.py)"""
+    if not profiling_requested(request.headers.get("X-Profile-Token")):
+        return await call_next(request)
+    profiler = acquire_profiler(threading.get_ident())
+    if profiler is None:
+        response = await call_next(request)
+        response.headers["X-Profile"] = "busy"
+        return response
+    
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        path = await asyncio.to_thread(
+            release_profiler, profiler, request.state.request_id,
+            f"{request.method} {request.url.path}", time.perf_counter() - start
+        )
+    response.headers["X-Profile"] = os.path.basename(path)
+    return response
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    """
+    Root span for each request. Continues an incoming W3C traceparent and
+    echoes X-Request-ID (the trace id unless the caller sent one), so a
+    client-reported id finds the request's spans and log lines.
+    """
+    parent = parse_traceparent(request.headers.get("traceparent")) or {}
+    with span(f"{request.method} {request.url.path}", "server", {"http.method": request.method}, **parent) as root:
+        request_id = request.headers.get("X-Request-ID") or root.trace_id
+        request.state.request_id = request_id
+        root.set_attribute("request.id", request_id)
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route:
+            root.name = f"{request.method} {route.path}"
+        root.set_attribute("http.status_code", response.status_code)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+async def sync_repositories_for_user(db: AsyncSession, user: GitHubUser) -> Dict[str, int]:
+    """Fetch one user's installation repositories from GitHub and reconcile them"""
+    user_github_client = await installation_clients.for_installation(user.installation_id)
+    repositories = await asyncio.to_thread(
+        user_github_client.get_installation_repositories, user.installation_id, raise_on_error=True
+    )
+    changes = await reconcile_user_repositories(db, user, repositories)
+    await db.commit()
+    await response_cache.invalidate("repositories")
+    
+    logger.info(
+        "Synced %d repositories for %s (%d added, %d updated, %d removed)",
+        len(repositories), user.username, changes["added"], changes["updated"], changes["removed"]
+    )
+    return changes
+
+async def sync_verified_user(db: AsyncSession, user: GitHubUser):
+    """Sync a newly verified user's repositories without failing the verification"""
+    try:
+        await sync_repositories_for_user(db, user)
+    except Exception as e:
+        logger.error("Error syncing repositories for user %s: %s", user.username, e)
+        await db.rollback()
 
 async def sync_user_repositories():
     """Sync repositories for all GitHub users with installation_id"""
-    print("Starting repository sync for all GitHub users...")
+    logger.info("Starting repository sync for all GitHub users")
     
     async with AsyncSessionLocal() as db:
         try:
             result = await db.execute(select(GitHubUser))
             users = result.scalars().all()
+            # Detach the users so a per-user rollback doesn't expire them
+            db.expunge_all()
             
             for user in users:
                 if not user.installation_id:
-                    print(f"Skipping user {user.username} - no installation_id")
+                    logger.debug("Skipping user %s - no installation_id", user.username)
                     continue
                     
-                print(f"Syncing repositories for user: {user.username}")
+                logger.info("Syncing repositories for user: %s", user.username)
                 
                 try:
-                    # Create a user-specific GitHub client with the correct installation_id
-                    user_github_client = GitHubClient(
-                        app_id=os.getenv("Github_App_app_id"),
-                        private_key=os.getenv("GITHUB_PEM"),
-                        installation_id=user.installation_id
-                    )
-                    repositories = user_github_client.get_installation_repositories(user.installation_id)
-                    
-                    for repo_data in repositories:
-                        repo_name = repo_data.get('name')
-                        if not repo_name:
-                            continue
-                            
-                        existing_repo_result = await db.execute(
-                            select(Repository).where(
-                                Repository.name == repo_name,
-                                Repository.github_user == user.id
-                            )
-                        )
-                        existing_repo = existing_repo_result.scalar_one_or_none()
-                        
-                        if existing_repo:
-                            print(f"  Repository {repo_name} already exists, updating...")
-                        else:
-                            new_repo = Repository(
-                                name=repo_name,
-                                github_user=user.id
-                            )
-                            db.add(new_repo)
-                            print(f"  Added new repository: {repo_name}")
-                    
-                    await db.commit()
-                    print(f"Successfully synced repositories for {user.username}")
-                    
+                    await sync_repositories_for_user(db, user)
                 except Exception as e:
-                    print(f"Error syncing repositories for user {user.username}: {e}")
+                    logger.error("Error syncing repositories for user %s: %s", user.username, e)
                     await db.rollback()
                     continue
                     
         except Exception as e:
-            print(f"Error during repository sync: {e}")
+            logger.error("Error during repository sync: %s", e)
             
-    print("Repository sync completed")
+    logger.info("Repository sync completed")
+
+async def sync_scheduled_installation(db: AsyncSession, username: str, last_run_at) -> int:
+    """Scheduled installation sync; returns how many repositories changed"""
+    result = await db.execute(select(GitHubUser).where(GitHubUser.username == username))
+    user = result.scalar_one_or_none()
+    if not user or not user.installation_id:
+        return 0
+    changes = await sync_repositories_for_user(db, user)
+    return sum(changes.values())
+
+async def refresh_scheduled_repository(db: AsyncSession, full_name: str, last_run_at) -> int:
+    """Scheduled issue refresh; returns how many issues GitHub updated since the last run"""
+    owner, repo = full_name.split("/", 1)
+    client = await installation_clients.for_owner(db, owner)
+    if client is None:
+        return 0
+    issues = await refresh_repository_issues(db, client, owner, repo)
+    return issues_updated_since(issues, last_run_at)
+
+async def run_sync_scheduler():
+    await sync_scheduler_loop({
+        "installation": sync_scheduled_installation,
+        "repository": refresh_scheduled_repository
+    })
+
+async def poll_devin_sessions():
+    devin_client = get_devin_client()
+    if devin_client:
+        await poll_active_sessions(devin_client)
+
+SESSION_POLL_INTERVAL_SECONDS = int(os.getenv("SESSION_POLL_INTERVAL_SECONDS", "30"))
+
+# Jobs that must run on exactly one worker. Installations and repositories
+# are synced on their own persisted schedules, so a deploy doesn't resync
+# everything at once.
+leader_election = LeaderElection("background-jobs", {
+    "sync-scheduler": run_sync_scheduler,
+    "session-poll": periodic(SESSION_POLL_INTERVAL_SECONDS, poll_devin_sessions)
+})
+
+async def run_scope_job(payload: Dict, db: AsyncSession) -> Dict:
+    issue = await db.get(GitHubIssue, payload["issue_id"])
+    if not issue:
+        raise ValueError(f"Issue {payload['issue_id']} not found")
+    devin_client = get_devin_client()
+    if not devin_client:
+        raise RuntimeError("Devin API not available")
+    devin_session = await start_scope_session(db, issue, devin_client)
+    if not devin_session:
+        raise RuntimeError("Failed to create Devin session")
+    await db.commit()
+    await response_cache.invalidate("dashboard")
+    return {"session_id": devin_session.session_id, "issue_id": issue.id}
+
+async def run_execute_job(payload: Dict, db: AsyncSession) -> Dict:
+    issue = await db.get(GitHubIssue, payload["issue_id"])
+    if not issue:
+        raise ValueError(f"Issue {payload['issue_id']} not found")
+    scope_session = await latest_scope_session(db, issue.id)
+    if not scope_session or not scope_session.action_plan:
+        raise ValueError("Issue must be scoped first with an action plan")
+    devin_client = get_devin_client()
+    if not devin_client:
+        raise RuntimeError("Devin API not available")
+    devin_session = await start_execute_session(db, issue, scope_session, devin_client)
+    if not devin_session:
+        raise RuntimeError("Failed to create Devin session")
+    await db.commit()
+    await response_cache.invalidate("dashboard")
+    return {"session_id": devin_session.session_id, "issue_id": issue.id}
+
+async def run_sync_repositories_job(payload: Dict, db: AsyncSession) -> Dict:
+    await sync_user_repositories()
+    return {"message": "Repository sync completed successfully"}
+
+JOB_HANDLERS = {
+    "scope": run_scope_job,
+    "execute": run_execute_job,
+    "sync-repositories": run_sync_repositories_job
+}
+
+def start_background_tasks(job_workers: int = None, webhook_workers: int = None) -> List[asyncio.Task]:
+    """Start webhook and job workers, auto-scope and the leader's singleton jobs"""
+    return [
+        *start_webhook_workers(process_webhook_event, webhook_workers),
+        *start_job_workers(JOB_HANDLERS, job_workers),
+        asyncio.create_task(auto_scope_loop(get_devin_client), name="auto-scope"),
+        asyncio.create_task(leader_election.run(), name="leader-election")
+    ]
+
+async def stop_background_tasks(tasks: List[asyncio.Task]):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+def should_queue(queue: Optional[bool]) -> bool:
+    """Explicit ?queue= wins; otherwise queue only when this process doesn't run background work"""
+    return queue if queue is not None else not RUN_BACKGROUND_IN_API
+
+def queued_job_response(job: BackgroundJob) -> Response:
+    return JSONResponse(status_code=202, content=jsonable_encoder(serialize_job(job)))
+
+@app.get("/jobs")
+async def get_job_queue_status(db: AsyncSession = Depends(get_db)):
+    """Background job counts by kind and status"""
+    return {"run_background_in_api": RUN_BACKGROUND_IN_API, "queue": await job_queue_status(db)}
+
+@app.get("/jobs/leader")
+async def get_leader_status():
+    """Whether this worker currently holds the background job leadership"""
+    return leader_election.status()
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    """Status and result of a queued scope, execute or sync job"""
+    job = await db.get(BackgroundJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return serialize_job(job)
+
+@app.get("/sync/schedule")
+async def get_sync_schedule(db: AsyncSession = Depends(get_db)):
+    """Per-installation and per-repository sync cadence, last and next runs"""
+    return await schedule_status(db)
 
 @app.get("/healthz")
 async def healthz():
     return {"status": "ok"}
 
+@app.get("/metrics")
+async def get_metrics(db: AsyncSession = Depends(get_db)):
+    """Prometheus metrics; queue depths are sampled on each scrape"""
+    QUEUE_DEPTH.clear()
+    for status, count in (await queue_status(db)).items():
+        QUEUE_DEPTH.set(count, queue="webhook_deliveries", status=status)
+    for kind, statuses in (await job_queue_status(db)).items():
+        for status, count in statuses.items():
+            QUEUE_DEPTH.set(count, queue=f"background_jobs:{kind}", status=status)
+    for status, count in (await pending_scope_status(db)).items():
+        QUEUE_DEPTH.set(count, queue="pending_scopes", status=status)
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/db/pool")
+async def get_db_pool_status():
+    """Connection pool occupancy and checkout wait metrics for sizing against worker count"""
+    status = {
+        "profile": ENGINE_PROFILE["name"],
+        "statement_cache_size": ENGINE_PROFILE["statement_cache_size"],
+        "primary": pool_status()
+    }
+    replica_engine = get_replica_engine()
+    if replica_engine is not None:
+        status["replica"] = dict(
+            pool_status(replica_engine),
+            usable=await replica_health.is_usable(),
+            lag_seconds=replica_health.lag_seconds,
+            max_lag_seconds=REPLICA_MAX_LAG_SECONDS
+        )
+    return status
+
+async def save_session_updates(session_pk: int, updates: Dict) -> DevinSession:
+    """
+    Write Devin session changes through a primary session.
+    
+    Read-only handlers load rows through get_read_db, which may be a replica,
+    so any updates they discover are persisted here and the refreshed row is
+    returned for the response.
+    """
+    async with AsyncSessionLocal() as write_db:
+        session = await write_db.get(DevinSession, session_pk)
+        for key, value in updates.items():
+            setattr(session, key, value)
+        await write_db.commit()
+        await write_db.refresh(session)
+    await response_cache.invalidate("dashboard")
+    return session
+
 @app.get("/test-github")
-async def test_github():
+async def test_github(github_client: GitHubClient = Depends(get_github_client)):
     """Test GitHub API integration without database"""
     try:
         issues = github_client.get_repository_issues("octocat", "Hello-World", "open")
@@ -126,7 +404,7 @@ async def test_github():
         }
 
 @app.get("/test-devin")
-async def test_devin():
+async def test_devin(devin_client: Optional[DevinClient] = Depends(get_devin_client)):
     """Test Devin API integration without database"""
     try:
         if not devin_client:
@@ -165,145 +443,100 @@ async def test_devin():
             "session_created": False
         }
 
+async def resolve_repository_client(db: AsyncSession, owner: str, request: Request):
+    """GitHub client for a repository owner: the caller's X-GitHub-Token, else the owner's installation"""
+    github_token = request.headers.get('X-GitHub-Token')
+    
+    if github_token:
+        return GitHubClient(token=github_token)
+    return await installation_clients.for_owner(db, owner)
+
 @app.get("/issues/{owner}/{repo}")
 async def get_repository_issues(
     owner: str, 
     repo: str, 
     request: Request,
+    response: Response,
     state: str = "open",
     limit: int = 10,
+    mode: str = "live",
+    max_age: int = ISSUES_MAX_AGE_SECONDS,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get issues from a GitHub repository and store them in database"""
+    """
+    Get issues for a repository.
+    
+    mode=live (default) fetches from GitHub, stores the issues and returns them.
+    mode=stored returns the stored issues immediately and, when they are older
+    than max_age seconds, refreshes them from GitHub in the background; the
+    freshness block reports how old the data is.
+    """
+    if mode not in ("live", "stored"):
+        raise HTTPException(status_code=400, detail="mode must be 'live' or 'stored'")
+    
+    full_name = f"{owner}/{repo}"
     try:
-        github_token = request.headers.get('X-GitHub-Token')
+        synced_at = await issues_synced_at(db, owner, repo, state)
         
-        if github_token:
-            client = GitHubClient(token=github_token)
-        else:
-            # Look up the installation_id from the database based on the repository owner
-            user_result = await db.execute(
-                select(GitHubUser).where(GitHubUser.username == owner)
-            )
-            github_user = user_result.scalar_one_or_none()
+        if mode == "stored" and synced_at is not None:
+            data_freshness = freshness(synced_at, max_age, owner, repo, state)
+            if data_freshness["stale"] and not data_freshness["refreshing"]:
+                client = await resolve_repository_client(db, owner, request)
+                if client:
+                    data_freshness["refreshing"] = schedule_refresh(client, owner, repo, state)
             
-            if not github_user or not github_user.installation_id:
-                return {
-                    "error": f"No GitHub user found for owner '{owner}' or user has no installation_id",
-                    "owner": owner,
-                    "repo": repo
-                }
-            
-            # Create GitHub client with the user's installation_id from database
-            client = GitHubClient(
-                app_id=os.getenv("Github_App_app_id"),
-                private_key=os.getenv("GITHUB_PEM"),
-                installation_id=github_user.installation_id
+            not_modified = check_etag(
+                request, response,
+                await repository_issues_version(db, full_name, state, limit, synced_at, data_freshness["stale"])
             )
-            
-        issues = client.get_repository_issues(owner, repo, state)
+            if not_modified:
+                return not_modified
+            return {
+                "repository": full_name,
+                "issues": await load_stored_issues(db, full_name, state, limit),
+                "freshness": data_freshness
+            }
         
-        filtered_issues = [issue for issue in issues if 'pull_request' not in issue]
-        limited_issues = filtered_issues[:limit] if filtered_issues else []
+        # Live mode, or stored mode for a repository that has never been refreshed
+        client = await resolve_repository_client(db, owner, request)
+        if not client:
+            return {
+                "error": f"No GitHub user found for owner '{owner}' or user has no installation_id",
+                "owner": owner,
+                "repo": repo
+            }
         
-        stored_issues = []
-        for issue in limited_issues:
-            try:
-                print(f"Processing issue: {issue['id']} - {issue['title']}")
-                result = await db.execute(
-                    select(GitHubIssue).where(GitHubIssue.github_issue_id == issue["id"])
-                )
-                existing_issue = result.scalar_one_or_none()
-                
-                if existing_issue:
-                    print(f"Updating existing issue: {existing_issue.id}")
-                    existing_issue.title = issue["title"]
-                    existing_issue.body = issue.get("body", "")
-                    existing_issue.state = issue["state"]
-                    existing_issue.repository = f"{owner}/{repo}"
-                    existing_issue.html_url = issue["html_url"]
-                    existing_issue.ref_id_number = issue.get("number", 0)
-                    stored_issue = existing_issue
-                else:
-                    print(f"Creating new issue: {issue['id']}")
-                    new_issue = GitHubIssue(
-                        github_issue_id=issue["id"],
-                        title=issue["title"],
-                        body=issue.get("body", ""),
-                        state=issue["state"],
-                        repository=f"{owner}/{repo}",
-                        html_url=issue["html_url"],
-                        ref_id_number=issue.get("number", 0)
-                    )
-                    db.add(new_issue)
-                    stored_issue = new_issue
-                
-                print("Committing to database...")
-                await db.commit()
-                print("Refreshing stored issue...")
-                await db.refresh(stored_issue)
-                
-                print("Getting issue state...")
-                issue_state = await stored_issue.get_state(db)
-                print(f"Issue state: {issue_state}")
-                
-                scope_result = await db.execute(
-                    select(DevinSession).where(
-                        DevinSession.github_issue_id == stored_issue.id,
-                        DevinSession.session_type == "scope"
-                    ).order_by(DevinSession.created_at.desc())
-                )
-                scope_session = scope_result.scalars().first()
-                
-                scope_session_data = None
-                if scope_session:
-                    scope_session_data = {
-                        "id": scope_session.id,
-                        "session_id": scope_session.session_id,
-                        "status": scope_session.status,
-                        "confidence_score": scope_session.confidence_score,
-                        "action_plan": scope_session.action_plan,
-                        "result": scope_session.result,
-                        "created_at": scope_session.created_at,
-                        "updated_at": scope_session.updated_at
-                    }
-                
-                stored_issues.append({
-                    "id": stored_issue.id,
-                    "github_issue_id": stored_issue.github_issue_id,
-                    "number": issue["number"],
-                    "ref_id_number": stored_issue.ref_id_number or 0,
-                    "html_url": issue["html_url"],
-                    "title": stored_issue.title,
-                    "body": stored_issue.body,
-                    "state": stored_issue.state,
-                    "repository": stored_issue.repository,
-                    "issue_state": issue_state,
-                    "scope_session": scope_session_data,
-                    "created_at": stored_issue.created_at,
-                    "updated_at": stored_issue.updated_at
-                })
-                print(f"Successfully processed issue: {issue['id']}")
-            except Exception as e:
-                print(f"Error processing issue {issue['id']}: {str(e)}")
-                print(f"Error type: {type(e)}")
-                import traceback
-                print(f"Traceback: {traceback.format_exc()}")
-                raise e
+        issues = await refresh_repository_issues(db, client, owner, repo, state)
+        limited_ids = [issue["id"] for issue in issues[:limit]]
+        synced_at = await issues_synced_at(db, owner, repo, state)
         
+        not_modified = check_etag(
+            request, response, await repository_issues_version(db, full_name, state, limit)
+        )
+        if not_modified:
+            return not_modified
         return {
-            "repository": f"{owner}/{repo}",
-            "issues": stored_issues
+            "repository": full_name,
+            "issues": await load_stored_issues(db, full_name, github_issue_ids=limited_ids),
+            "freshness": freshness(synced_at or datetime.now(timezone.utc).replace(tzinfo=None), max_age, owner, repo, state)
         }
     except Exception as e:
+        logger.exception("Failed to fetch issues for %s", full_name)
         raise HTTPException(status_code=500, detail=f"Failed to fetch issues: {str(e)}")
 
 @app.post("/issues/{issue_id}/scope")
 async def scope_issue(
     issue_id: int,
-    db: AsyncSession = Depends(get_db)
+    queue: Optional[bool] = None,
+    db: AsyncSession = Depends(get_db),
+    devin_client: Optional[DevinClient] = Depends(get_devin_client)
 ):
-    """Create a Devin session to scope an issue and assign confidence score"""
+    """
+    Create a Devin session to scope an issue and assign confidence score.
+    
+    With queue=true (the default when RUN_BACKGROUND_IN_API is off) the
+    session is created by a background worker; poll GET /jobs/{id}.
+    """
     result = await db.execute(
         select(GitHubIssue).where(GitHubIssue.id == issue_id)
     )
@@ -312,30 +545,20 @@ async def scope_issue(
     if not issue:
         raise HTTPException(status_code=404, detail="Issue not found")
     
+    if should_queue(queue):
+        return queued_job_response(await enqueue_job(db, "scope", {"issue_id": issue.id}))
+    
     if not devin_client:
         raise HTTPException(status_code=503, detail="Devin API not available")
     
-    prompt = devin_client.generate_scope_prompt(
-        issue.title, 
-        issue.body, 
-        issue.repository
-    )
-    
-    session_title = f"(scope) {issue.title}"
-    session_data = devin_client.create_session(prompt, title=session_title)
+    devin_session = await start_scope_session(db, issue, devin_client)
     
-    if not session_data:
+    if not devin_session:
         raise HTTPException(status_code=500, detail="Failed to create Devin session")
     
-    devin_session = DevinSession(
-        github_issue_id=issue.id,
-        session_id=session_data.get("session_id", ""),
-        session_type="scope",
-        status="pending"
-    )
-    db.add(devin_session)
     await db.commit()
     await db.refresh(devin_session)
+    await response_cache.invalidate("dashboard")
     
     return {
         "session_id": devin_session.session_id,
@@ -346,7 +569,8 @@ async def scope_issue(
 @app.get("/issues/{issue_id}")
 async def get_issue_with_confidence(
     issue_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db),
+    devin_client: Optional[DevinClient] = Depends(get_devin_client)
 ):
     """Get issue details with current confidence score for polling"""
     result = await db.execute(
@@ -370,29 +594,24 @@ async def get_issue_with_confidence(
     if scope_session and scope_session.confidence_score is not None:
         current_confidence = scope_session.confidence_score
     elif scope_session and devin_client:
-        print(f"DEBUG: Polling Devin API for session {scope_session.session_id}")
+        logger.debug("Polling Devin API for session %s", scope_session.session_id)
         devin_status = devin_client.get_session_status(scope_session.session_id)
-        print(f"DEBUG: Devin API response type: {type(devin_status)}")
-        print(f"DEBUG: Devin API response keys: {list(devin_status.keys()) if isinstance(devin_status, dict) else 'Not a dict'}")
         if devin_status and "structured_output" in devin_status:
             structured_output = devin_status["structured_output"]
-            print(f"DEBUG: Structured output found: {structured_output}")
-            print(f"DEBUG: Structured output type: {type(structured_output)}")
             if isinstance(structured_output, dict) and "confidence_score" in structured_output:
                 confidence_score = structured_output["confidence_score"]
-                print(f"DEBUG: Confidence score extracted: {confidence_score}")
-                scope_session.confidence_score = confidence_score
+                logger.debug("Confidence score for session %s: %s", scope_session.session_id, confidence_score)
+                updates = {"confidence_score": confidence_score}
                 if "action_plan" in structured_output:
-                    scope_session.action_plan = structured_output["action_plan"]
+                    updates["action_plan"] = structured_output["action_plan"]
                 if "analysis" in structured_output:
-                    scope_session.result = structured_output["analysis"]
-                await db.commit()
+                    updates["result"] = structured_output["analysis"]
+                scope_session = await save_session_updates(scope_session.id, updates)
                 current_confidence = confidence_score
             else:
-                print(f"DEBUG: No confidence_score in structured_output or not a dict")
-                print(f"DEBUG: structured_output keys: {list(structured_output.keys()) if isinstance(structured_output, dict) else 'Not a dict'}")
+                logger.debug("No confidence_score in structured output for session %s", scope_session.session_id)
         else:
-            print(f"DEBUG: No structured_output in devin_status or devin_status is None")
+            logger.debug("No structured output yet for session %s", scope_session.session_id)
     
     return {
         "issue_id": issue.id,
@@ -404,9 +623,11 @@ async def get_issue_with_confidence(
 @app.post("/issues/{issue_id}/execute")
 async def execute_issue(
     issue_id: int,
-    db: AsyncSession = Depends(get_db)
+    queue: Optional[bool] = None,
+    db: AsyncSession = Depends(get_db),
+    devin_client: Optional[DevinClient] = Depends(get_devin_client)
 ):
-    """Create a Devin session to execute an issue based on action plan"""
+    """Create a Devin session to execute an issue based on action plan; queue works as for /scope"""
     result = await db.execute(
         select(GitHubIssue).where(GitHubIssue.id == issue_id)
     )
@@ -415,13 +636,7 @@ async def execute_issue(
     if not issue:
         raise HTTPException(status_code=404, detail="Issue not found")
     
-    scope_result = await db.execute(
-        select(DevinSession).where(
-            DevinSession.github_issue_id == issue.id,
-            DevinSession.session_type == "scope"
-        ).order_by(DevinSession.created_at.desc())
-    )
-    scope_session = scope_result.scalars().first()
+    scope_session = await latest_scope_session(db, issue.id)
     
     if not scope_session or not scope_session.action_plan:
         raise HTTPException(
@@ -429,30 +644,20 @@ async def execute_issue(
             detail="Issue must be scoped first with an action plan"
         )
     
+    if should_queue(queue):
+        return queued_job_response(await enqueue_job(db, "execute", {"issue_id": issue.id}))
+    
     if not devin_client:
         raise HTTPException(status_code=503, detail="Devin API not available")
     
-    prompt = devin_client.generate_execution_prompt(
-        issue.title,
-        issue.body,
-        scope_session.action_plan,
-        issue.repository
-    )
-    
-    session_data = devin_client.create_session(prompt)
+    devin_session = await start_execute_session(db, issue, scope_session, devin_client)
     
-    if not session_data:
+    if not devin_session:
         raise HTTPException(status_code=500, detail="Failed to create Devin session")
     
-    devin_session = DevinSession(
-        github_issue_id=issue.id,
-        session_id=session_data.get("session_id", ""),
-        session_type="execute",
-        status="pending"
-    )
-    db.add(devin_session)
     await db.commit()
     await db.refresh(devin_session)
+    await response_cache.invalidate("dashboard")
     
     return {
         "session_id": devin_session.session_id,
@@ -463,7 +668,8 @@ async def execute_issue(
 @app.get("/sessions/{session_id}")
 async def get_session_status(
     session_id: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db),
+    devin_client: Optional[DevinClient] = Depends(get_devin_client)
 ):
     """Get the status of a Devin session"""
     result = await db.execute(
@@ -479,16 +685,12 @@ async def get_session_status(
         devin_status = devin_client.get_session_status(session_id)
     
     if devin_status:
-        session.status = devin_status.get("status", session.status)
-        if "confidence_score" in devin_status:
-            session.confidence_score = devin_status["confidence_score"]
-        if "action_plan" in devin_status:
-            session.action_plan = devin_status["action_plan"]
-        if "result" in devin_status:
-            session.result = devin_status["result"]
+        updates = {"status": devin_status.get("status", session.status)}
+        for key in ("confidence_score", "action_plan", "result"):
+            if key in devin_status:
+                updates[key] = devin_status[key]
         
-        await db.commit()
-        await db.refresh(session)
+        session = await save_session_updates(session.id, updates)
     
     return {
         "session_id": session.session_id,
@@ -516,8 +718,9 @@ async def get_user_repositories(request: Request):
         user_url = f"{client.base_url}/user"
         repos_url = f"{client.base_url}/user/repos"
         
-        user_response = requests.get(user_url, headers=client.headers)
-        repos_response = requests.get(repos_url, headers=client.headers, params={"per_page": 50, "sort": "updated"})
+        headers = client.auth_headers()
+        user_response = requests.get(user_url, headers=headers)
+        repos_response = requests.get(repos_url, headers=headers, params={"per_page": 50, "sort": "updated"})
         
         if user_response.status_code == 401:
             raise HTTPException(status_code=401, detail="Invalid GitHub token")
@@ -552,6 +755,17 @@ async def get_user_repositories(request: Request):
 @app.get("/github-app-status")
 async def get_github_app_status():
     """Get GitHub App authentication status and configuration"""
+    cached = await response_cache.get("github-app-status")
+    if cached is not None:
+        return cached
+    
+    status = await check_github_app_status()
+    if status.get("configured"):
+        # Only a working configuration is cached, so fixes to credentials show up immediately
+        status = await response_cache.set("github-app-status", status)
+    return status
+
+async def check_github_app_status() -> Dict:
     try:
         app_id = os.getenv("Github_App_app_id")
         private_key = os.getenv("GITHUB_PEM")
@@ -574,7 +788,7 @@ async def get_github_app_status():
         try:
             client = GitHubClient(app_id=app_id, private_key=private_key, installation_id=installation_id)
             test_url = f"{client.base_url}/app/installations/{installation_id}"
-            response = requests.get(test_url, headers=client.headers)
+            response = requests.get(test_url, headers=client.auth_headers())
             
             if response.status_code == 200:
                 installation_data = response.json()
@@ -604,7 +818,10 @@ async def get_github_app_status():
         raise HTTPException(status_code=500, detail=f"Error checking GitHub App status: {str(e)}")
 
 @app.post("/test-devin-issue-url")
-async def test_devin_issue_url():
+async def test_devin_issue_url(
+    devin_client: Optional[DevinClient] = Depends(get_devin_client),
+    github_client: GitHubClient = Depends(get_github_client)
+):
     """Test creating a Devin session with just a GitHub issue URL"""
     if not devin_client:
         raise HTTPException(status_code=503, detail="Devin API not available")
@@ -612,10 +829,9 @@ async def test_devin_issue_url():
     issue_url = "https://github.com/alexandertmills/devin-issues-automation/issues/7"
     
     github_token = None
-    if github_client and hasattr(github_client, 'headers') and 'Authorization' in github_client.headers:
-        auth_header = github_client.headers['Authorization']
-        if auth_header.startswith('token '):
-            github_token = auth_header[6:]  # Remove "token " prefix
+    auth_header = github_client.auth_headers().get('Authorization', '')
+    if auth_header.startswith('token '):
+        github_token = auth_header[6:]  # Remove "token " prefix
     
     prompt_url_only = f"""
 Please analyze this GitHub issue and provide a confidence score for how actionable it is.
@@ -642,7 +858,7 @@ ANALYSIS: [Your analysis]
     }
 
 @app.post("/test-devin-issue-content")
-async def test_devin_issue_content():
+async def test_devin_issue_content(devin_client: Optional[DevinClient] = Depends(get_devin_client)):
     """Test creating a Devin session with full issue content"""
     if not devin_client:
         raise HTTPException(status_code=503, detail="Devin API not available")
@@ -681,13 +897,16 @@ ANALYSIS: [Your analysis]
     }
 
 @app.post("/test-devin-approaches-comparison")
-async def test_devin_approaches_comparison():
+async def test_devin_approaches_comparison(
+    devin_client: Optional[DevinClient] = Depends(get_devin_client),
+    github_client: GitHubClient = Depends(get_github_client)
+):
     """Compare URL-only vs full-content approaches for Devin issue analysis"""
     if not devin_client:
         raise HTTPException(status_code=503, detail="Devin API not available")
     
-    url_result = await test_devin_issue_url()
-    content_result = await test_devin_issue_content()
+    url_result = await test_devin_issue_url(devin_client, github_client)
+    content_result = await test_devin_issue_content(devin_client)
     
     return {
         "comparison": {
@@ -698,28 +917,49 @@ async def test_devin_approaches_comparison():
     }
 
 @app.get("/dashboard")
-async def get_dashboard_data(db: AsyncSession = Depends(get_db)):
-    """Get dashboard data with issues and their associated sessions"""
-    issues_result = await db.execute(select(GitHubIssue))
+async def get_dashboard_data(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get dashboard data with issues and their latest scope and execute sessions (two queries)"""
+    etag = await dashboard_version(db)
+    not_modified = check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+    
+    # Keyed by the ETag, so a cached body is only served under the version it was built at
+    cached = await response_cache.get("dashboard", etag)
+    if cached is not None:
+        return cached
+    
+    # Deleted and transferred issues keep their rows for the session history but aren't listed
+    listed = GitHubIssue.state.notin_(REMOVED_STATES)
+    issues_result = await db.execute(select(GitHubIssue).where(listed))
     issues = issues_result.scalars().all()
     
+    # Latest scope and execute session per issue in one query
+    latest_sessions = {}
+    if issues:
+        sessions_result = await db.execute(select_distinct_on(
+            select(DevinSession)
+            .where(
+                DevinSession.session_type.in_(("scope", "execute")),
+                DevinSession.github_issue_id.in_(select(GitHubIssue.id).where(listed))
+            )
+            .order_by(DevinSession.github_issue_id, DevinSession.session_type, DevinSession.created_at.desc()),
+            DevinSession.github_issue_id,
+            DevinSession.session_type
+        ))
+        latest_sessions = {
+            (session.github_issue_id, session.session_type): session
+            for session in sessions_result.scalars().all()
+        }
+    
     dashboard_data = []
     for issue in issues:
-        scope_result = await db.execute(
-            select(DevinSession).where(
-                DevinSession.github_issue_id == issue.id,
-                DevinSession.session_type == "scope"
-            ).order_by(DevinSession.created_at.desc()).limit(1)
-        )
-        scope_session = scope_result.scalar_one_or_none()
-        
-        exec_result = await db.execute(
-            select(DevinSession).where(
-                DevinSession.github_issue_id == issue.id,
-                DevinSession.session_type == "execute"
-            ).order_by(DevinSession.created_at.desc()).limit(1)
-        )
-        exec_session = exec_result.scalar_one_or_none()
+        scope_session = latest_sessions.get((issue.id, "scope"))
+        exec_session = latest_sessions.get((issue.id, "execute"))
         
         dashboard_data.append({
             "issue": {
@@ -731,7 +971,7 @@ async def get_dashboard_data(db: AsyncSession = Depends(get_db)):
                 "repository": issue.repository,
                 "ref_id_number": issue.ref_id_number or 0,
                 "html_url": issue.html_url,
-                "issue_state": await issue.get_state(db),
+                "issue_state": issue.state_from_scope_session(scope_session),
                 "created_at": issue.created_at,
                 "updated_at": issue.updated_at
             },
@@ -751,7 +991,7 @@ async def get_dashboard_data(db: AsyncSession = Depends(get_db)):
             } if exec_session else None
         })
     
-    return {"dashboard": dashboard_data}
+    return await response_cache.set("dashboard", {"dashboard": dashboard_data}, etag)
 
 
 def verify_webhook_signature(payload: bytes, signature: str, secret: str) -> bool:
@@ -759,32 +999,117 @@ def verify_webhook_signature(payload: bytes, signature: str, secret: str) -> boo
     if not signature or not secret:
         return False
     
-    expected_signature = "sha256=" + hmac.new(
-        secret.encode(), payload, hashlib.sha256
-    ).hexdigest()
-    return hmac.compare_digest(expected_signature, signature)
+    return hmac.compare_digest(sign_webhook_payload(payload, secret), signature)
+
+
+async def find_installation_user(db: AsyncSession, installation: Dict) -> GitHubUser:
+    """Find the user for a webhook's installation, by installation ID or account login"""
+    result = await db.execute(
+        select(GitHubUser).where(GitHubUser.installation_id == str(installation.get("id")))
+    )
+    user = result.scalars().first()
+    if user:
+        return user
+    
+    username = installation.get("account", {}).get("login")
+    if not username:
+        return None
+    result = await db.execute(select(GitHubUser).where(GitHubUser.username == username))
+    return result.scalar_one_or_none()
 
 
-async def handle_installation_event(payload: Dict) -> Dict:
-    """Handle GitHub App installation events"""
+async def handle_installation_event(payload: Dict, db: AsyncSession) -> Dict:
+    """
+    Handle GitHub App installation events for just the affected account.
+    
+    created: register the account's user and add the repositories in the payload.
+    deleted: clear the user's installation and remove their repositories.
+    """
     action = payload.get("action")
     installation = payload.get("installation", {})
     installation_id = installation.get("id")
+    # Any installation change (including suspension or new permissions) can
+    # make the cached mapping or token wrong
+    installation_clients.invalidate(installation.get("account", {}).get("login"), installation_id)
     
     if action == "created":
-        print(f"GitHub App installed on installation ID: {installation_id}")
         repositories = payload.get("repositories", [])
-        for repo in repositories:
-            print(f"App installed on repository: {repo.get('full_name')}")
+        user = await find_installation_user(db, installation)
+        if not user:
+            username = installation.get("account", {}).get("login")
+            if not username:
+                return {"status": "ignored", "action": action, "reason": "Installation has no account login"}
+            user = GitHubUser(username=username)
+            db.add(user)
+        if user.installation_id != str(installation_id):
+            # A stored token belongs to the previous installation
+            user.access_token = None
+            user.token_expiry = None
+        user.installation_id = str(installation_id)
+        await db.flush()
+        
+        added = await add_repositories(db, user, repositories)
+        await db.commit()
+        await response_cache.invalidate("repositories")
+        logger.info(
+            "GitHub App installed on installation ID %s for %s (%d repositories added)",
+            installation_id, user.username, added
+        )
     
     elif action == "deleted":
-        print(f"GitHub App uninstalled from installation ID: {installation_id}")
+        user = await find_installation_user(db, installation)
+        if user:
+            user.installation_id = None
+            user.access_token = None
+            user.token_expiry = None
+            removed = await remove_repositories(db, user)
+            await db.commit()
+            await response_cache.invalidate("repositories")
+            logger.info(
+                "GitHub App uninstalled from installation ID %s for %s (%d repositories removed)",
+                installation_id, user.username, removed
+            )
+        else:
+            logger.info("GitHub App uninstalled from unknown installation ID %s", installation_id)
     
     return {"status": "success", "action": action, "installation_id": installation_id}
 
 
-async def handle_issue_event(payload: Dict) -> Dict:
-    """Handle GitHub issue events"""
+async def handle_installation_repositories_event(payload: Dict, db: AsyncSession) -> Dict:
+    """Apply repositories added to or removed from an installation"""
+    action = payload.get("action")
+    installation = payload.get("installation", {})
+    installation_id = installation.get("id")
+    installation_clients.invalidate(installation.get("account", {}).get("login"), installation_id)
+    
+    user = await find_installation_user(db, installation)
+    if not user:
+        return {"status": "ignored", "action": action, "reason": f"No user for installation {installation_id}"}
+    
+    added = await add_repositories(db, user, payload.get("repositories_added", []))
+    removed = await remove_repositories(
+        db, user, [repo["name"] for repo in payload.get("repositories_removed", []) if repo.get("name")]
+    )
+    await db.commit()
+    await response_cache.invalidate("repositories")
+    
+    logger.info(
+        "Installation %s repositories %s for %s: %d added, %d removed",
+        installation_id, action, user.username, added, removed
+    )
+    return {"status": "success", "action": action, "added": added, "removed": removed}
+
+
+AUTO_SCOPE_ACTIONS = {"opened", "edited"}
+
+
+async def handle_issue_event(payload: Dict, db: AsyncSession) -> Dict:
+    """
+    Handle GitHub issue events by upserting the matching github_issues row,
+    or marking it deleted/transferred.
+    
+    Deliveries older than the stored row (by the issue's updated_at) are ignored.
+    """
     action = payload.get("action")
     issue = payload.get("issue", {})
     repository = payload.get("repository", {})
@@ -798,67 +1123,135 @@ async def handle_issue_event(payload: Dict) -> Dict:
         "number": issue.get("number")
     }
     
-    print(f"Issue {action}: #{issue_data['number']} {issue_data['title']} in {issue_data['repository']}")
+    if not issue.get("id") or not repository.get("full_name"):
+        return {"status": "ignored", "action": action, "reason": "Missing issue or repository"}
+    
+    auto_scope_queued = False
+    if action in REMOVED_STATES:
+        applied = await remove_issue(db, issue, action)
+    else:
+        issue_pk = await upsert_issue(db, issue, repository["full_name"])
+        applied = issue_pk is not None
+        if applied and action in AUTO_SCOPE_ACTIONS:
+            auto_scope_queued = await queue_auto_scope(db, issue_pk, repository["full_name"])
+    await db.commit()
+    if applied:
+        await response_cache.invalidate("dashboard")
+    
+    logger.info(
+        "Issue %s: #%s in %s (%s)",
+        action, issue_data['number'], issue_data['repository'], "applied" if applied else "stale, ignored"
+    )
     
-    return {"status": "success", "action": action, "issue": issue_data}
+    return {
+        "status": "success" if applied else "ignored",
+        "action": action,
+        "issue": issue_data,
+        "auto_scope_queued": auto_scope_queued
+    }
+
+
+async def process_webhook_event(event_type: str, payload: Dict, db: AsyncSession) -> Dict:
+    """Dispatch a stored webhook delivery to its handler; run by the webhook queue workers"""
+    if event_type == "installation":
+        return await handle_installation_event(payload, db)
+    elif event_type == "installation_repositories":
+        return await handle_installation_repositories_event(payload, db)
+    elif event_type == "issues":
+        return await handle_issue_event(payload, db)
+    elif event_type == "issue_comment":
+        issue = payload.get("issue", {})
+        logger.debug("Issue comment %s on issue #%s", payload.get('action'), issue.get('number'))
+        return {"status": "success", "event": "issue_comment"}
+    else:
+        logger.info("Unhandled webhook event: %s", event_type)
+        return {"status": "success", "event": event_type, "message": "Event received but not handled"}
 
 
-@app.post("/webhook")
-async def github_webhook(request: Request):
-    """Handle GitHub webhook events"""
+@app.post("/webhook", status_code=202)
+async def github_webhook(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Accept a GitHub webhook delivery.
+    
+    Without GITHUB_WEBHOOK_SECRET only pings are accepted (503 otherwise).
+    The signature is verified and the raw payload stored under its
+    X-GitHub-Delivery ID before returning 202; the webhook queue workers
+    process it afterwards. Redeliveries of a stored ID are acknowledged and
+    dropped. With WEBHOOK_RECORD_DIR set, verified deliveries are also
+    archived for benchmarks.replay_webhooks.
+    """
+    signature = request.headers.get("X-Hub-Signature-256")
+    event_type = request.headers.get("X-GitHub-Event")
+    delivery_id = request.headers.get("X-GitHub-Delivery") or str(uuid.uuid4())
+    
+    payload_bytes = await request.body()
+    
+    webhook_secret = os.getenv("GITHUB_WEBHOOK_SECRET")
+    if not webhook_secret:
+        # Unsigned deliveries could come from anyone; only a ping is harmless
+        if event_type != "ping":
+            logger.warning("Refusing %s webhook: GITHUB_WEBHOOK_SECRET is not set", event_type)
+            raise HTTPException(status_code=503, detail="Webhook signature verification is not configured")
+    elif not verify_webhook_signature(payload_bytes, signature, webhook_secret):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+    
     try:
-        signature = request.headers.get("X-Hub-Signature-256")
-        event_type = request.headers.get("X-GitHub-Event")
-        delivery_id = request.headers.get("X-GitHub-Delivery")
-        
-        payload_bytes = await request.body()
-        
-        webhook_secret = os.getenv("GITHUB_WEBHOOK_SECRET")
-        if webhook_secret and not verify_webhook_signature(payload_bytes, signature, webhook_secret):
-            raise HTTPException(status_code=401, detail="Invalid webhook signature")
-        
         payload = json.loads(payload_bytes.decode())
-        
-        print(f"Received webhook: {event_type} (delivery: {delivery_id})")
-        
-        if event_type == "installation":
-            return await handle_installation_event(payload)
-        elif event_type == "issues":
-            return await handle_issue_event(payload)
-        elif event_type == "issue_comment":
-            comment = payload.get("comment", {})
-            issue = payload.get("issue", {})
-            print(f"Issue comment {payload.get('action')}: {comment.get('body', '')[:100]}... on issue #{issue.get('number')}")
-            return {"status": "success", "event": "issue_comment"}
-        elif event_type == "ping":
-            return {"status": "success", "message": "Webhook ping received", "zen": payload.get("zen")}
-        else:
-            print(f"Unhandled webhook event: {event_type}")
-            return {"status": "success", "event": event_type, "message": "Event received but not handled"}
-    
-    except json.JSONDecodeError:
+    except (json.JSONDecodeError, UnicodeDecodeError):
         raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    
+    # Only signed deliveries are recorded, so the archive holds real GitHub traffic
+    if WEBHOOK_RECORD_DIR and webhook_secret:
+        await record_delivery(request.headers, payload_bytes)
+    
+    if event_type == "ping":
+        return {"status": "success", "message": "Webhook ping received", "zen": payload.get("zen")}
+    
+    try:
+        queued = await enqueue_delivery(db, delivery_id, event_type or "unknown", payload_bytes)
     except Exception as e:
-        print(f"Webhook error: {str(e)}")
+        logger.exception("Failed to store webhook delivery", extra={"delivery_id": delivery_id})
         raise HTTPException(status_code=500, detail=f"Webhook processing error: {str(e)}")
+    
+    logger.info(
+        "Received webhook: %s (%s)", event_type, "queued" if queued else "duplicate",
+        extra={"delivery_id": delivery_id}
+    )
+    return {"status": "queued" if queued else "duplicate", "event": event_type, "delivery_id": delivery_id}
 
 
 @app.get("/webhook/status")
-async def webhook_status():
+async def webhook_status(db: AsyncSession = Depends(get_db)):
     """Check webhook configuration status"""
     webhook_secret = os.getenv("GITHUB_WEBHOOK_SECRET")
     
     return {
+        "queue": await queue_status(db),
         "webhook_secret_configured": bool(webhook_secret),
-        "supported_events": ["installation", "issues", "issue_comment", "ping"],
+        "supported_events": ["installation", "installation_repositories", "issues", "issue_comment", "ping"],
         "webhook_endpoint": "/webhook",
-        "signature_verification": "enabled" if webhook_secret else "disabled",
-        "note": "Configure GITHUB_WEBHOOK_SECRET environment variable for signature verification"
+        "signature_verification": "enabled" if webhook_secret else "disabled (deliveries other than ping are refused)",
+        "recording": bool(WEBHOOK_RECORD_DIR and webhook_secret),
+        "note": "Configure GITHUB_WEBHOOK_SECRET environment variable to accept webhook deliveries"
     }
 
 @app.get("/app/repositories")
-async def get_app_repositories(db: AsyncSession = Depends(get_db)):
+async def get_app_repositories(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db)
+):
     """Get repositories from database for all users"""
+    etag = await repositories_version(db)
+    not_modified = check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+    
+    # Keyed by the ETag, so a cached body is only served under the version it was built at
+    cached = await response_cache.get("repositories", etag)
+    if cached is not None:
+        return cached
+    
     try:
         # Fetch all repositories from database with their associated users
         result = await db.execute(
@@ -869,24 +1262,63 @@ async def get_app_repositories(db: AsyncSession = Depends(get_db)):
         repositories = []
         for repo, user in repo_user_pairs:
             repositories.append({
+                "id": repo.id,
                 "name": repo.name,
-                "full_name": f"{user.username}/{repo.name}",
+                "full_name": repo.full_name or f"{user.username}/{repo.name}",
                 "owner": user.username,
-                "private": False,  # We don't store privacy info, assume public for now
-                "description": "",  # We don't store descriptions, leave empty for now
+                "private": bool(repo.private),
+                "description": repo.description or "",
+                "default_branch": repo.default_branch,
+                "open_issues_count": repo.open_issues_count or 0,
+                "pushed_at": repo.pushed_at,
+                "auto_scope": bool(repo.auto_scope),
+                "auto_scope_daily_budget": repo.auto_scope_daily_budget,
                 "user_id": user.id,
                 "installation_id": user.installation_id
             })
         
-        return {
+        return await response_cache.set("repositories", {
             "repositories": repositories
-        }
+        }, etag)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching repositories: {str(e)}")
 
+@app.put("/app/repositories/{repository_id}/auto-scope")
+async def update_repository_auto_scope(
+    repository_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """Enable or disable auto-scoping from issue webhooks for a repository"""
+    data = await request.json()
+    
+    repository = await db.get(Repository, repository_id)
+    if not repository:
+        raise HTTPException(status_code=404, detail="Repository not found")
+    
+    if "enabled" in data:
+        repository.auto_scope = bool(data["enabled"])
+    if "daily_budget" in data:
+        daily_budget = data["daily_budget"]
+        if not isinstance(daily_budget, int) or daily_budget < 0:
+            raise HTTPException(status_code=400, detail="daily_budget must be a non-negative integer")
+        repository.auto_scope_daily_budget = daily_budget
+    await db.commit()
+    await response_cache.invalidate("repositories")
+    
+    return {
+        "repository_id": repository.id,
+        "full_name": repository.full_name,
+        "auto_scope": bool(repository.auto_scope),
+        "auto_scope_daily_budget": repository.auto_scope_daily_budget,
+        "debounce_seconds": AUTO_SCOPE_DEBOUNCE_SECONDS
+    }
+
 @app.post("/app/repositories/sync")
-async def sync_repositories():
-    """Manually trigger repository sync for all GitHub users"""
+async def sync_repositories(queue: Optional[bool] = None, db: AsyncSession = Depends(get_db)):
+    """Manually trigger repository sync for all GitHub users; queue works as for /issues/{id}/scope"""
+    if should_queue(queue):
+        return queued_job_response(await enqueue_job(db, "sync-repositories", {}))
     try:
         await sync_user_repositories()
         return {"message": "Repository sync completed successfully"}
@@ -921,7 +1353,7 @@ async def verify_installation(
             }
             jwt_token = jwt.encode(payload, private_key, algorithm='RS256')
             
-            test_url = f"https://api.github.com/app/installations/{installation_id}"
+            test_url = f"{GITHUB_API_URL}/app/installations/{installation_id}"
             headers = {
                 "Authorization": f"Bearer {jwt_token}",
                 "Accept": "application/vnd.github.v3+json"
@@ -936,6 +1368,7 @@ async def verify_installation(
             
             if not username:
                 raise HTTPException(status_code=400, detail="Could not fetch username from installation")
+            installation_clients.invalidate(username, installation_id)
             
             result = await db.execute(
                 select(GitHubUser).where(GitHubUser.username == username)
@@ -943,20 +1376,23 @@ async def verify_installation(
             existing_user = result.scalar_one_or_none()
             
             if existing_user:
-                existing_user.installation_id = installation_id
+                if existing_user.installation_id != str(installation_id):
+                    if existing_user.installation_id:
+                        installation_clients.invalidate(installation_id=existing_user.installation_id)
+                    existing_user.access_token = None
+                    existing_user.token_expiry = None
+                existing_user.installation_id = str(installation_id)
                 await db.commit()
-                # Sync repositories for all users (simple and works for 1-3 users)
-                await sync_user_repositories()
+                await sync_verified_user(db, existing_user)
                 return {"success": True, "username": username, "message": "User updated and repositories synced successfully"}
             else:
                 new_user = GitHubUser(
                     username=username,
-                    installation_id=installation_id
+                    installation_id=str(installation_id)
                 )
                 db.add(new_user)
                 await db.commit()
-                # Sync repositories for all users (simple and works for 1-3 users)
-                await sync_user_repositories()
+                await sync_verified_user(db, new_user)
                 return {"success": True, "username": username, "message": "User added and repositories synced successfully"}
                 
         except requests.RequestException as e:
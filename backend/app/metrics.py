@@ -0,0 +1,213 @@
+"""
+Prometheus metrics kept in process memory.
+
+Every process counts only its own work: each uvicorn worker and each
+python -m app.worker process has its own series, and nothing is summed
+across them. Every series therefore carries a process label
+(METRICS_PROCESS_LABEL, default the pid), and each process must be
+scraped separately: the API on /metrics (one uvicorn worker per scrape
+target, since a shared port answers from a random worker), workers on
+WORKER_METRICS_PORT. Aggregate in Prometheus, e.g. sum without (process).
+"""
+import os
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Sequence, Tuple
+
+# Seconds; covers sub-millisecond queries up to slow GitHub pagination
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry: List["Metric"] = []
+
+logger = logging.getLogger(__name__)
+
+
+def process_label() -> str:
+    """Read at render time, so forked workers report their own pid"""
+    return os.getenv("METRICS_PROCESS_LABEL") or str(os.getpid())
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple[str, str] = None) -> str:
+    pairs = list(zip(names, values))
+    pairs.append(("process", process_label()))
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Metric:
+    """
+    Minimal Prometheus metric: a family of series keyed by label values.
+
+    Updates come from the event loop and from the worker threads that run
+    the GitHub and Devin clients, so every update takes the metric's lock.
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], object] = {}
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, value in sorted(self._series.items()):
+                lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key, value) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (the last one is +Inf), then sum
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def _render_series(self, key, value) -> List[str]:
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', str(bound)))} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+        lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+def render_metrics() -> str:
+    """All registered metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve /metrics on its own port from a daemon thread, for processes without an HTTP app"""
+    server = ThreadingHTTPServer((host, port), _MetricsRequestHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info("Serving metrics on port %d", port)
+    return server
+
+
+UPSTREAM_REQUEST_SECONDS = Histogram(
+    "upstream_request_duration_seconds",
+    "Outbound GitHub and Devin API calls by service, endpoint template and status",
+    ("service", "method", "endpoint", "status")
+)
+GITHUB_RATE_LIMIT_REMAINING = Gauge(
+    "github_rate_limit_remaining",
+    "Requests left in the current GitHub rate-limit window, from the last response",
+    ("installation", "resource")
+)
+GITHUB_RATE_LIMIT_LIMIT = Gauge(
+    "github_rate_limit_limit",
+    "Size of the GitHub rate-limit window, from the last response",
+    ("installation", "resource")
+)
+GITHUB_RATE_LIMIT_RESET = Gauge(
+    "github_rate_limit_reset_timestamp_seconds",
+    "Unix time the GitHub rate-limit window resets",
+    ("installation", "resource")
+)
+GITHUB_INSTALLATION_TOKENS = Counter(
+    "github_installation_tokens_total",
+    "Installation tokens handed to clients, by where they came from (cache, database or minted)",
+    ("source",)
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time by engine and statement type",
+    ("engine", "operation")
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a free pooled connection, excluding opening new ones",
+    ("pool",)
+)
+DB_POOL_CONNECT_SECONDS = Histogram(
+    "db_pool_connect_seconds",
+    "Time spent opening new database connections",
+    ("pool",)
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up waiting for a pooled connection",
+    ("pool",)
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "API request latency by route template",
+    ("method", "route", "status")
+)
+QUEUE_DEPTH = Gauge(
+    "background_queue_depth",
+    "Rows in each background work queue by status, sampled at scrape time",
+    ("queue", "status")
+)
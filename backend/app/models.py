@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Float, BigInteger, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Float, BigInteger, ForeignKey, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -17,6 +17,7 @@ class GitHubIssue(Base):
     repository = Column(String)
     html_url = Column(String)
     ref_id_number = Column(Integer, default=0)
+    github_updated_at = Column(DateTime, nullable=True)  # issue.updated_at from GitHub, orders webhook deliveries
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
@@ -36,7 +37,10 @@ class GitHubIssue(Base):
             ).order_by(DevinSession.created_at.desc())
         )
         most_recent_scope_session = result.scalars().first()
-        
+        return self.state_from_scope_session(most_recent_scope_session)
+    
+    def state_from_scope_session(self, most_recent_scope_session) -> str:
+        """get_state's rule applied to an already-loaded most recent scope session"""
         if not most_recent_scope_session:
             return "ready-to-scope"
         
@@ -67,6 +71,14 @@ class Repository(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, index=True)
     github_user = Column(Integer, ForeignKey("github_users.id"), nullable=False)
+    full_name = Column(String, nullable=True, index=True)
+    private = Column(Boolean, default=False)
+    description = Column(Text, nullable=True)
+    default_branch = Column(String, nullable=True)
+    open_issues_count = Column(Integer, default=0)
+    pushed_at = Column(DateTime, nullable=True)
+    auto_scope = Column(Boolean, default=False)  # scope issues automatically from issue webhooks
+    auto_scope_daily_budget = Column(Integer, default=10)  # max auto scope sessions per rolling 24h
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
@@ -91,5 +103,74 @@ class DevinSession(Base):
     confidence_score = Column(Float, nullable=True)
     action_plan = Column(Text, nullable=True)
     result = Column(Text, nullable=True)
+    last_polled_at = Column(DateTime, nullable=True, index=True)  # last status check by poll_active_sessions
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+class WebhookDelivery(Base):
+    __tablename__ = "webhook_deliveries"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    delivery_id = Column(String, unique=True, index=True, nullable=False)  # X-GitHub-Delivery
+    event_type = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)  # raw request body
+    status = Column(String, default="pending", index=True)  # "pending", "processing", "done", "failed"
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text, nullable=True)
+    available_at = Column(DateTime, default=func.now())
+    locked_at = Column(DateTime, nullable=True)
+    received_at = Column(DateTime, default=func.now())
+    processed_at = Column(DateTime, nullable=True)
+
+class BackgroundJob(Base):
+    __tablename__ = "background_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)  # "scope", "execute", "sync-repositories"
+    payload = Column(Text, nullable=False)  # JSON arguments for the job handler
+    status = Column(String, default="pending", index=True)  # "pending", "processing", "done", "failed"
+    attempts = Column(Integer, default=0)
+    result = Column(Text, nullable=True)  # JSON returned by the handler
+    last_error = Column(Text, nullable=True)
+    available_at = Column(DateTime, default=func.now())
+    locked_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=func.now())
+    finished_at = Column(DateTime, nullable=True)
+
+class PendingScope(Base):
+    __tablename__ = "pending_scopes"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    github_issue_id = Column(Integer, ForeignKey('github_issues.id'), unique=True, index=True, nullable=False)
+    repository = Column(String, nullable=False)
+    due_at = Column(DateTime, nullable=False, index=True)  # pushed back by each edit inside the debounce window
+    requested_at = Column(DateTime, default=func.now())
+
+class ResponseCacheEntry(Base):
+    __tablename__ = "response_cache"
+    
+    key = Column(String, primary_key=True)  # "<namespace>:<key>"
+    value = Column(Text, nullable=False)  # JSON-encoded response body
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+class IssueSync(Base):
+    __tablename__ = "issue_syncs"
+    __table_args__ = (UniqueConstraint("repository", "state", name="uq_issue_syncs_repository_state"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    repository = Column(String, nullable=False)  # full_name
+    state = Column(String, nullable=False)  # the state filter refreshed: "open", "closed" or "all"
+    synced_at = Column(DateTime, nullable=False)
+
+class SyncSchedule(Base):
+    __tablename__ = "sync_schedules"
+    __table_args__ = (UniqueConstraint("kind", "target", name="uq_sync_schedules_kind_target"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)  # "installation" (target: username) or "repository" (target: full_name)
+    target = Column(String, nullable=False)
+    interval_seconds = Column(Integer, nullable=False)  # adapts to how often the last syncs found changes
+    next_run_at = Column(DateTime, nullable=False, index=True)
+    last_run_at = Column(DateTime, nullable=True)
+    last_changes = Column(Integer, nullable=True)
+    last_error = Column(Text, nullable=True)
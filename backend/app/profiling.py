@@ -0,0 +1,119 @@
+import os
+import re
+import sys
+import hmac
+import json
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Off unless PROFILING_ENABLED=true and PROFILING_TOKEN is set; a request is
+# then profiled when it sends the token in the X-Profile-Token header.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+
+# One profile at a time keeps the overhead bounded if the header leaks
+_profile_lock = threading.Lock()
+
+
+def profiling_requested(token: Optional[str]) -> bool:
+    if not (PROFILING_ENABLED and PROFILING_TOKEN and token):
+        return False
+    return hmac.compare_digest(token.encode(), PROFILING_TOKEN.encode())
+
+
+class SamplingProfiler:
+    """
+    Sample the event loop thread and the asyncio.to_thread workers every
+    PROFILE_INTERVAL_MS and count the collapsed stacks.
+
+    The event loop is shared, so other requests running at the same time
+    show up in the profile as well; each stack is rooted at its thread
+    name so time spent in GitHub/Devin calls on worker threads is
+    separated from time on the loop.
+    """
+
+    def __init__(self, loop_thread_id: int, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.loop_thread_id = loop_thread_id
+        self.interval = interval_ms / 1000
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _target_threads(self) -> Dict[int, str]:
+        return {
+            thread.ident: thread.name for thread in threading.enumerate()
+            if thread.ident == self.loop_thread_id or thread.name.startswith("asyncio_")
+        }
+
+    def _sample(self, targets: Dict[int, str]):
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id not in targets:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            stack.append(targets[thread_id])
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self):
+        # Targets are re-read every sample: executor threads start lazily
+        while not self._stop.wait(self.interval):
+            self._sample(self._target_threads())
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def acquire_profiler(loop_thread_id: int) -> Optional[SamplingProfiler]:
+    """A started profiler, or None when another request is already being profiled"""
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    profiler = SamplingProfiler(loop_thread_id)
+    profiler.start()
+    return profiler
+
+
+def release_profiler(profiler: SamplingProfiler, request_id: str, description: str, duration: float) -> str:
+    """
+    Stop the profiler and write its collapsed stacks to PROFILE_DIR.
+
+    The .folded file is in the format flamegraph.pl and speedscope read:
+    one "frame;frame;frame count" line per distinct stack. A .json file
+    next to it records the request, duration and sample count.
+    """
+    try:
+        profiler.stop()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        safe_id = re.sub(r"[^A-Za-z0-9_.-]", "_", request_id)[:100]
+        path = os.path.join(PROFILE_DIR, f"{safe_id}.folded")
+        with open(path, "w") as profile_file:
+            for stack, count in profiler.stacks.most_common():
+                profile_file.write(f"{stack} {count}\n")
+        with open(os.path.join(PROFILE_DIR, f"{safe_id}.json"), "w") as meta_file:
+            json.dump({
+                "request_id": request_id,
+                "request": description,
+                "duration_ms": round(duration * 1000, 1),
+                "samples": profiler.samples,
+                "interval_ms": PROFILE_INTERVAL_MS
+            }, meta_file)
+        logger.info("Wrote request profile %s", path, extra={"request_id": request_id})
+        return path
+    finally:
+        _profile_lock.release()
@@ -0,0 +1,88 @@
+import os
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+# Adds X-Query-Count to every response; meant for development and CI
+DEBUG_QUERY_COUNT = os.getenv("DEBUG_QUERY_COUNT", "false").lower() == "true"
+
+# Statements kept per counter for assertion messages
+MAX_RECORDED_STATEMENTS = 200
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements: List[str] = []
+        self._lock = threading.Lock()
+
+    def record(self, statement: str):
+        with self._lock:
+            self.count += 1
+            if len(self.statements) < MAX_RECORDED_STATEMENTS:
+                self.statements.append(statement)
+
+
+# The counter for the current request; child tasks and to_thread calls
+# copy the context, and the counter object is shared, so their queries count
+_current_counter: contextvars.ContextVar[Optional[QueryCounter]] = contextvars.ContextVar("query_counter", default=None)
+
+# Process-wide counters from capture_queries(), which see every thread;
+# the flag limits a capture to statements run inside a counted request
+_captures: List[Tuple[QueryCounter, bool]] = []
+_captures_lock = threading.Lock()
+
+
+def record_query(statement: str):
+    """Called from the engine's before_cursor_execute hook for every statement"""
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.record(statement)
+    if _captures:
+        with _captures_lock:
+            for capture, requests_only in _captures:
+                if counter is not None or not requests_only:
+                    capture.record(statement)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """Count statements run in this context, e.g. by one request"""
+    counter = QueryCounter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
+
+
+@contextmanager
+def uncounted() -> Iterator[None]:
+    """Leave the current count, e.g. in a background task a request started"""
+    token = _current_counter.set(None)
+    try:
+        yield
+    finally:
+        _current_counter.reset(token)
+
+
+@contextmanager
+def capture_queries(requests_only: bool = False) -> Iterator[QueryCounter]:
+    """
+    Count every statement the process runs while the block is active.
+
+    Unlike count_queries() this does not depend on context propagation, so
+    it also sees requests TestClient runs on its own event loop thread.
+    With requests_only, statements outside a request (background loops,
+    queue workers) are left out, so a test measures only the endpoint.
+    """
+    counter = QueryCounter()
+    entry = (counter, requests_only)
+    with _captures_lock:
+        _captures.append(entry)
+    try:
+        yield counter
+    finally:
+        with _captures_lock:
+            _captures.remove(entry)
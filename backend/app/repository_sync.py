@@ -0,0 +1,125 @@
+import logging
+from typing import Dict, List
+from sqlalchemy import select, insert, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import GitHubUser, Repository
+from .github_client import parse_github_datetime
+
+logger = logging.getLogger(__name__)
+
+# Repository columns filled from the installation-repositories API
+METADATA_FIELDS = ("full_name", "private", "description", "default_branch", "open_issues_count", "pushed_at")
+
+
+def repository_metadata(repo_data: Dict) -> Dict:
+    """Map a GitHub repository payload onto Repository column values"""
+    return {
+        "full_name": repo_data.get("full_name"),
+        "private": bool(repo_data.get("private", False)),
+        "description": repo_data.get("description"),
+        "default_branch": repo_data.get("default_branch"),
+        "open_issues_count": repo_data.get("open_issues_count") or 0,
+        "pushed_at": parse_github_datetime(repo_data.get("pushed_at"))
+    }
+
+
+async def reconcile_user_repositories(db: AsyncSession, user: GitHubUser, repositories: List[Dict]) -> Dict[str, int]:
+    """
+    Make the user's stored repositories match an installation listing.
+
+    Runs one SELECT of the existing rows, one bulk INSERT for new
+    repositories, one bulk UPDATE for repositories whose metadata changed
+    and one bulk DELETE for repositories the installation no longer has,
+    regardless of how many repositories are involved. The caller owns the
+    transaction.
+    """
+    wanted = {
+        repo_data["name"]: repository_metadata(repo_data)
+        for repo_data in repositories if repo_data.get("name")
+    }
+
+    existing_result = await db.execute(
+        select(Repository.id, Repository.name, *(getattr(Repository, field) for field in METADATA_FIELDS))
+        .where(Repository.github_user == user.id)
+    )
+    existing = {row.name: row for row in existing_result}
+
+    added = wanted.keys() - existing.keys()
+    removed = existing.keys() - wanted.keys()
+    changed = [
+        dict(wanted[name], id=existing[name].id)
+        for name in wanted.keys() & existing.keys()
+        if any(getattr(existing[name], field) != wanted[name][field] for field in METADATA_FIELDS)
+    ]
+
+    if added:
+        await db.execute(
+            insert(Repository),
+            [dict(wanted[name], name=name, github_user=user.id) for name in sorted(added)]
+        )
+
+    if changed:
+        await db.execute(update(Repository), changed)
+
+    if removed:
+        await db.execute(
+            delete(Repository).where(
+                Repository.github_user == user.id,
+                Repository.name.in_(removed)
+            )
+        )
+
+    logger.debug(
+        "Reconciled repositories for %s: %d added, %d updated, %d removed",
+        user.username, len(added), len(changed), len(removed)
+    )
+    return {"added": len(added), "updated": len(changed), "removed": len(removed)}
+
+
+async def add_repositories(db: AsyncSession, user: GitHubUser, repositories: List[Dict]) -> int:
+    """
+    Add repositories from an installation webhook payload.
+
+    Those payloads only carry name, full_name and private, so existing rows
+    are left alone and new rows get the rest of their metadata on the next
+    full sync. Returns the number of rows inserted.
+    """
+    names = {repo_data["name"]: repo_data for repo_data in repositories if repo_data.get("name")}
+    if not names:
+        return 0
+
+    existing_result = await db.execute(
+        select(Repository.name).where(
+            Repository.github_user == user.id,
+            Repository.name.in_(list(names))
+        )
+    )
+    added = names.keys() - set(existing_result.scalars().all())
+
+    if added:
+        await db.execute(
+            insert(Repository),
+            [
+                {
+                    "name": name,
+                    "github_user": user.id,
+                    "full_name": names[name].get("full_name"),
+                    "private": bool(names[name].get("private", False))
+                }
+                for name in sorted(added)
+            ]
+        )
+    return len(added)
+
+
+async def remove_repositories(db: AsyncSession, user: GitHubUser, names: List[str] = None) -> int:
+    """Delete the named repositories for a user, or all of them when names is None"""
+    conditions = [Repository.github_user == user.id]
+    if names is not None:
+        if not names:
+            return 0
+        conditions.append(Repository.name.in_(names))
+
+    result = await db.execute(delete(Repository).where(*conditions))
+    return result.rowcount
@@ -0,0 +1,156 @@
+import os
+import random
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from sqlalchemy import select, update, delete, func, literal
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import AsyncSessionLocal
+from .models import GitHubUser, Repository, SyncSchedule
+
+logger = logging.getLogger(__name__)
+
+# Cadence a new schedule starts at; each run then halves it when the sync
+# found changes and doubles it when it found none, within the bounds below
+SYNC_INTERVAL_SECONDS = int(os.getenv("SYNC_INTERVAL_SECONDS", "3600"))
+SYNC_MIN_INTERVAL_SECONDS = int(os.getenv("SYNC_MIN_INTERVAL_SECONDS", "300"))
+SYNC_MAX_INTERVAL_SECONDS = int(os.getenv("SYNC_MAX_INTERVAL_SECONDS", "86400"))
+# Each next run is randomly moved by up to this fraction of the interval
+SYNC_JITTER = float(os.getenv("SYNC_JITTER", "0.1"))
+SYNC_SCHEDULER_POLL_INTERVAL = float(os.getenv("SYNC_SCHEDULER_POLL_INTERVAL", "30"))
+SYNC_SCHEDULER_BATCH_SIZE = int(os.getenv("SYNC_SCHEDULER_BATCH_SIZE", "5"))
+# A claimed schedule is pushed out this far, so a run lost to a crash is retried
+SYNC_LEASE_SECONDS = 900
+
+# (db, target, last_run_at) -> number of changes the sync found
+SyncJob = Callable[[AsyncSession, str, Optional[datetime]], Awaitable[int]]
+
+
+def next_interval(current: int, changes: int) -> int:
+    interval = current // 2 if changes else current * 2
+    return max(SYNC_MIN_INTERVAL_SECONDS, min(SYNC_MAX_INTERVAL_SECONDS, interval))
+
+
+def jittered(seconds: float) -> float:
+    return seconds * random.uniform(1 - SYNC_JITTER, 1 + SYNC_JITTER)
+
+
+async def ensure_schedules(db: AsyncSession):
+    """
+    Create schedules for new installations and repositories and drop the
+    ones whose target is gone. First runs are spread uniformly over the
+    starting interval so a fresh table doesn't sync everything at once.
+    The caller commits.
+    """
+    first_run = func.now() + func.make_interval(0, 0, 0, 0, 0, 0, func.random() * SYNC_INTERVAL_SECONDS)
+    columns = ["kind", "target", "interval_seconds", "next_run_at"]
+    targets = {
+        "installation": (GitHubUser.username, GitHubUser.installation_id.isnot(None)),
+        "repository": (Repository.full_name, Repository.full_name.isnot(None))
+    }
+
+    for kind, (target, condition) in targets.items():
+        await db.execute(
+            insert(SyncSchedule)
+            .from_select(columns, select(literal(kind), target, literal(SYNC_INTERVAL_SECONDS), first_run).where(condition))
+            .on_conflict_do_nothing(index_elements=[SyncSchedule.kind, SyncSchedule.target])
+        )
+        await db.execute(
+            delete(SyncSchedule).where(
+                SyncSchedule.kind == kind,
+                SyncSchedule.target.not_in(select(target).where(condition))
+            )
+        )
+
+
+async def claim_due_schedules() -> List[SyncSchedule]:
+    """Claim due schedules with FOR UPDATE SKIP LOCKED and lease them out past their run"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(SyncSchedule)
+            .where(SyncSchedule.next_run_at <= func.now())
+            .order_by(SyncSchedule.next_run_at)
+            .limit(SYNC_SCHEDULER_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        schedules = result.scalars().all()
+        for schedule in schedules:
+            schedule.next_run_at = func.now() + timedelta(seconds=SYNC_LEASE_SECONDS)
+        await db.commit()
+    return schedules
+
+
+async def run_schedule(schedule: SyncSchedule, jobs: Dict[str, SyncJob]):
+    """Run one claimed schedule and set its next run from what it found"""
+    interval = schedule.interval_seconds
+    values = {"last_run_at": func.now()}
+    try:
+        async with AsyncSessionLocal() as db:
+            changes = await jobs[schedule.kind](db, schedule.target, schedule.last_run_at)
+        # The first run has nothing to compare against, so it keeps the starting cadence
+        if schedule.last_run_at is not None:
+            interval = next_interval(interval, changes)
+        values.update(last_changes=changes, last_error=None)
+        logger.info(
+            "Scheduled %s sync of %s found %d changes, next in ~%ds",
+            schedule.kind, schedule.target, changes, interval
+        )
+    except Exception as e:
+        logger.error("Scheduled %s sync of %s failed: %s", schedule.kind, schedule.target, e)
+        values["last_error"] = str(e)[:1000]
+
+    values.update(
+        interval_seconds=interval,
+        next_run_at=func.now() + timedelta(seconds=jittered(interval))
+    )
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(SyncSchedule).where(SyncSchedule.id == schedule.id).values(**values))
+        await db.commit()
+
+
+async def sync_scheduler_loop(jobs: Dict[str, SyncJob]):
+    """
+    Run due installation and repository syncs; runs until cancelled.
+
+    jobs maps a schedule kind to the coroutine that syncs one target.
+    Meant to run on the elected leader, though claiming is safe to share.
+    """
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                await ensure_schedules(db)
+                await db.commit()
+            for schedule in await claim_due_schedules():
+                await run_schedule(schedule, jobs)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Sync scheduler error: %s", e)
+        await asyncio.sleep(SYNC_SCHEDULER_POLL_INTERVAL)
+
+
+async def schedule_status(db: AsyncSession) -> Dict:
+    result = await db.execute(select(SyncSchedule).order_by(SyncSchedule.next_run_at))
+    return {
+        "interval_seconds": {
+            "initial": SYNC_INTERVAL_SECONDS,
+            "min": SYNC_MIN_INTERVAL_SECONDS,
+            "max": SYNC_MAX_INTERVAL_SECONDS
+        },
+        "jitter": SYNC_JITTER,
+        "schedules": [
+            {
+                "kind": schedule.kind,
+                "target": schedule.target,
+                "interval_seconds": schedule.interval_seconds,
+                "last_run_at": schedule.last_run_at,
+                "next_run_at": schedule.next_run_at,
+                "last_changes": schedule.last_changes,
+                "last_error": schedule.last_error
+            }
+            for schedule in result.scalars().all()
+        ]
+    }
@@ -0,0 +1,343 @@
+import os
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import select, update, delete, func, or_, and_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import AsyncSessionLocal
+from .models import GitHubIssue, DevinSession, Repository, PendingScope
+from .devin_client import DevinClient
+from .cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+# Edits to an issue within this many seconds are merged into one scope session
+AUTO_SCOPE_DEBOUNCE_SECONDS = int(os.getenv("AUTO_SCOPE_DEBOUNCE_SECONDS", "120"))
+AUTO_SCOPE_POLL_INTERVAL = float(os.getenv("AUTO_SCOPE_POLL_INTERVAL", "15"))
+AUTO_SCOPE_BATCH_SIZE = int(os.getenv("AUTO_SCOPE_BATCH_SIZE", "10"))
+# How long an over-budget scope waits before being reconsidered
+AUTO_SCOPE_BUDGET_RETRY_SECONDS = 3600
+# Sessions older than this are no longer polled
+SESSION_POLL_MAX_AGE_HOURS = int(os.getenv("SESSION_POLL_MAX_AGE_HOURS", "24"))
+SESSION_POLL_BATCH_SIZE = int(os.getenv("SESSION_POLL_BATCH_SIZE", "50"))
+# Devin status requests in flight at once during a poll
+SESSION_POLL_CONCURRENCY = int(os.getenv("SESSION_POLL_CONCURRENCY", "5"))
+ACTIVE_SESSION_STATUSES = ("pending", "running", "working")
+
+
+async def start_scope_session(db: AsyncSession, issue: GitHubIssue, devin_client: DevinClient) -> Optional[DevinSession]:
+    """
+    Create a Devin scope session for an issue and add its row to the session.
+
+    The Devin request runs in a worker thread so the event loop stays free.
+    Returns None when Devin did not create a session. The caller commits.
+    """
+    prompt = devin_client.generate_scope_prompt(
+        issue.title,
+        issue.body,
+        issue.repository
+    )
+
+    session_title = f"(scope) {issue.title}"
+    session_data = await asyncio.to_thread(devin_client.create_session, prompt, session_title)
+
+    if not session_data:
+        return None
+
+    devin_session = DevinSession(
+        github_issue_id=issue.id,
+        session_id=session_data.get("session_id", ""),
+        session_type="scope",
+        status="pending"
+    )
+    db.add(devin_session)
+    return devin_session
+
+
+async def latest_scope_session(db: AsyncSession, issue_pk: int) -> Optional[DevinSession]:
+    result = await db.execute(
+        select(DevinSession).where(
+            DevinSession.github_issue_id == issue_pk,
+            DevinSession.session_type == "scope"
+        ).order_by(DevinSession.created_at.desc())
+    )
+    return result.scalars().first()
+
+
+async def start_execute_session(
+    db: AsyncSession,
+    issue: GitHubIssue,
+    scope_session: DevinSession,
+    devin_client: DevinClient
+) -> Optional[DevinSession]:
+    """Create a Devin session that carries out a scope session's action plan; the caller commits"""
+    prompt = devin_client.generate_execution_prompt(
+        issue.title,
+        issue.body,
+        scope_session.action_plan,
+        issue.repository
+    )
+
+    session_data = await asyncio.to_thread(devin_client.create_session, prompt)
+
+    if not session_data:
+        return None
+
+    devin_session = DevinSession(
+        github_issue_id=issue.id,
+        session_id=session_data.get("session_id", ""),
+        session_type="execute",
+        status="pending"
+    )
+    db.add(devin_session)
+    return devin_session
+
+
+async def queue_auto_scope(db: AsyncSession, issue_pk: int, repository_full_name: str) -> bool:
+    """
+    Queue an issue for auto-scoping if its repository has auto-scope enabled.
+
+    A later call for the same issue pushes the due time back, so a burst of
+    edits turns into a single scope once the issue stops changing. The
+    caller commits.
+    """
+    result = await db.execute(
+        select(Repository.id).where(
+            Repository.full_name == repository_full_name,
+            Repository.auto_scope.is_(True)
+        )
+    )
+    if result.first() is None:
+        return False
+
+    due_at = func.now() + timedelta(seconds=AUTO_SCOPE_DEBOUNCE_SECONDS)
+    statement = insert(PendingScope).values(
+        github_issue_id=issue_pk,
+        repository=repository_full_name,
+        due_at=due_at
+    )
+    await db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[PendingScope.github_issue_id],
+            set_={"due_at": due_at}
+        )
+    )
+    return True
+
+
+async def scopes_in_last_day(db: AsyncSession, repository_full_name: str) -> int:
+    result = await db.execute(
+        select(func.count(DevinSession.id))
+        .join(GitHubIssue, DevinSession.github_issue_id == GitHubIssue.id)
+        .where(
+            GitHubIssue.repository == repository_full_name,
+            DevinSession.session_type == "scope",
+            DevinSession.created_at >= func.now() - timedelta(days=1)
+        )
+    )
+    return result.scalar_one()
+
+
+async def pending_scope_status(db: AsyncSession) -> Dict[str, int]:
+    """Queued auto-scopes split into those due now and those still debouncing"""
+    due = (PendingScope.due_at <= func.now()).label("due")
+    result = await db.execute(select(due, func.count()).group_by(due))
+    return {"due" if is_due else "waiting": count for is_due, count in result.all()}
+
+
+async def claim_due_scopes(db: AsyncSession) -> List[Tuple[int, datetime, GitHubIssue]]:
+    """
+    Pick the due auto-scopes that should start a session now and claim them.
+
+    Rows are locked with FOR UPDATE SKIP LOCKED so several workers can run
+    this concurrently. Issues no longer "ready-to-scope" and repositories
+    without auto-scope are dropped; repositories over their daily budget are
+    retried later. The rest have due_at pushed back by the debounce window,
+    so once the caller commits, other workers leave them alone until that
+    lease expires. Returns (pending id, claimed due_at, issue) tuples.
+    """
+    result = await db.execute(
+        select(PendingScope)
+        .where(PendingScope.due_at <= func.now())
+        .order_by(PendingScope.due_at)
+        .limit(AUTO_SCOPE_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+    )
+    pending_scopes = result.scalars().all()
+
+    claimed: Dict[int, GitHubIssue] = {}
+    # Scopes claimed in this batch count toward the budget before their sessions exist
+    claimed_per_repository: Dict[str, int] = {}
+    for pending in pending_scopes:
+        issue = await db.get(GitHubIssue, pending.github_issue_id)
+        if issue is None or await issue.get_state(db) != "ready-to-scope":
+            await db.delete(pending)
+            continue
+
+        repo_result = await db.execute(
+            select(Repository).where(Repository.full_name == pending.repository)
+        )
+        repository = repo_result.scalars().first()
+        if repository is None or not repository.auto_scope:
+            await db.delete(pending)
+            continue
+
+        scopes = await scopes_in_last_day(db, pending.repository) + claimed_per_repository.get(pending.repository, 0)
+        if scopes >= (repository.auto_scope_daily_budget or 0):
+            logger.info(
+                "Auto-scope budget reached for %s, deferring issue %s",
+                pending.repository, issue.id
+            )
+            pending.due_at = func.now() + timedelta(seconds=AUTO_SCOPE_BUDGET_RETRY_SECONDS)
+            continue
+
+        claimed[pending.id] = issue
+        claimed_per_repository[pending.repository] = claimed_per_repository.get(pending.repository, 0) + 1
+
+    if not claimed:
+        return []
+    result = await db.execute(
+        update(PendingScope)
+        .where(PendingScope.id.in_(list(claimed)))
+        .values(due_at=func.now() + timedelta(seconds=AUTO_SCOPE_DEBOUNCE_SECONDS))
+        .returning(PendingScope.id, PendingScope.due_at)
+    )
+    return [(pending_id, due_at, claimed[pending_id]) for pending_id, due_at in result.all()]
+
+
+async def process_due_scopes(devin_client: DevinClient) -> int:
+    """
+    Start scope sessions for queued issues whose debounce window has passed.
+
+    Claiming commits before Devin is called, so no transaction or row lock
+    is held across the Devin requests. Each started session is then stored
+    in its own short transaction that also drops the claimed row, unless an
+    edit re-queued the issue in the meantime. A failed Devin request leaves
+    the claim to expire, which retries the scope one debounce window later.
+    Returns the number of sessions started.
+    """
+    async with AsyncSessionLocal() as db:
+        claimed = await claim_due_scopes(db)
+        await db.commit()
+
+    started = 0
+    for pending_id, claimed_due_at, issue in claimed:
+        # No query runs before the Devin call returns, so this session holds no connection meanwhile
+        async with AsyncSessionLocal() as db:
+            devin_session = await start_scope_session(db, issue, devin_client)
+            if devin_session is None:
+                logger.warning("Auto-scope failed to create a Devin session for issue %s", issue.id)
+                continue
+            await db.execute(
+                delete(PendingScope).where(
+                    PendingScope.id == pending_id,
+                    PendingScope.due_at == claimed_due_at
+                )
+            )
+            await db.commit()
+        started += 1
+        logger.info("Auto-scoped issue %s in %s", issue.id, issue.repository)
+
+    if started:
+        await response_cache.invalidate("dashboard")
+    return started
+
+
+async def auto_scope_loop(get_devin_client: Callable[[], Optional[DevinClient]]):
+    """Periodically drain due auto-scope requests; runs until cancelled"""
+    while True:
+        devin_client = get_devin_client()
+        if devin_client is not None:
+            try:
+                await process_due_scopes(devin_client)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Auto-scope error: %s", e)
+        await asyncio.sleep(AUTO_SCOPE_POLL_INTERVAL)
+
+
+def session_updates_from_devin(session: DevinSession, devin_status: Dict) -> Dict:
+    """Column updates for a DevinSession from a Devin session status response"""
+    updates = {}
+    if devin_status.get("status") and devin_status["status"] != session.status:
+        updates["status"] = devin_status["status"]
+
+    structured_output = devin_status.get("structured_output")
+    if isinstance(structured_output, dict) and "confidence_score" in structured_output:
+        updates["confidence_score"] = structured_output["confidence_score"]
+        if "action_plan" in structured_output:
+            updates["action_plan"] = structured_output["action_plan"]
+        if "analysis" in structured_output:
+            updates["result"] = structured_output["analysis"]
+    return updates
+
+
+async def fetch_session_statuses(devin_client: DevinClient, session_ids: List[str]) -> List[Optional[Dict]]:
+    """Devin status responses for several sessions, at most SESSION_POLL_CONCURRENCY requests at a time"""
+    semaphore = asyncio.Semaphore(SESSION_POLL_CONCURRENCY)
+
+    async def fetch(session_id: str) -> Optional[Dict]:
+        async with semaphore:
+            return await asyncio.to_thread(devin_client.get_session_status, session_id)
+
+    return await asyncio.gather(*(fetch(session_id) for session_id in session_ids))
+
+
+async def poll_active_sessions(devin_client: DevinClient) -> int:
+    """
+    Refresh recent sessions that are still running or awaiting a confidence score.
+
+    Meant to run as a singleton job so each session is polled once per
+    interval no matter how many workers are up. The batch is the sessions
+    polled longest ago, and last_polled_at is stamped before Devin is asked,
+    so sessions that never change still take their turn. No database
+    session is open during the Devin requests: the batch is read and
+    stamped in one short transaction, the statuses are fetched concurrently,
+    and the updates are written in a second one. Returns the number of
+    sessions updated.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(DevinSession.id, DevinSession.session_id, DevinSession.status)
+            .where(
+                DevinSession.created_at >= func.now() - timedelta(hours=SESSION_POLL_MAX_AGE_HOURS),
+                or_(
+                    DevinSession.status.in_(ACTIVE_SESSION_STATUSES),
+                    and_(DevinSession.session_type == "scope", DevinSession.confidence_score.is_(None))
+                )
+            )
+            .order_by(DevinSession.last_polled_at.asc().nulls_first(), DevinSession.id)
+            .limit(SESSION_POLL_BATCH_SIZE)
+        )
+        sessions = result.all()
+        if not sessions:
+            return 0
+        # updated_at is kept so that polling alone doesn't change the dashboard's ETag
+        await db.execute(
+            update(DevinSession)
+            .where(DevinSession.id.in_([session.id for session in sessions]))
+            .values(last_polled_at=func.now(), updated_at=DevinSession.updated_at)
+        )
+        await db.commit()
+
+    statuses = await fetch_session_statuses(devin_client, [session.session_id for session in sessions])
+
+    changes = []
+    for session, devin_status in zip(sessions, statuses):
+        if devin_status:
+            updates = session_updates_from_devin(session, devin_status)
+            if updates:
+                changes.append((session.id, updates))
+
+    if changes:
+        async with AsyncSessionLocal() as db:
+            for session_pk, updates in changes:
+                await db.execute(update(DevinSession).where(DevinSession.id == session_pk).values(**updates))
+            await db.commit()
+        await response_cache.invalidate("dashboard")
+        logger.info("Session poll updated %d of %d active sessions", len(changes), len(sessions))
+    return len(changes)
@@ -0,0 +1,162 @@
+import time
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+from sqlalchemy import select, update, delete, or_, and_, func
+
+from .database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+PRUNE_INTERVAL = 3600
+
+# Runs a claimed row; returns extra column values to store when it succeeds
+RowRunner = Callable[[Any], Awaitable[Dict]]
+
+
+class TableQueue:
+    """
+    A work queue stored in a table, shared by every process using the database.
+
+    The model needs id, status, attempts, locked_at, available_at and
+    last_error columns, plus the finished_column that is stamped when a row
+    is done or has failed for good. Rows are claimed with FOR UPDATE SKIP
+    LOCKED, so concurrent workers in this process or others never claim the
+    same one; a "processing" row older than processing_timeout is assumed to
+    belong to a dead worker and is claimed again. Failed rows are retried
+    with exponential backoff until max_attempts.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model,
+        finished_column: str,
+        max_attempts: int,
+        processing_timeout: int,
+        poll_interval: float,
+        retention_days: int,
+        prune_statuses: Sequence[str] = ("done",),
+        prune_age_column: str = None
+    ):
+        self.name = name
+        self.model = model
+        self.finished_column = finished_column
+        self.max_attempts = max_attempts
+        self.processing_timeout = processing_timeout
+        self.poll_interval = poll_interval
+        self.retention_days = retention_days
+        self.prune_statuses = tuple(prune_statuses)
+        self.prune_age_column = prune_age_column or finished_column
+        # Wakes workers in this process; workers in other processes pick rows up on their next poll
+        self._wakeup = asyncio.Event()
+        self._last_prune = 0.0
+
+    def notify(self):
+        """Wake this process's workers after a row was committed"""
+        self._wakeup.set()
+
+    async def claim(self, *criteria) -> Optional[Any]:
+        """
+        Claim the oldest available row matching criteria.
+
+        The row is marked "processing" and committed before it is returned,
+        so the runner can work in its own transactions.
+        """
+        model = self.model
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(model)
+                .where(
+                    *criteria,
+                    or_(
+                        and_(model.status == "pending", model.available_at <= func.now()),
+                        and_(
+                            model.status == "processing",
+                            model.locked_at < func.now() - timedelta(seconds=self.processing_timeout)
+                        )
+                    )
+                )
+                .order_by(model.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            row = result.scalar_one_or_none()
+            if row is None:
+                return None
+
+            row.status = "processing"
+            row.locked_at = func.now()
+            row.attempts = (row.attempts or 0) + 1
+            await db.commit()
+            await db.refresh(row)
+            return row
+
+    async def process_next(self, runner: RowRunner, *criteria, log_extra: Callable[[Any], Dict] = None) -> bool:
+        """Claim and run one row; returns False when nothing was available"""
+        row = await self.claim(*criteria)
+        if row is None:
+            return False
+
+        values = {"locked_at": None}
+        try:
+            values.update(await runner(row))
+            values.update(status="done", last_error=None)
+            values[self.finished_column] = func.now()
+        except Exception as e:
+            logger.exception(
+                "%s queue entry failed (attempt %d)", self.name, row.attempts,
+                extra=log_extra(row) if log_extra else None
+            )
+            values["last_error"] = str(e)
+            if row.attempts >= self.max_attempts:
+                values["status"] = "failed"
+                values[self.finished_column] = func.now()
+            else:
+                backoff = min(5 * 2 ** (row.attempts - 1), 300)
+                values.update(status="pending", available_at=func.now() + timedelta(seconds=backoff))
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(self.model).where(self.model.id == row.id).values(**values))
+            await db.commit()
+        return True
+
+    async def prune(self):
+        """Drop finished rows past the retention window"""
+        model = self.model
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(model).where(
+                    model.status.in_(self.prune_statuses),
+                    getattr(model, self.prune_age_column) < func.now() - timedelta(days=self.retention_days)
+                )
+            )
+            await db.commit()
+
+    async def _worker_loop(self, worker_number: int, process_next: Callable[[], Awaitable[bool]]):
+        while True:
+            # Clear before draining so a notify during the drain still wakes us
+            self._wakeup.clear()
+            try:
+                while await process_next():
+                    pass
+                if worker_number == 0 and time.monotonic() - self._last_prune > PRUNE_INTERVAL:
+                    self._last_prune = time.monotonic()
+                    await self.prune()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("%s worker %d error: %s", self.name, worker_number, e)
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start_workers(self, process_next: Callable[[], Awaitable[bool]], workers: int) -> List[asyncio.Task]:
+        """Start workers on the running event loop; each drains the queue with process_next"""
+        return [
+            asyncio.create_task(self._worker_loop(worker_number, process_next), name=f"{self.name}-worker-{worker_number}")
+            for worker_number in range(workers)
+        ]
@@ -0,0 +1,55 @@
+"""
+Query-budget assertions for tests and CI.
+
+    client = TestClient(app)
+    with assert_max_queries(4):
+        client.get("/dashboard")
+
+    assert_queries_do_not_scale(
+        lambda: client.get("/issues/octo/repo?mode=stored"),
+        seed=lambda n: seed_issues("octo/repo", n)
+    )
+"""
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Sequence
+
+from .query_count import QueryCounter, capture_queries
+
+
+def _statement_listing(counter: QueryCounter) -> str:
+    return "\n".join(f"  {index}. {statement}" for index, statement in enumerate(counter.statements, 1))
+
+
+@contextmanager
+def assert_max_queries(max_queries: int) -> Iterator[QueryCounter]:
+    """Fail if requests made in the block run more than max_queries SQL statements"""
+    with capture_queries(requests_only=True) as counter:
+        yield counter
+    if counter.count > max_queries:
+        raise AssertionError(
+            f"Expected at most {max_queries} queries, ran {counter.count}:\n{_statement_listing(counter)}"
+        )
+
+
+def assert_queries_do_not_scale(
+    request: Callable[[], Any],
+    seed: Callable[[int], Any],
+    sizes: Sequence[int] = (1, 5, 25)
+) -> Dict[int, int]:
+    """
+    Fail if request() runs more queries as the seeded data grows.
+
+    seed(n) should leave n rows of whatever the endpoint iterates over (it
+    is called with each size in turn, so it should replace, not add). A
+    constant count means no N+1; the counts per size are returned. Only
+    statements run by requests count, so seeding and background work don't.
+    """
+    counts = {}
+    for size in sizes:
+        seed(size)
+        with capture_queries(requests_only=True) as counter:
+            request()
+        counts[size] = counter.count
+    if len(set(counts.values())) > 1:
+        raise AssertionError(f"Query count grows with data size (size: queries): {counts}")
+    return counts
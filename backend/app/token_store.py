@@ -0,0 +1,143 @@
+"""
+Installation tokens shared across processes through github_users.
+
+Tokens are stored Fernet-encrypted in access_token, with token_expiry.
+Every worker reads from an in-process cache first, then the database.
+Only when both are stale does one of them mint a new token, holding a
+row lock on the installation's rows. The others wait on the lock, then
+pick up the fresh token. N processes therefore share one token per
+installation instead of minting N.
+
+Without TOKEN_ENCRYPTION_KEY nothing is stored and each client mints its
+own tokens as before.
+"""
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from cryptography.fernet import Fernet, MultiFernet, InvalidToken
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import AsyncSessionLocal
+from .models import GitHubUser
+from .github_client import GitHubClient, TOKEN_REFRESH_MARGIN_SECONDS
+from .metrics import GITHUB_INSTALLATION_TOKENS
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated Fernet keys (Fernet.generate_key()); the first encrypts,
+# all of them decrypt, so keys can be rotated without dropping stored tokens
+TOKEN_ENCRYPTION_KEY = os.getenv("TOKEN_ENCRYPTION_KEY")
+
+Token = Tuple[str, float]
+
+
+def to_timestamp(value: datetime) -> float:
+    """Unix time for a naive UTC datetime, as stored in the database"""
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def from_timestamp(value: float) -> datetime:
+    return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+
+
+class InstallationTokenStore:
+    def __init__(self, keys: Optional[str] = TOKEN_ENCRYPTION_KEY):
+        self._fernet = MultiFernet([Fernet(key.strip()) for key in keys.split(",") if key.strip()]) if keys else None
+        # installation_id -> (token, expires_at)
+        self._cache: Dict[str, Token] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._fernet is not None
+
+    @staticmethod
+    def _usable(token: Optional[Token], rejected: Optional[str]) -> bool:
+        return (
+            token is not None
+            and token[0] != rejected
+            and time.time() < token[1] - TOKEN_REFRESH_MARGIN_SECONDS
+        )
+
+    def _decrypt(self, user: GitHubUser) -> Optional[Token]:
+        if not user.access_token or not user.token_expiry:
+            return None
+        try:
+            return self._fernet.decrypt(user.access_token.encode()).decode(), to_timestamp(user.token_expiry)
+        except InvalidToken:
+            logger.warning("Stored token for installation %s cannot be decrypted with the configured keys", user.installation_id)
+            return None
+
+    def evict(self, installation_id):
+        self._cache.pop(str(installation_id), None)
+
+    async def ensure_token(self, client: GitHubClient):
+        """Give an app-authenticated client a current installation token from the cache, the database or a new mint"""
+        if not self.enabled or not client.uses_app_auth or not client.token_needs_refresh():
+            return
+        installation_id = str(client.installation_id)
+        rejected = client.rejected_token
+
+        token = self._cache.get(installation_id)
+        source = "cache"
+        if not self._usable(token, rejected):
+            # Expired or revoked: drop it so no other client is handed it
+            self.evict(installation_id)
+            async with self._locks.setdefault(installation_id, asyncio.Lock()):
+                token = self._cache.get(installation_id)
+                if not self._usable(token, rejected):
+                    token, source = await self._load_or_mint(client, installation_id, rejected)
+                    if token is None:
+                        return
+                    self._cache[installation_id] = token
+        GITHUB_INSTALLATION_TOKENS.inc(source=source)
+        client.set_installation_token(*token)
+
+    async def _load_or_mint(self, client: GitHubClient, installation_id: str, rejected: Optional[str]):
+        async with AsyncSessionLocal() as db:
+            users = await self._installation_users(db, installation_id)
+            if users:
+                token = self._decrypt(users[0])
+                if self._usable(token, rejected):
+                    return token, "database"
+
+            # Lock the installation's rows so only one worker mints; the rest
+            # wait here and then find the token it stored
+            users = await self._installation_users(db, installation_id, for_update=True)
+            token = self._decrypt(users[0]) if users else None
+            if self._usable(token, rejected):
+                await db.commit()
+                return token, "database"
+
+            token = await asyncio.to_thread(client.mint_installation_token)
+            if not token[0]:
+                await db.rollback()
+                return None, "minted"
+            if users:
+                await db.execute(
+                    update(GitHubUser)
+                    .where(GitHubUser.id.in_([user.id for user in users]))
+                    .values(
+                        access_token=self._fernet.encrypt(token[0].encode()).decode(),
+                        token_expiry=from_timestamp(token[1])
+                    )
+                )
+            await db.commit()
+            logger.info("Minted installation token for installation %s", installation_id)
+            return token, "minted"
+
+    @staticmethod
+    async def _installation_users(db: AsyncSession, installation_id: str, for_update: bool = False):
+        query = select(GitHubUser).where(GitHubUser.installation_id == installation_id).order_by(GitHubUser.id)
+        if for_update:
+            # populate_existing: reload the rows as they are once the lock is granted
+            query = query.with_for_update().execution_options(populate_existing=True)
+        return (await db.execute(query)).scalars().all()
+
+
+installation_tokens = InstallationTokenStore()
@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import queue
+import random
+import atexit
+import logging
+import secrets
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# "file" writes one JSON span per line to TRACE_FILE, "otlp" posts OTLP/HTTP
+# JSON to TRACE_OTLP_ENDPOINT; anything else disables export. Spans are still
+# created when export is off, so log lines keep their trace_id.
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "").lower()
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+# Fraction of new traces exported; a sampled-out trace is still propagated
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "devin-issues-backend")
+
+EXPORT_BATCH_SIZE = 200
+EXPORT_INTERVAL = 2.0
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation in a trace; children share the root's trace_id"""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool, kind: str, attributes: Dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.kind = kind
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def finish(self, error: BaseException = None):
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        if self.sampled:
+            _exporter.submit(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_span(
+    name: str,
+    kind: str = "internal",
+    attributes: Dict = None,
+    trace_id: str = None,
+    parent_id: str = None
+) -> Span:
+    """
+    Start a span under the current one (or a new trace) without making it
+    current. Use for leaf operations whose start and end happen in different
+    callbacks, such as SQL statements; otherwise use span().
+    """
+    attributes = dict(attributes or {})
+    parent = _current_span.get()
+    if trace_id is None and parent is not None:
+        return Span(name, parent.trace_id, parent.span_id, parent.sampled, kind, attributes)
+    sampled = TRACE_SAMPLE_RATE >= 1.0 or random.random() < TRACE_SAMPLE_RATE
+    return Span(name, trace_id or secrets.token_hex(16), parent_id, sampled, kind, attributes)
+
+
+@contextmanager
+def span(
+    name: str,
+    kind: str = "internal",
+    attributes: Dict = None,
+    trace_id: str = None,
+    parent_id: str = None
+) -> Iterator[Span]:
+    """
+    Run a block as a span and make it current, so spans started inside
+    nest under it. With trace_id it continues a trace from elsewhere.
+    """
+    current = start_span(name, kind, attributes, trace_id, parent_id)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.finish(error=e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.finish()
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Dict[str, str]]:
+    """Trace and parent ids from a W3C traceparent header, if well formed"""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return {"trace_id": parts[1], "parent_id": parts[2]}
+
+
+class TraceContextFilter(logging.Filter):
+    """Stamp records with the active trace_id/span_id so logs join up with spans"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        active = _current_span.get()
+        if active is not None:
+            record.trace_id = active.trace_id
+            record.span_id = active.span_id
+        return True
+
+
+class SpanExporter:
+    """
+    Ships finished spans from a daemon thread so request paths only pay
+    for a queue put. Spans are batched by count or EXPORT_INTERVAL.
+    """
+
+    def __init__(self):
+        self._queue: "queue.SimpleQueue[Optional[Span]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return TRACE_EXPORTER in ("file", "otlp")
+
+    def submit(self, finished: Span):
+        if not self.enabled:
+            return
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.shutdown)
+        self._queue.put(finished)
+
+    def shutdown(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            batch: List[Span] = []
+            stopping = False
+            deadline = time.monotonic() + EXPORT_INTERVAL
+            while len(batch) < EXPORT_BATCH_SIZE:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            if batch:
+                self._export(batch)
+            if stopping:
+                return
+
+    def _export(self, batch: List[Span]):
+        try:
+            if TRACE_EXPORTER == "file":
+                with open(TRACE_FILE, "a") as trace_file:
+                    for finished in batch:
+                        trace_file.write(json.dumps(finished.to_dict(), default=str) + "\n")
+            else:
+                requests.post(TRACE_OTLP_ENDPOINT, json=otlp_payload(batch), timeout=5)
+        except Exception as e:
+            logger.warning("Span export to %s failed: %s", TRACE_EXPORTER, e)
+
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+OTLP_SPAN_KINDS = {"internal": 1, "server": 2, "client": 3, "consumer": 5}
+
+
+def otlp_payload(batch: List[Span]) -> Dict:
+    """Encode spans as an OTLP/HTTP JSON ExportTraceServiceRequest"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{
+                "scope": {"name": "app.tracing"},
+                "spans": [
+                    {
+                        "traceId": finished.trace_id,
+                        "spanId": finished.span_id,
+                        **({"parentSpanId": finished.parent_id} if finished.parent_id else {}),
+                        "name": finished.name,
+                        "kind": OTLP_SPAN_KINDS.get(finished.kind, 1),
+                        "startTimeUnixNano": str(finished.start_ns),
+                        "endTimeUnixNano": str(finished.end_ns),
+                        "attributes": [
+                            {"key": key, "value": _otlp_value(value)}
+                            for key, value in finished.attributes.items() if value is not None
+                        ],
+                        "status": {"code": 2, "message": finished.error} if finished.error else {"code": 1}
+                    }
+                    for finished in batch
+                ]
+            }]
+        }]
+    }
+
+
+_exporter = SpanExporter()
+
+
+def shutdown_tracing():
+    """Flush queued spans and stop the exporter thread"""
+    _exporter.shutdown()
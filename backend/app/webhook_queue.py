@@ -0,0 +1,94 @@
+import os
+import json
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import AsyncSessionLocal
+from .models import WebhookDelivery
+from .table_queue import TableQueue
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "2"))
+WEBHOOK_POLL_INTERVAL = float(os.getenv("WEBHOOK_POLL_INTERVAL", "2"))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "5"))
+# A "processing" row older than this is assumed to belong to a dead worker
+WEBHOOK_PROCESSING_TIMEOUT = int(os.getenv("WEBHOOK_PROCESSING_TIMEOUT", "300"))
+WEBHOOK_RETENTION_DAYS = int(os.getenv("WEBHOOK_RETENTION_DAYS", "7"))
+
+WebhookHandler = Callable[[str, Dict, AsyncSession], Awaitable[Dict]]
+
+delivery_queue = TableQueue(
+    "webhook",
+    WebhookDelivery,
+    finished_column="processed_at",
+    max_attempts=WEBHOOK_MAX_ATTEMPTS,
+    processing_timeout=WEBHOOK_PROCESSING_TIMEOUT,
+    poll_interval=WEBHOOK_POLL_INTERVAL,
+    retention_days=WEBHOOK_RETENTION_DAYS,
+    # Kept for the dedupe window counted from receipt; failed deliveries stay for inspection
+    prune_age_column="received_at"
+)
+
+
+async def enqueue_delivery(db: AsyncSession, delivery_id: str, event_type: str, payload: bytes) -> bool:
+    """
+    Store a verified delivery for the workers.
+
+    Returns False when the delivery ID was already stored, i.e. GitHub
+    redelivered an event we have already accepted.
+    """
+    result = await db.execute(
+        insert(WebhookDelivery)
+        .values(delivery_id=delivery_id, event_type=event_type, payload=payload.decode())
+        .on_conflict_do_nothing(index_elements=[WebhookDelivery.delivery_id])
+        .returning(WebhookDelivery.id)
+    )
+    inserted = result.scalar_one_or_none() is not None
+    await db.commit()
+    if inserted:
+        delivery_queue.notify()
+    return inserted
+
+
+async def claim_delivery() -> Optional[WebhookDelivery]:
+    """Claim the oldest available delivery (see TableQueue.claim)"""
+    return await delivery_queue.claim()
+
+
+async def process_next_delivery(handler: WebhookHandler) -> bool:
+    """Process one delivery; returns False when the queue had nothing available"""
+    async def run(delivery: WebhookDelivery) -> Dict:
+        attributes = {"webhook.event": delivery.event_type, "webhook.delivery_id": delivery.delivery_id}
+        with span(f"webhook {delivery.event_type}", "consumer", attributes):
+            async with AsyncSessionLocal() as db:
+                await handler(delivery.event_type, json.loads(delivery.payload), db)
+        return {}
+
+    return await delivery_queue.process_next(
+        run,
+        log_extra=lambda delivery: {"delivery_id": delivery.delivery_id, "event_type": delivery.event_type}
+    )
+
+
+async def prune_deliveries():
+    """Drop finished deliveries past the retention window (which is also the dedupe window)"""
+    await delivery_queue.prune()
+
+
+def start_webhook_workers(handler: WebhookHandler, workers: int = None) -> List[asyncio.Task]:
+    """Start the delivery workers on the running event loop"""
+    workers = WEBHOOK_WORKERS if workers is None else workers
+    return delivery_queue.start_workers(lambda: process_next_delivery(handler), workers)
+
+
+async def queue_status(db: AsyncSession) -> Dict[str, int]:
+    result = await db.execute(
+        select(WebhookDelivery.status, func.count()).group_by(WebhookDelivery.status)
+    )
+    return {status: count for status, count in result.all()}
@@ -0,0 +1,93 @@
+import os
+import hmac
+import json
+import base64
+import asyncio
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping
+
+logger = logging.getLogger(__name__)
+
+# When set, every delivery that passes signature verification is appended
+# (headers plus raw body) to WEBHOOK_RECORD_DIR/webhooks-<date>-<pid>.jsonl
+# for replay with benchmarks.replay_webhooks
+WEBHOOK_RECORD_DIR = os.getenv("WEBHOOK_RECORD_DIR")
+
+# The signature headers are left out: replay signs with its own secret
+RECORDED_HEADERS = ("content-type", "user-agent")
+RECORDED_HEADER_PREFIX = "x-github-"
+
+_write_lock = threading.Lock()
+
+
+def sign_webhook_payload(payload: bytes, secret: str) -> str:
+    """The X-Hub-Signature-256 value GitHub sends for payload"""
+    return "sha256=" + hmac.new(secret.encode(), payload, hashlib.sha256).hexdigest()
+
+
+def recorded_headers(headers: Mapping[str, str]) -> Dict[str, str]:
+    return {
+        name.lower(): value for name, value in headers.items()
+        if name.lower() in RECORDED_HEADERS or name.lower().startswith(RECORDED_HEADER_PREFIX)
+    }
+
+
+def archive_path(received_at: datetime) -> Path:
+    # One file per process so concurrent API processes never interleave lines
+    return Path(WEBHOOK_RECORD_DIR) / f"webhooks-{received_at.strftime('%Y%m%d')}-{os.getpid()}.jsonl"
+
+
+def _append(path: Path, line: str):
+    with _write_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a") as f:
+            f.write(line + "\n")
+
+
+async def record_delivery(headers: Mapping[str, str], body: bytes):
+    """Append a verified delivery to the archive; failures are logged, never raised"""
+    if not WEBHOOK_RECORD_DIR:
+        return
+    received_at = datetime.now(timezone.utc)
+    entry = {
+        "received_at": received_at.isoformat(),
+        "headers": recorded_headers(headers),
+        "body": base64.b64encode(body).decode()
+    }
+    try:
+        await asyncio.to_thread(_append, archive_path(received_at), json.dumps(entry))
+    except OSError:
+        logger.exception("Failed to record webhook delivery", extra={"delivery_id": headers.get("x-github-delivery")})
+
+
+def read_recorded_deliveries(paths: Iterable[Path]) -> List[Dict]:
+    """
+    Load archived deliveries from files or directories, oldest first.
+
+    Each entry has received_at (datetime), headers and body (bytes).
+    """
+    def files() -> Iterator[Path]:
+        for path in paths:
+            if path.is_dir():
+                yield from sorted(path.glob("webhooks-*.jsonl"))
+            else:
+                yield path
+
+    deliveries = []
+    for path in files():
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                deliveries.append({
+                    "received_at": datetime.fromisoformat(entry["received_at"]),
+                    "headers": entry["headers"],
+                    "body": base64.b64decode(entry["body"])
+                })
+    deliveries.sort(key=lambda delivery: delivery["received_at"])
+    return deliveries
@@ -0,0 +1,62 @@
+"""
+Background worker process: python -m app.worker
+
+Runs the webhook and job queues, auto-scoping and the leader's singleton
+jobs (sync scheduler, session polling) away from the API's event loop and
+connection pool. Start any number of these next to API processes running
+with RUN_BACKGROUND_IN_API=false; the queues use SKIP LOCKED and the
+singleton jobs use leader election, so they scale out safely.
+"""
+import os
+import signal
+import asyncio
+import logging
+
+from .database import init_database, dispose_database, create_tables, warm_pool
+from .clients import init_clients
+from .logging_config import shutdown_logging
+from .tracing import shutdown_tracing
+from .metrics import start_metrics_server
+from .main import start_background_tasks, stop_background_tasks
+
+logger = logging.getLogger(__name__)
+
+WORKER_JOB_CONCURRENCY = int(os.getenv("WORKER_JOB_CONCURRENCY", "4"))
+WORKER_WEBHOOK_CONCURRENCY = int(os.getenv("WORKER_WEBHOOK_CONCURRENCY", "4"))
+# Metrics are per process, so each worker serves its own /metrics on this port
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "0"))
+
+
+async def run_worker():
+    init_database()
+    init_clients()
+    await create_tables()
+    await warm_pool()
+    metrics_server = start_metrics_server(WORKER_METRICS_PORT) if WORKER_METRICS_PORT else None
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    tasks = start_background_tasks(
+        job_workers=WORKER_JOB_CONCURRENCY,
+        webhook_workers=WORKER_WEBHOOK_CONCURRENCY
+    )
+    logger.info(
+        "Worker started with %d job and %d webhook workers",
+        WORKER_JOB_CONCURRENCY, WORKER_WEBHOOK_CONCURRENCY
+    )
+    await stop.wait()
+
+    logger.info("Worker shutting down")
+    await stop_background_tasks(tasks)
+    if metrics_server is not None:
+        metrics_server.shutdown()
+    await dispose_database()
+    shutdown_tracing()
+    shutdown_logging()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
@@ -0,0 +1,64 @@
+"""
+Compare two benchmark result files, e.g. before and after a change.
+
+    python -m benchmarks.compare benchmarks/results/<before>.json benchmarks/results/<after>.json
+
+Prints throughput and p50/p99 for every size and scenario present in both
+files, with the relative change. Latency changes above --threshold percent
+in the wrong direction are flagged.
+"""
+import sys
+import json
+import argparse
+from typing import Optional
+
+
+def change(before: Optional[float], after: Optional[float]) -> Optional[float]:
+    if not before or after is None:
+        return None
+    return (after - before) / before * 100
+
+
+def format_change(value: Optional[float]) -> str:
+    return "     n/a" if value is None else f"{value:+7.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change to flag")
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    print(f"before: {(before.get('commit') or 'unknown')[:8]}{' (dirty)' if before.get('dirty') else ''} {before.get('label', '')}")
+    print(f"after:  {(after.get('commit') or 'unknown')[:8]}{' (dirty)' if after.get('dirty') else ''} {after.get('label', '')}")
+    print(f"{'size':>7} {'scenario':<14} {'req/s':>9} {'change':>8} {'p50 ms':>9} {'change':>8} {'p99 ms':>9} {'change':>8}")
+
+    regressions = 0
+    for size, scenarios in after["results"].items():
+        for name, result in scenarios.items():
+            baseline = before["results"].get(size, {}).get(name)
+            if not baseline:
+                continue
+            throughput = change(baseline["throughput"], result["throughput"])
+            p50 = change(baseline["p50_ms"], result["p50_ms"])
+            p99 = change(baseline["p99_ms"], result["p99_ms"])
+            flagged = any(value is not None and value > args.threshold for value in (p50, p99))
+            regressions += flagged
+            print(
+                f"{size:>7} {name:<14} {result['throughput'] or 0:>9.1f} {format_change(throughput)}"
+                f" {result['p50_ms'] or 0:>9.1f} {format_change(p50)}"
+                f" {result['p99_ms'] or 0:>9.1f} {format_change(p99)}{'  <- slower' if flagged else ''}"
+            )
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
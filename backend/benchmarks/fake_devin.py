@@ -0,0 +1,58 @@
+"""
+Local stand-in for the Devin sessions API.
+
+    uvicorn benchmarks.fake_devin:app --port 9102
+
+Sessions report "running" until FAKE_DEVIN_SESSION_SECONDS after creation,
+then "blocked" with a structured_output carrying a confidence score and
+action plan, which is what a finished scope session looks like. Sessions
+the server doesn't know (seeded rows) are reported finished right away.
+"""
+import os
+import time
+import uuid
+import random
+import asyncio
+from typing import Dict
+
+from fastapi import FastAPI, Request
+
+LATENCY_MS = float(os.getenv("FAKE_DEVIN_LATENCY_MS", "150"))
+JITTER_MS = float(os.getenv("FAKE_DEVIN_JITTER_MS", "30"))
+SESSION_SECONDS = float(os.getenv("FAKE_DEVIN_SESSION_SECONDS", "30"))
+
+app = FastAPI()
+
+# session_id -> creation time
+_sessions: Dict[str, float] = {}
+
+
+@app.middleware("http")
+async def latency(request: Request, call_next):
+    await asyncio.sleep(max(0.0, LATENCY_MS + random.uniform(-JITTER_MS, JITTER_MS)) / 1000)
+    return await call_next(request)
+
+
+@app.post("/v1/sessions")
+async def create_session(request: Request):
+    await request.json()
+    session_id = f"devin-{uuid.uuid4().hex}"
+    _sessions[session_id] = time.time()
+    return {"session_id": session_id, "url": f"https://app.devin.ai/sessions/{session_id}", "is_new_session": True}
+
+
+@app.get("/v1/session/{session_id}")
+async def get_session(session_id: str):
+    created = _sessions.get(session_id, 0.0)
+    if time.time() - created < SESSION_SECONDS:
+        return {"session_id": session_id, "status": "running", "status_enum": "working", "structured_output": None}
+    return {
+        "session_id": session_id,
+        "status": "blocked",
+        "status_enum": "blocked",
+        "structured_output": {
+            "confidence_score": random.randint(40, 95),
+            "action_plan": "1. Reproduce the issue\n2. Fix the handler\n3. Add a regression test",
+            "analysis": "The failure comes from an unchecked None in the request handler."
+        }
+    }
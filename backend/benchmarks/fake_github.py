@@ -0,0 +1,165 @@
+"""
+Local stand-in for the parts of the GitHub REST API the backend calls.
+
+    uvicorn benchmarks.fake_github:app --port 9101
+
+Data is generated deterministically: FAKE_GITHUB_REPOS repositories named
+repo-0..repo-N under FAKE_GITHUB_OWNER, each with FAKE_GITHUB_ISSUES_PER_REPO
+issues. Every response waits FAKE_GITHUB_LATENCY_MS (+/- jitter) and counts
+against a per-token rate limit that answers 403 like GitHub once exhausted.
+"""
+import os
+import time
+import random
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+OWNER = os.getenv("FAKE_GITHUB_OWNER", "bench-org")
+REPOS = int(os.getenv("FAKE_GITHUB_REPOS", "10"))
+ISSUES_PER_REPO = int(os.getenv("FAKE_GITHUB_ISSUES_PER_REPO", "100"))
+LATENCY_MS = float(os.getenv("FAKE_GITHUB_LATENCY_MS", "50"))
+JITTER_MS = float(os.getenv("FAKE_GITHUB_JITTER_MS", "10"))
+RATE_LIMIT = int(os.getenv("FAKE_GITHUB_RATE_LIMIT", "5000"))
+RATE_WINDOW_SECONDS = int(os.getenv("FAKE_GITHUB_RATE_WINDOW_SECONDS", "3600"))
+
+BASE_TIME = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+app = FastAPI()
+
+# Authorization header -> [window start, requests used]
+_rate_windows: Dict[str, List[float]] = {}
+
+
+def github_time(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def repository(index: int) -> Dict:
+    return {
+        "id": 100000 + index,
+        "name": f"repo-{index}",
+        "full_name": f"{OWNER}/repo-{index}",
+        "private": index % 3 == 0,
+        "description": f"Benchmark repository {index}",
+        "default_branch": "main",
+        "open_issues_count": ISSUES_PER_REPO,
+        "pushed_at": github_time(BASE_TIME + timedelta(hours=index)),
+        "owner": {"login": OWNER}
+    }
+
+
+def issue(repo_index: int, number: int) -> Dict:
+    return {
+        "id": repo_index * 1_000_000 + number,
+        "number": number,
+        "title": f"Benchmark issue {number} in repo-{repo_index}",
+        "body": "Steps to reproduce:\n1. Run the thing\n2. Observe the other thing\n" * 3,
+        "state": "open",
+        "html_url": f"https://github.com/{OWNER}/repo-{repo_index}/issues/{number}",
+        "updated_at": github_time(BASE_TIME + timedelta(minutes=number)),
+        "user": {"login": "bench-user"}
+    }
+
+
+def paginate(request: Request, items_count: int):
+    per_page = min(int(request.query_params.get("per_page", 30)), 100)
+    page = max(int(request.query_params.get("page", 1)), 1)
+    start = (page - 1) * per_page
+    end = min(start + per_page, items_count)
+    headers = {}
+    if end < items_count:
+        next_url = request.url.include_query_params(page=page + 1)
+        headers["Link"] = f'<{next_url}>; rel="next"'
+    return range(start, end), headers
+
+
+@app.middleware("http")
+async def latency_and_rate_limit(request: Request, call_next):
+    await asyncio.sleep(max(0.0, LATENCY_MS + random.uniform(-JITTER_MS, JITTER_MS)) / 1000)
+
+    key = request.headers.get("authorization", "anonymous")
+    now = time.time()
+    window = _rate_windows.setdefault(key, [now, 0])
+    if now - window[0] >= RATE_WINDOW_SECONDS:
+        window[0], window[1] = now, 0
+    reset = int(window[0] + RATE_WINDOW_SECONDS)
+    rate_headers = {
+        "X-RateLimit-Limit": str(RATE_LIMIT),
+        "X-RateLimit-Reset": str(reset),
+        "X-RateLimit-Resource": "core"
+    }
+    if window[1] >= RATE_LIMIT:
+        return JSONResponse(
+            status_code=403,
+            content={"message": "API rate limit exceeded"},
+            headers={**rate_headers, "X-RateLimit-Remaining": "0"}
+        )
+    window[1] += 1
+
+    response = await call_next(request)
+    response.headers.update({**rate_headers, "X-RateLimit-Remaining": str(RATE_LIMIT - int(window[1]))})
+    return response
+
+
+@app.post("/app/installations/{installation_id}/access_tokens", status_code=201)
+async def create_installation_token(installation_id: str):
+    return {
+        "token": f"ghs_fake{installation_id}{int(time.time())}",
+        "expires_at": github_time(datetime.now(timezone.utc) + timedelta(hours=1))
+    }
+
+
+@app.get("/app/installations/{installation_id}")
+async def get_installation(installation_id: str):
+    return {
+        "id": int(installation_id) if installation_id.isdigit() else 1,
+        "account": {"login": OWNER},
+        "permissions": {"issues": "write", "metadata": "read"},
+        "repository_selection": "all"
+    }
+
+
+@app.get("/installation/repositories")
+async def list_installation_repositories(request: Request):
+    indexes, headers = paginate(request, REPOS)
+    body = {"total_count": REPOS, "repositories": [repository(index) for index in indexes]}
+    return JSONResponse(content=body, headers=headers)
+
+
+def repo_index(owner: str, repo: str) -> int:
+    if owner != OWNER or not repo.startswith("repo-") or not repo[5:].isdigit() or int(repo[5:]) >= REPOS:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return int(repo[5:])
+
+
+@app.get("/repos/{owner}/{repo}/issues")
+async def list_issues(owner: str, repo: str, request: Request):
+    index = repo_index(owner, repo)
+    if request.query_params.get("state", "open") == "closed":
+        return []
+    positions, headers = paginate(request, ISSUES_PER_REPO)
+    # Newest first, as GitHub returns them
+    body = [issue(index, ISSUES_PER_REPO - position) for position in positions]
+    return JSONResponse(content=body, headers=headers)
+
+
+@app.get("/repos/{owner}/{repo}/issues/{number}")
+async def get_issue(owner: str, repo: str, number: int):
+    index = repo_index(owner, repo)
+    if not 1 <= number <= ISSUES_PER_REPO:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return issue(index, number)
+
+
+@app.get("/rate_limit")
+async def rate_limit(request: Request):
+    window = _rate_windows.get(request.headers.get("authorization", "anonymous"), [time.time(), 0])
+    return {"resources": {"core": {
+        "limit": RATE_LIMIT,
+        "remaining": RATE_LIMIT - int(window[1]),
+        "reset": int(window[0] + RATE_WINDOW_SECONDS)
+    }}}
@@ -0,0 +1,119 @@
+"""
+Replay recorded webhook deliveries against the API.
+
+    python -m benchmarks.replay_webhooks webhook_recordings/ --url http://127.0.0.1:8000/webhook --speed 10
+
+Deliveries recorded with WEBHOOK_RECORD_DIR are sent in their original
+order, with the gaps between them divided by --speed (1, 10, 100, ...), so
+the event mix and burst shape of real traffic are kept. Each body is
+re-signed with --secret (the target's GITHUB_WEBHOOK_SECRET) and, unless
+--keep-delivery-ids is given, gets a fresh X-GitHub-Delivery so the API's
+redelivery check doesn't drop it.
+
+Sending is open-loop: a slow API does not slow the schedule down, it shows
+up as latency and, once --max-in-flight is reached, as schedule lag.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from app.webhook_recorder import sign_webhook_payload, read_recorded_deliveries
+from benchmarks.run import percentile
+
+
+async def replay(deliveries: List[Dict], args) -> Dict:
+    latencies: List[float] = []
+    lags: List[float] = []
+    statuses: Dict[str, int] = {}
+    in_flight = asyncio.Semaphore(args.max_in_flight)
+    first_received = deliveries[0]["received_at"]
+
+    async def send(client: httpx.AsyncClient, delivery: Dict):
+        headers = dict(delivery["headers"])
+        if not args.keep_delivery_ids:
+            headers["x-github-delivery"] = str(uuid.uuid4())
+        headers["x-hub-signature-256"] = sign_webhook_payload(delivery["body"], args.secret)
+        started = time.perf_counter()
+        try:
+            response = await client.post(args.url, content=delivery["body"], headers=headers)
+            outcome = str(response.status_code)
+        except httpx.HTTPError as e:
+            outcome = type(e).__name__
+        finally:
+            in_flight.release()
+        latencies.append(time.perf_counter() - started)
+        statuses[outcome] = statuses.get(outcome, 0) + 1
+
+    async with httpx.AsyncClient(timeout=60, limits=httpx.Limits(max_connections=args.max_in_flight)) as client:
+        started = time.perf_counter()
+        tasks = []
+        for delivery in deliveries:
+            due = started + (delivery["received_at"] - first_received).total_seconds() / args.speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await in_flight.acquire()
+            lags.append(max(0.0, time.perf_counter() - due))
+            tasks.append(asyncio.create_task(send(client, delivery)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    lags.sort()
+    recorded_span = (deliveries[-1]["received_at"] - first_received).total_seconds()
+    return {
+        "deliveries": len(deliveries),
+        "speed": args.speed,
+        "recorded_seconds": round(recorded_span, 3),
+        "seconds": round(elapsed, 3),
+        "throughput": round(len(deliveries) / elapsed, 2) if elapsed else None,
+        "p50_ms": percentile(latencies, 0.50),
+        "p90_ms": percentile(latencies, 0.90),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_lag_ms": round(lags[-1] * 1000, 2) if lags else None,
+        "statuses": statuses
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", type=Path, help="archive files or WEBHOOK_RECORD_DIR directories")
+    parser.add_argument("--url", default="http://127.0.0.1:8000/webhook")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier, e.g. 1, 10 or 100")
+    parser.add_argument("--secret", default=os.getenv("GITHUB_WEBHOOK_SECRET"), help="defaults to $GITHUB_WEBHOOK_SECRET")
+    parser.add_argument("--events", default="", help="comma-separated event types to replay (default all)")
+    parser.add_argument("--limit", type=int, help="replay only the first N deliveries")
+    parser.add_argument("--max-in-flight", type=int, default=200)
+    parser.add_argument("--keep-delivery-ids", action="store_true")
+    parser.add_argument("--output", type=Path, help="also write the summary as JSON")
+    args = parser.parse_args()
+
+    if not args.secret:
+        sys.exit("A webhook secret is required (--secret or GITHUB_WEBHOOK_SECRET)")
+    if args.speed <= 0:
+        sys.exit("--speed must be positive")
+
+    deliveries = read_recorded_deliveries(args.paths)
+    if args.events:
+        events = set(args.events.split(","))
+        deliveries = [delivery for delivery in deliveries if delivery["headers"].get("x-github-event") in events]
+    deliveries = deliveries[:args.limit]
+    if not deliveries:
+        sys.exit("No deliveries to replay")
+
+    summary = asyncio.run(replay(deliveries, args))
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
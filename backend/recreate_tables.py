@@ -1,9 +1,9 @@
 import asyncio
-from app.database import engine
+from app.database import get_engine
 from app.models import Base
 
 async def recreate_tables():
-    async with engine.begin() as conn:
+    async with get_engine().begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
     print('Tables recreated successfully')
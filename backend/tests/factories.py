@@ -0,0 +1,81 @@
+"""Rows for tests; each helper commits and returns primary keys"""
+from datetime import datetime, timezone
+from typing import List
+
+from app.database import AsyncSessionLocal
+from app.models import GitHubUser, Repository, GitHubIssue, DevinSession
+
+OWNER = "octo"
+REPO = "repo"
+FULL_NAME = f"{OWNER}/{REPO}"
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def issue_payload(number: int, updated_at: str = "2024-01-01T00:00:00Z", **fields) -> dict:
+    """A GitHub issue payload as the REST API and webhooks send it"""
+    return {
+        "id": 1000 + number,
+        "number": number,
+        "title": f"Issue {number}",
+        "body": "Steps to reproduce",
+        "state": "open",
+        "html_url": f"https://github.com/{FULL_NAME}/issues/{number}",
+        "updated_at": updated_at,
+        **fields
+    }
+
+
+async def create_repository(installation_id: str = "1", auto_scope: bool = False, budget: int = 10) -> int:
+    async with AsyncSessionLocal() as db:
+        user = GitHubUser(username=OWNER, installation_id=installation_id)
+        db.add(user)
+        await db.flush()
+        repository = Repository(
+            name=REPO,
+            full_name=FULL_NAME,
+            github_user=user.id,
+            auto_scope=auto_scope,
+            auto_scope_daily_budget=budget
+        )
+        db.add(repository)
+        await db.commit()
+        return repository.id
+
+
+async def create_issues(count: int, with_sessions: bool = True, first_number: int = 1) -> List[int]:
+    """count open issues in FULL_NAME, each with a finished scope session and an execute session"""
+    async with AsyncSessionLocal() as db:
+        issues = [
+            GitHubIssue(
+                github_issue_id=1000 + number,
+                title=f"Issue {number}",
+                body="Steps to reproduce",
+                state="open",
+                repository=FULL_NAME,
+                ref_id_number=number
+            )
+            for number in range(first_number, first_number + count)
+        ]
+        db.add_all(issues)
+        await db.flush()
+        if with_sessions:
+            for issue in issues:
+                db.add(DevinSession(
+                    github_issue_id=issue.id,
+                    session_id=f"scope-{issue.id}",
+                    session_type="scope",
+                    status="blocked",
+                    confidence_score=80,
+                    action_plan="1. Fix it"
+                ))
+                db.add(DevinSession(
+                    github_issue_id=issue.id,
+                    session_id=f"execute-{issue.id}",
+                    session_type="execute",
+                    status="running"
+                ))
+        await db.commit()
+        return [issue.id for issue in issues]
@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+from app.cache import MemoryCacheBackend, build_cache_backend
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCacheBackend(max_entries=2)
+
+    async def fill():
+        await cache.set("dashboard:a", 1, 60)
+        await cache.set("dashboard:b", 2, 60)
+        await cache.get("dashboard:a")
+        await cache.set("dashboard:c", 3, 60)
+        return [await cache.get(key) for key in ("dashboard:a", "dashboard:b", "dashboard:c")]
+
+    assert asyncio.run(fill()) == [1, None, 3]
+
+
+def test_memory_cache_drops_expired_entries_first():
+    cache = MemoryCacheBackend(max_entries=2)
+
+    async def fill():
+        await cache.set("dashboard:old", 1, -1)
+        await cache.set("dashboard:a", 2, 60)
+        await cache.set("dashboard:b", 3, 60)
+        return list(cache._entries)
+
+    assert asyncio.run(fill()) == ["dashboard:a", "dashboard:b"]
+
+
+def test_memory_backend_is_refused_without_background_in_api(monkeypatch):
+    monkeypatch.delenv("CACHE_BACKEND")
+    assert isinstance(build_cache_backend(background_in_api=True), MemoryCacheBackend)
+    with pytest.raises(ValueError):
+        build_cache_backend("memory", background_in_api=False)
@@ -0,0 +1,32 @@
+from .factories import create_repository, create_issues
+
+
+def test_dashboard_etag_revalidation(client, run):
+    run(create_repository)
+    run(create_issues, 2)
+
+    first = client.get("/dashboard")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+
+    cached = client.get("/dashboard", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+
+    run(create_issues, 1, False, 3)
+    changed = client.get("/dashboard", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    # The body is rebuilt for the new version, not served from the old cache entry
+    assert len(changed.json()["dashboard"]) == 3
+
+
+def test_repositories_etag_revalidation(client, run):
+    run(create_repository)
+
+    first = client.get("/app/repositories")
+    assert first.status_code == 200
+    assert [repository["full_name"] for repository in first.json()["repositories"]] == ["octo/repo"]
+
+    assert client.get("/app/repositories", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+    assert client.get("/app/repositories", headers={"If-None-Match": 'W/"other"'}).status_code == 200
@@ -0,0 +1,25 @@
+from unittest.mock import MagicMock
+
+from app.database import AsyncSessionLocal
+from app.issue_sync import refresh_repository_issues, issues_synced_at
+
+from .factories import OWNER, REPO, issue_payload, create_repository
+
+
+def test_freshness_is_tracked_per_state(run):
+    run(create_repository)
+    github = MagicMock()
+    github.get_repository_issues.return_value = [issue_payload(1), {**issue_payload(2), "pull_request": {}}]
+
+    async def refresh_open():
+        async with AsyncSessionLocal() as db:
+            return await refresh_repository_issues(db, github, OWNER, REPO, "open")
+
+    async def synced_at(state):
+        async with AsyncSessionLocal() as db:
+            return await issues_synced_at(db, OWNER, REPO, state)
+
+    issues = run(refresh_open)
+    assert [issue["number"] for issue in issues] == [1]
+    assert run(synced_at, "open") is not None
+    assert run(synced_at, "closed") is None
@@ -0,0 +1,83 @@
+from sqlalchemy import select, func
+
+from app.database import AsyncSessionLocal
+from app.models import GitHubIssue, DevinSession, PendingScope
+from app.issue_sync import upsert_issue, remove_issue, load_stored_issues
+
+from .factories import FULL_NAME, issue_payload
+
+
+async def stored_issue() -> GitHubIssue:
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(GitHubIssue))).scalar_one()
+
+
+async def upsert(payload) -> int:
+    async with AsyncSessionLocal() as db:
+        issue_pk = await upsert_issue(db, payload, FULL_NAME)
+        await db.commit()
+        return issue_pk
+
+
+async def remove(payload, action="deleted") -> bool:
+    async with AsyncSessionLocal() as db:
+        applied = await remove_issue(db, payload, action)
+        await db.commit()
+        return applied
+
+
+def test_upsert_ignores_older_deliveries(run):
+    assert run(upsert, issue_payload(1, "2024-01-02T00:00:00Z", title="Newer")) is not None
+    assert run(upsert, issue_payload(1, "2024-01-01T00:00:00Z", title="Older")) is None
+    assert run(stored_issue).title == "Newer"
+
+    assert run(upsert, issue_payload(1, "2024-01-03T00:00:00Z", title="Newest")) is not None
+    assert run(stored_issue).title == "Newest"
+
+
+def test_upsert_bumps_updated_at_only_for_tracked_changes(run):
+    run(upsert, issue_payload(1, "2024-01-01T00:00:00Z"))
+    first = run(stored_issue)
+
+    # Same content, newer GitHub timestamp (e.g. a label change): not a modification
+    run(upsert, issue_payload(1, "2024-01-02T00:00:00Z"))
+    unchanged = run(stored_issue)
+    assert unchanged.updated_at == first.updated_at
+    assert unchanged.github_updated_at > first.github_updated_at
+
+    run(upsert, issue_payload(1, "2024-01-03T00:00:00Z", body="New steps"))
+    assert run(stored_issue).updated_at > first.updated_at
+
+
+def test_removed_issue_keeps_sessions_and_drops_queued_scope(run):
+    issue_pk = run(upsert, issue_payload(1, "2024-01-01T00:00:00Z"))
+
+    async def add_history():
+        async with AsyncSessionLocal() as db:
+            db.add(DevinSession(github_issue_id=issue_pk, session_id="scope-1", session_type="scope"))
+            db.add(PendingScope(github_issue_id=issue_pk, repository=FULL_NAME, due_at=func.now()))
+            await db.commit()
+
+    async def remaining():
+        async with AsyncSessionLocal() as db:
+            sessions = (await db.execute(select(DevinSession.session_id))).scalars().all()
+            pending = (await db.execute(select(PendingScope.id))).scalars().all()
+            return sessions, pending
+
+    run(add_history)
+    assert run(remove, issue_payload(1, "2024-01-02T00:00:00Z"), "transferred") is True
+
+    assert run(stored_issue).state == "transferred"
+    assert run(remaining) == (["scope-1"], [])
+
+    async def listed():
+        async with AsyncSessionLocal() as db:
+            return await load_stored_issues(db, FULL_NAME, "all")
+
+    assert run(listed) == []
+
+
+def test_stale_removal_is_ignored(run):
+    run(upsert, issue_payload(1, "2024-01-02T00:00:00Z"))
+    assert run(remove, issue_payload(1, "2024-01-01T00:00:00Z")) is False
+    assert run(stored_issue).state == "open"
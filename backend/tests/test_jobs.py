@@ -0,0 +1,58 @@
+import asyncio
+
+from sqlalchemy import select
+
+from app import jobs
+from app.database import AsyncSessionLocal
+from app.models import BackgroundJob
+from app.jobs import enqueue_job, claim_job, process_next_job
+
+
+async def enqueue_jobs(count: int):
+    async with AsyncSessionLocal() as db:
+        for number in range(count):
+            await enqueue_job(db, "scope", {"issue_id": number})
+
+
+def test_concurrent_job_claims_are_disjoint(run):
+    run(enqueue_jobs, 3)
+
+    async def claim_all():
+        return await asyncio.gather(*(claim_job(["scope"]) for _ in range(5)))
+
+    claimed = [job for job in run(claim_all) if job is not None]
+    assert sorted(job.id for job in claimed) == [1, 2, 3]
+
+
+def test_job_result_is_stored(run):
+    run(enqueue_jobs, 1)
+
+    async def handle(payload, db):
+        return {"scoped": payload["issue_id"]}
+
+    assert run(process_next_job, {"scope": handle}) is True
+
+    async def stored():
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(select(BackgroundJob))).scalar_one()
+
+    job = run(stored)
+    assert (job.status, job.result) == ("done", '{"scoped": 0}')
+
+
+def test_job_fails_for_good_after_max_attempts(run, monkeypatch):
+    monkeypatch.setattr(jobs.job_queue, "max_attempts", 1)
+    run(enqueue_jobs, 1)
+
+    async def fail(payload, db):
+        raise RuntimeError("handler failed")
+
+    assert run(process_next_job, {"scope": fail}) is True
+
+    async def stored():
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(select(BackgroundJob))).scalar_one()
+
+    job = run(stored)
+    assert (job.status, job.last_error) == ("failed", "handler failed")
+    assert job.finished_at is not None
@@ -0,0 +1,41 @@
+import asyncio
+
+from app import leader
+from app.leader import LeaderElection
+
+
+def test_one_leader_and_failover(run, monkeypatch):
+    monkeypatch.setattr(leader, "LEADER_HEARTBEAT_SECONDS", 0.05)
+    monkeypatch.setattr(leader, "LEADER_RETRY_SECONDS", 0.05)
+
+    async def elect():
+        started = []
+
+        def singleton(worker):
+            async def job():
+                started.append(worker)
+                await asyncio.Event().wait()
+            return job
+
+        first = LeaderElection("test-singleton", {"job": singleton("first")})
+        second = LeaderElection("test-singleton", {"job": singleton("second")})
+        tasks = {first: asyncio.create_task(first.run()), second: asyncio.create_task(second.run())}
+        try:
+            await asyncio.sleep(0.5)
+            leaders = [election for election in tasks if election.is_leader]
+            assert len(leaders) == 1
+            assert len(started) == 1
+
+            # The leader's process goes away; its lock is released and the other takes over
+            tasks[leaders[0]].cancel()
+            await asyncio.gather(tasks[leaders[0]], return_exceptions=True)
+            await asyncio.sleep(0.5)
+            follower = first if leaders[0] is second else second
+            assert follower.is_leader
+            assert len(started) == 2 and started[0] != started[1]
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+    run(elect)
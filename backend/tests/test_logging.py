@@ -0,0 +1,40 @@
+import json
+import logging
+import queue
+
+from app.logging_config import RedactingQueueHandler, RedactingJsonFormatter, redact
+
+
+def queued_record(message, *args, **extra):
+    log_queue = queue.SimpleQueue()
+    handler = RedactingQueueHandler(log_queue)
+    logger = logging.Logger("test")
+    logger.addHandler(handler)
+    logger.warning(message, *args, extra=extra)
+    return log_queue.get_nowait()
+
+
+def test_message_keeps_values_from_the_time_of_the_call():
+    state = {"status": "running"}
+    record = queued_record("Session %s", state)
+    state["status"] = "finished"
+    assert record.getMessage() == "Session {'status': 'running'}"
+
+
+def test_message_is_redacted_before_it_is_queued():
+    record = queued_record("Response %s", '{"token": "v1.abc123", "expires_at": "2024-01-01"}')
+    assert record.getMessage() == 'Response {"token": "[REDACTED]", "expires_at": "2024-01-01"}'
+
+
+def test_sensitive_keys_are_redacted_whatever_the_value():
+    assert redact('{"token": "v1.abc"}') == '{"token": "[REDACTED]"}'
+    assert redact("{'client_secret': 'has spaces in it'}") == "{'client_secret': '[REDACTED]'}"
+    assert redact("password=hunter2; api_key=abc") == "password=[REDACTED]; api_key=[REDACTED]"
+    assert redact("token_count=3 tokens: 5") == "token_count=3 tokens: 5"
+
+
+def test_structured_fields_are_redacted_by_key():
+    record = queued_record("Minted", token="v1.abc", installation={"id": 42, "access_token": "v1.def"})
+    entry = json.loads(RedactingJsonFormatter().format(record))
+    assert entry["token"] == "[REDACTED]"
+    assert entry["installation"] == {"id": 42, "access_token": "[REDACTED]"}
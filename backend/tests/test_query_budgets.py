@@ -0,0 +1,65 @@
+from sqlalchemy import text, insert
+
+from app.database import AsyncSessionLocal
+from app.models import IssueSync
+from app.query_count import capture_queries
+from app.testing import assert_max_queries, assert_queries_do_not_scale
+
+from .conftest import truncate_tables
+from .factories import FULL_NAME, OWNER, REPO, create_repository, create_issues, utcnow
+
+
+async def seed_fresh_repository(issue_count: int):
+    await truncate_tables()
+    await create_repository()
+    await create_issues(issue_count)
+    # A current sync time keeps stored mode from refreshing from GitHub
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(IssueSync).values(repository=FULL_NAME, state="open", synced_at=utcnow()))
+        await db.commit()
+
+
+async def select_one():
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SELECT 1"))
+
+
+def test_dashboard_queries_do_not_scale(client, run):
+    def request():
+        response = client.get("/dashboard")
+        assert response.status_code == 200
+        return response
+
+    counts = assert_queries_do_not_scale(request, seed=lambda n: run(seed_fresh_repository, n))
+
+    dashboard = request().json()["dashboard"]
+    assert len(dashboard) == 25
+    assert all(entry["scope_session"] and entry["execution_session"] for entry in dashboard)
+    assert dashboard[0]["issue"]["issue_state"] == "scope-complete"
+    assert set(counts) == {1, 5, 25}
+
+
+def test_stored_issues_queries_do_not_scale(client, run):
+    def request():
+        response = client.get(f"/issues/{OWNER}/{REPO}", params={"mode": "stored", "limit": 100})
+        assert response.status_code == 200
+        assert response.json()["freshness"]["stale"] is False
+        return response
+
+    assert_queries_do_not_scale(request, seed=lambda n: run(seed_fresh_repository, n))
+    assert len(request().json()["issues"]) == 25
+
+
+def test_dashboard_query_budget(client, run):
+    run(seed_fresh_repository, 10)
+    # ETag version, cache lookup, issues, latest sessions, cache write
+    with assert_max_queries(5):
+        client.get("/dashboard")
+
+
+def test_request_captures_leave_out_background_queries(client, run):
+    with capture_queries(requests_only=True) as requests_only, capture_queries() as everything:
+        run(select_one)
+        client.get("/dashboard")
+    assert everything.count == requests_only.count + 1
+    assert requests_only.count > 0
@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app import scheduler
+from app.database import AsyncSessionLocal
+from app.models import SyncSchedule
+from app.scheduler import next_interval, claim_due_schedules, run_schedule
+
+from .factories import utcnow
+
+
+@pytest.fixture(autouse=True)
+def fixed_bounds(monkeypatch):
+    monkeypatch.setattr(scheduler, "SYNC_MIN_INTERVAL_SECONDS", 300)
+    monkeypatch.setattr(scheduler, "SYNC_MAX_INTERVAL_SECONDS", 86400)
+    monkeypatch.setattr(scheduler, "SYNC_JITTER", 0.0)
+
+
+def test_interval_halves_after_changes_and_doubles_after_none():
+    assert next_interval(3600, changes=3) == 1800
+    assert next_interval(3600, changes=0) == 7200
+
+
+def test_interval_is_clamped():
+    assert next_interval(400, changes=1) == 300
+    assert next_interval(60000, changes=0) == 86400
+
+
+async def create_schedule(last_run_at=None, interval=3600) -> int:
+    async with AsyncSessionLocal() as db:
+        schedule = SyncSchedule(
+            kind="repository",
+            target="octo/repo",
+            interval_seconds=interval,
+            next_run_at=utcnow() - timedelta(seconds=1),
+            last_run_at=last_run_at
+        )
+        db.add(schedule)
+        await db.commit()
+        return schedule.id
+
+
+async def run_due(job):
+    for schedule in await claim_due_schedules():
+        await run_schedule(schedule, {"repository": job})
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(SyncSchedule))).scalar_one()
+
+
+def sync_finding(changes):
+    async def job(db, target, last_run_at):
+        return changes
+    return job
+
+
+async def failing_sync(db, target, last_run_at):
+    raise RuntimeError("GitHub unavailable")
+
+
+def test_quiet_target_backs_off(run):
+    run(create_schedule, utcnow() - timedelta(hours=1))
+    schedule = run(run_due, sync_finding(0))
+    assert (schedule.interval_seconds, schedule.last_changes) == (7200, 0)
+    assert schedule.next_run_at > utcnow() + timedelta(seconds=7000)
+
+
+def test_busy_target_speeds_up(run):
+    run(create_schedule, utcnow() - timedelta(hours=1))
+    assert run(run_due, sync_finding(5)).interval_seconds == 1800
+
+
+def test_first_run_keeps_the_starting_interval(run):
+    run(create_schedule)
+    schedule = run(run_due, sync_finding(0))
+    assert schedule.interval_seconds == 3600
+    assert schedule.last_run_at is not None
+
+
+def test_failed_sync_keeps_its_interval(run):
+    run(create_schedule, utcnow() - timedelta(hours=1))
+    schedule = run(run_due, failing_sync)
+    assert (schedule.interval_seconds, schedule.last_error) == (3600, "GitHub unavailable")
+
+
+def test_claimed_schedule_is_leased(run):
+    run(create_schedule)
+    assert len(run(claim_due_schedules)) == 1
+    assert run(claim_due_schedules) == []
@@ -0,0 +1,66 @@
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.models import PendingScope, DevinSession
+from app.scoping import process_due_scopes
+
+from .factories import FULL_NAME, create_repository, create_issues, utcnow
+
+
+def devin() -> MagicMock:
+    client = MagicMock()
+    client.generate_scope_prompt.return_value = "prompt"
+    client.create_session.return_value = {"session_id": "devin-1"}
+    return client
+
+
+async def queue_scopes(issue_pks):
+    async with AsyncSessionLocal() as db:
+        for issue_pk in issue_pks:
+            db.add(PendingScope(github_issue_id=issue_pk, repository=FULL_NAME, due_at=utcnow() - timedelta(minutes=1)))
+        await db.commit()
+
+
+async def scope_state():
+    async with AsyncSessionLocal() as db:
+        pending = (await db.execute(select(PendingScope.github_issue_id).order_by(PendingScope.id))).scalars().all()
+        sessions = (await db.execute(select(DevinSession.session_id))).scalars().all()
+        return pending, sessions
+
+
+def test_due_scopes_respect_the_daily_budget(run):
+    run(create_repository, "1", True, 1)
+    issue_pks = run(create_issues, 3, False)
+    run(queue_scopes, issue_pks)
+
+    assert run(process_due_scopes, devin()) == 1
+    pending, sessions = run(scope_state)
+    assert sessions == ["devin-1"]
+    # Over budget: pushed back, not dropped
+    assert pending == issue_pks[1:]
+
+
+def test_failed_devin_call_leaves_the_claim_to_expire(run):
+    run(create_repository, "1", True)
+    issue_pks = run(create_issues, 1, False)
+    run(queue_scopes, issue_pks)
+    client = devin()
+    client.create_session.return_value = None
+
+    assert run(process_due_scopes, client) == 0
+    # Claimed for a debounce window, so a second pass doesn't retry it straight away
+    assert run(process_due_scopes, client) == 0
+    assert client.create_session.call_count == 1
+    assert run(scope_state) == (issue_pks, [])
+
+
+def test_scopes_for_repositories_without_auto_scope_are_dropped(run):
+    run(create_repository)
+    run(queue_scopes, run(create_issues, 1, False))
+    client = devin()
+    assert run(process_due_scopes, client) == 0
+    assert client.create_session.call_count == 0
+    assert run(scope_state) == ([], [])
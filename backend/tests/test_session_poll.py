@@ -0,0 +1,75 @@
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import select, update
+
+from app import scoping
+from app.database import AsyncSessionLocal
+from app.models import DevinSession
+from app.scoping import poll_active_sessions
+
+from .factories import create_issues, utcnow
+
+
+def devin(**responses) -> MagicMock:
+    client = MagicMock()
+    client.get_session_status.side_effect = lambda session_id: responses.get(session_id, {"status": "running"})
+    return client
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    monkeypatch.setattr(scoping, "SESSION_POLL_BATCH_SIZE", 2)
+
+
+def test_poll_rotates_through_unchanged_sessions(run, small_batches):
+    issue_pk = run(create_issues, 1, False)[0]
+
+    async def add_sessions():
+        async with AsyncSessionLocal() as db:
+            for number in range(3):
+                db.add(DevinSession(github_issue_id=issue_pk, session_id=f"s{number}", session_type="scope", status="running"))
+            await db.commit()
+
+    run(add_sessions)
+    client = devin(s0={"status": "blocked", "structured_output": {"confidence_score": 80, "action_plan": "Plan"}})
+
+    assert run(poll_active_sessions, client) == 1
+    first_batch = [call.args[0] for call in client.get_session_status.call_args_list]
+    client.get_session_status.reset_mock()
+    run(poll_active_sessions, client)
+    second_batch = [call.args[0] for call in client.get_session_status.call_args_list]
+
+    assert first_batch == ["s0", "s1"]
+    # s0 is finished; the never-polled s2 goes ahead of s1
+    assert second_batch == ["s2", "s1"]
+
+    async def finished():
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(select(DevinSession).where(DevinSession.session_id == "s0"))).scalar_one()
+
+    session = run(finished)
+    assert (session.status, session.confidence_score, session.action_plan) == ("blocked", 80, "Plan")
+    assert session.last_polled_at is not None
+
+
+def test_polling_without_changes_keeps_updated_at(run, small_batches):
+    issue_pk = run(create_issues, 1, False)[0]
+
+    async def add_session():
+        async with AsyncSessionLocal() as db:
+            db.add(DevinSession(github_issue_id=issue_pk, session_id="s0", session_type="scope", status="running"))
+            await db.commit()
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(DevinSession).values(updated_at=utcnow() - timedelta(hours=1)))
+            await db.commit()
+
+    async def updated_at():
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(select(DevinSession.updated_at))).scalar_one()
+
+    run(add_session)
+    before = run(updated_at)
+    assert run(poll_active_sessions, devin()) == 0
+    assert run(updated_at) == before
@@ -0,0 +1,81 @@
+import time
+import asyncio
+import threading
+
+import pytest
+from cryptography.fernet import Fernet
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.models import GitHubUser
+from app.github_client import GitHubClient
+from app.token_store import InstallationTokenStore
+
+from .factories import create_repository
+
+INSTALLATION_ID = "42"
+
+
+@pytest.fixture
+def mints(monkeypatch):
+    """Replace the GitHub token exchange; returns the tokens handed out so far"""
+    minted = []
+    lock = threading.Lock()
+
+    def mint(client):
+        with lock:
+            minted.append(f"token-{len(minted) + 1}")
+            return minted[-1], time.time() + 3600
+
+    monkeypatch.setattr(GitHubClient, "mint_installation_token", mint)
+    return minted
+
+
+def app_client() -> GitHubClient:
+    return GitHubClient(app_id="1", private_key="unused", installation_id=INSTALLATION_ID)
+
+
+def test_processes_share_one_minted_token(run, mints):
+    run(create_repository, INSTALLATION_ID)
+    key = Fernet.generate_key().decode()
+    # Separate stores stand in for separate worker processes: their only shared state is the database
+    stores = [InstallationTokenStore(key) for _ in range(3)]
+    clients = [app_client() for _ in stores]
+
+    async def ensure_all():
+        await asyncio.gather(*(store.ensure_token(client) for store, client in zip(stores, clients)))
+
+    run(ensure_all)
+
+    assert mints == ["token-1"]
+    assert {client.headers["Authorization"] for client in clients} == {"token token-1"}
+
+    async def stored_token():
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(select(GitHubUser.access_token))).scalar_one()
+
+    stored = run(stored_token)
+    assert stored != "token-1"
+    assert Fernet(key.encode()).decrypt(stored.encode()).decode() == "token-1"
+
+
+def test_rejected_token_is_replaced(run, mints):
+    run(create_repository, INSTALLATION_ID)
+    store = InstallationTokenStore(Fernet.generate_key().decode())
+    client = app_client()
+    run(store.ensure_token, client)
+
+    # GitHub answered 401: the client drops its token and remembers which one it was
+    client.rejected_token = "token-1"
+    client.set_installation_token("token-1", 0)
+    run(store.ensure_token, client)
+
+    assert mints == ["token-1", "token-2"]
+    assert client.headers["Authorization"] == "token token-2"
+
+
+def test_disabled_store_leaves_minting_to_the_client(run, mints):
+    client = app_client()
+    run(InstallationTokenStore(None).ensure_token, client)
+    assert mints == []
+    assert client.token_needs_refresh()
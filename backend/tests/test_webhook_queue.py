@@ -0,0 +1,60 @@
+import asyncio
+
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.models import WebhookDelivery
+from app.webhook_queue import enqueue_delivery, claim_delivery, process_next_delivery
+
+
+async def enqueue_deliveries(count: int):
+    async with AsyncSessionLocal() as db:
+        for number in range(count):
+            await enqueue_delivery(db, f"delivery-{number}", "issues", b"{}")
+
+
+def test_concurrent_delivery_claims_are_disjoint(run):
+    run(enqueue_deliveries, 4)
+
+    async def claim_all():
+        return await asyncio.gather(*(claim_delivery() for _ in range(6)))
+
+    claimed = [delivery for delivery in run(claim_all) if delivery is not None]
+    assert sorted(delivery.delivery_id for delivery in claimed) == [f"delivery-{number}" for number in range(4)]
+    assert all(delivery.status == "processing" and delivery.attempts == 1 for delivery in claimed)
+
+
+def test_locked_delivery_is_skipped(run):
+    run(enqueue_deliveries, 2)
+
+    async def claim_while_first_is_locked():
+        async with AsyncSessionLocal() as db:
+            locked = (await db.execute(
+                select(WebhookDelivery.delivery_id).order_by(WebhookDelivery.id).limit(1).with_for_update()
+            )).scalar_one()
+            claimed = await claim_delivery()
+            await db.rollback()
+        return locked, claimed.delivery_id
+
+    assert run(claim_while_first_is_locked) == ("delivery-0", "delivery-1")
+
+
+def test_failed_delivery_is_retried_later(run):
+    run(enqueue_deliveries, 1)
+
+    async def fail(event_type, payload, db):
+        raise RuntimeError("handler failed")
+
+    async def process_twice():
+        return await process_next_delivery(fail), await process_next_delivery(fail)
+
+    # The retry waits out its backoff, so the second call finds nothing available
+    assert run(process_twice) == (True, False)
+
+    async def stored():
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(select(WebhookDelivery))).scalar_one()
+
+    delivery = run(stored)
+    assert (delivery.status, delivery.attempts, delivery.last_error) == ("pending", 1, "handler failed")
+    assert delivery.available_at > delivery.received_at
@@ -0,0 +1,69 @@
+import json
+
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.models import WebhookDelivery
+from app.main import process_webhook_event
+from app.webhook_queue import process_next_delivery
+from app.webhook_recorder import sign_webhook_payload
+
+from .conftest import WEBHOOK_SECRET
+from .factories import FULL_NAME, issue_payload
+
+BODY = json.dumps({"action": "opened", "issue": issue_payload(1), "repository": {"full_name": FULL_NAME}}).encode()
+
+
+def post(client, body=BODY, delivery_id="delivery-1", event="issues", signature=None):
+    headers = {"X-GitHub-Event": event, "X-GitHub-Delivery": delivery_id, "Content-Type": "application/json"}
+    if signature is not False:
+        headers["X-Hub-Signature-256"] = signature or sign_webhook_payload(body, WEBHOOK_SECRET)
+    return client.post("/webhook", content=body, headers=headers)
+
+
+async def stored_deliveries():
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(WebhookDelivery.delivery_id, WebhookDelivery.status))).all()
+
+
+def test_signed_delivery_is_queued_once(client, run):
+    first = post(client)
+    assert first.status_code == 202
+    assert first.json()["status"] == "queued"
+
+    redelivery = post(client)
+    assert redelivery.json()["status"] == "duplicate"
+    assert run(stored_deliveries) == [("delivery-1", "pending")]
+
+
+def test_bad_signature_is_rejected(client, run):
+    assert post(client, signature="sha256=" + "0" * 64).status_code == 401
+    assert post(client, signature=False).status_code == 401
+    assert run(stored_deliveries) == []
+
+
+def test_unsigned_events_are_refused_without_a_secret(client, run, monkeypatch):
+    monkeypatch.delenv("GITHUB_WEBHOOK_SECRET")
+
+    assert post(client, signature=False).status_code == 503
+    assert run(stored_deliveries) == []
+
+    ping = post(client, body=b'{"zen": "Keep it logically awesome."}', event="ping", signature=False)
+    assert ping.status_code == 202
+
+
+def test_deleted_issue_leaves_the_dashboard(client, run):
+    def deliver(action, updated_at, delivery_id):
+        body = json.dumps({
+            "action": action,
+            "issue": issue_payload(1, updated_at),
+            "repository": {"full_name": FULL_NAME}
+        }).encode()
+        assert post(client, body=body, delivery_id=delivery_id).status_code == 202
+        assert run(process_next_delivery, process_webhook_event) is True
+
+    deliver("opened", "2024-01-01T00:00:00Z", "delivery-1")
+    assert [item["issue"]["ref_id_number"] for item in client.get("/dashboard").json()["dashboard"]] == [1]
+
+    deliver("deleted", "2024-01-02T00:00:00Z", "delivery-2")
+    assert client.get("/dashboard").json()["dashboard"] == []